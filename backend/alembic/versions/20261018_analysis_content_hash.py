@@ -0,0 +1,25 @@
+"""Add content_hash to case_analyses for ETags
+
+Revision ID: 20261018_analysis_content_hash
+Revises: 20261018_search_indexes
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_analysis_content_hash'
+down_revision = '20261018_search_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('case_analyses', sa.Column('content_hash', sa.String(), nullable=True))
+    op.execute("UPDATE case_analyses SET content_hash = encode(sha256(convert_to(result::text, 'UTF8')), 'hex')")
+
+
+def downgrade() -> None:
+    op.drop_column('case_analyses', 'content_hash')
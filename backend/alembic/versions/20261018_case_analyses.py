@@ -0,0 +1,80 @@
+"""Move cached analysis results into a case_analyses table
+
+Revision ID: 20261018_case_analyses
+Revises: 20261018_case_list_counts
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_case_analyses'
+down_revision = '20261018_case_list_counts'
+branch_labels = None
+depends_on = None
+
+# Old cases column -> stage name
+STAGE_COLUMNS = {
+    'NARRATIVE': 'narrative_analysis_json',
+    'VISION': 'vision_analysis_json',
+    'SYNTHESIS': 'synthesis_analysis_json',
+}
+
+
+def upgrade() -> None:
+    op.create_table('case_analyses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('case_id', sa.Integer(), nullable=False),
+    sa.Column('stage', sa.String(), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('provider', sa.String(), nullable=True),
+    sa.Column('model', sa.String(), nullable=True),
+    sa.Column('prompt_version', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['case_id'], ['cases.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('case_id', 'stage', name='uq_case_analyses_case_stage')
+    )
+    op.create_index(op.f('ix_case_analyses_id'), 'case_analyses', ['id'], unique=False)
+    
+    # Backfill from the old Text columns. Unparseable blobs were never served
+    # successfully anyway, so they are skipped rather than failing the migration.
+    op.execute("""
+        CREATE FUNCTION pg_temp.try_jsonb(value text) RETURNS jsonb AS $$
+        BEGIN
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for stage, column in STAGE_COLUMNS.items():
+        op.execute(f"""
+            INSERT INTO case_analyses (case_id, stage, result, created_at, updated_at)
+            SELECT id, '{stage}', pg_temp.try_jsonb({column}),
+                   coalesce(updated_at, created_at), coalesce(updated_at, created_at)
+            FROM cases
+            WHERE {column} IS NOT NULL AND pg_temp.try_jsonb({column}) IS NOT NULL
+        """)
+    
+    for column in STAGE_COLUMNS.values():
+        op.drop_column('cases', column)
+
+
+def downgrade() -> None:
+    for column in STAGE_COLUMNS.values():
+        op.add_column('cases', sa.Column(column, sa.Text(), nullable=True))
+    
+    for stage, column in STAGE_COLUMNS.items():
+        op.execute(f"""
+            UPDATE cases SET {column} = case_analyses.result::text
+            FROM case_analyses
+            WHERE case_analyses.case_id = cases.id AND case_analyses.stage = '{stage}'
+        """)
+    
+    op.drop_index(op.f('ix_case_analyses_id'), table_name='case_analyses')
+    op.drop_table('case_analyses')
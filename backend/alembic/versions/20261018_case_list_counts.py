@@ -0,0 +1,37 @@
+"""Add denormalized evidence/report counts and keyset index to cases
+
+Revision ID: 20261018_case_list_counts
+Revises: add_sample_case_fields
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_case_list_counts'
+down_revision = 'add_sample_case_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('evidence_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('cases', sa.Column('report_count', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Backfill counts for existing cases
+    op.execute("""
+        UPDATE cases SET
+            evidence_count = (SELECT count(*) FROM evidence WHERE evidence.case_id = cases.id),
+            report_count = (SELECT count(*) FROM reports WHERE reports.case_id = cases.id)
+    """)
+    
+    # Keyset pagination index for (created_at, id) ordering
+    op.create_index('ix_cases_created_at_id', 'cases', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cases_created_at_id', table_name='cases')
+    op.drop_column('cases', 'report_count')
+    op.drop_column('cases', 'evidence_count')
@@ -0,0 +1,25 @@
+"""Add fingerprint to discrepancies so incremental synthesis keeps triaged rows
+
+Revision ID: 20261018_discrepancy_fingerprint
+Revises: 20261018_llm_calls
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_discrepancy_fingerprint'
+down_revision = '20261018_llm_calls'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows written before this have none; the next synthesis of their case replaces them
+    op.add_column('discrepancies', sa.Column('fingerprint', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('discrepancies', 'fingerprint')
@@ -0,0 +1,42 @@
+"""Add timestamp_ref and triage index to discrepancies, backfill from cached synthesis
+
+Revision ID: 20261018_discrepancy_rows
+Revises: 20261018_case_analyses
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_discrepancy_rows'
+down_revision = '20261018_case_analyses'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('discrepancies', sa.Column('timestamp_ref', sa.String(), nullable=True))
+    op.create_index('ix_discrepancies_case_status_id', 'discrepancies', ['case_id', 'status', 'id'], unique=False)
+    
+    # Materialize rows for cases that were synthesized before rows were persisted
+    op.execute("""
+        INSERT INTO discrepancies (case_id, timestamp_ref, clean_claim, visual_fact, description, status)
+        SELECT ca.case_id, d->>'timestamp_ref', d->>'clean_claim', d->>'visual_fact', d->>'description',
+               CASE WHEN d->>'status' IN ('FLAGGED', 'REVIEWED', 'DISMISSED')
+                    THEN (d->>'status')::discrepancystatus ELSE 'FLAGGED' END
+        FROM case_analyses ca
+        CROSS JOIN LATERAL jsonb_array_elements(
+            CASE WHEN jsonb_typeof(ca.result->'discrepancies') = 'array'
+                 THEN ca.result->'discrepancies' ELSE '[]'::jsonb END
+        ) AS d
+        WHERE ca.stage = 'SYNTHESIS'
+          AND d->>'clean_claim' IS NOT NULL AND d->>'visual_fact' IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM discrepancies x WHERE x.case_id = ca.case_id)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_discrepancies_case_status_id', table_name='discrepancies')
+    op.drop_column('discrepancies', 'timestamp_ref')
@@ -0,0 +1,43 @@
+"""Add llm_calls usage ledger
+
+Revision ID: 20261018_llm_calls
+Revises: 20261018_analysis_content_hash
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_llm_calls'
+down_revision = '20261018_analysis_content_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_calls',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('case_id', sa.Integer(), sa.ForeignKey('cases.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('stage', sa.String(), nullable=True),
+        sa.Column('prompt_version', sa.String(), nullable=True),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=True),
+        sa.Column('operation', sa.String(), nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), nullable=True),
+        sa.Column('completion_tokens', sa.Integer(), nullable=True),
+        sa.Column('latency_seconds', sa.Float(), nullable=False),
+        sa.Column('retries', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('outcome', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+    )
+    op.create_index('ix_llm_calls_case_id', 'llm_calls', ['case_id'])
+    op.create_index('ix_llm_calls_provider_created_at', 'llm_calls', ['provider', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_calls_provider_created_at', table_name='llm_calls')
+    op.drop_index('ix_llm_calls_case_id', table_name='llm_calls')
+    op.drop_table('llm_calls')
@@ -0,0 +1,49 @@
+"""Add full-text and structured search indexes over reports and case analyses
+
+Revision ID: 20261018_search_indexes
+Revises: 20261018_discrepancy_rows
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20261018_search_indexes'
+down_revision = '20261018_discrepancy_rows'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        ALTER TABLE reports ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(narrative_text, ''))) STORED
+    """)
+    op.execute("""
+        ALTER TABLE case_analyses ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (CASE stage
+            WHEN 'NARRATIVE' THEN to_tsvector('english',
+                jsonb_path_query_array(result, '$.timeline[*].description')
+                || jsonb_path_query_array(result, '$.timeline[*].object'))
+            WHEN 'VISION' THEN to_tsvector('english',
+                jsonb_path_query_array(result, '$.observations[*].label')
+                || jsonb_path_query_array(result, '$.observations[*].entity')
+                || jsonb_path_query_array(result, '$.observations[*].details'))
+        END) STORED
+    """)
+    op.create_index('ix_reports_search_vector', 'reports', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_case_analyses_search_vector', 'case_analyses', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index(
+        'ix_case_analyses_result', 'case_analyses', ['result'], unique=False,
+        postgresql_using='gin', postgresql_ops={'result': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_case_analyses_result', table_name='case_analyses')
+    op.drop_index('ix_case_analyses_search_vector', table_name='case_analyses')
+    op.drop_index('ix_reports_search_vector', table_name='reports')
+    op.drop_column('case_analyses', 'search_vector')
+    op.drop_column('reports', 'search_vector')
@@ -0,0 +1,191 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_db
+from app import schemas
+from app.api.analyze import accepted_versions, current_versions, reprocess_cases
+from app.services.analysis_store import version_summary, invalidate_analyses, VERSION_FIELDS
+from app.services.storage_gc import run_gc_sweep
+from app.services.llm_ledger import cost_by_case, provider_throughput
+from app.utils import cache, profiling
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import Literal, Optional
+from datetime import datetime
+import asyncio
+import secrets
+
+router = APIRouter()
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """Gate admin endpoints behind the X-Admin-Key header. Disabled when ADMIN_API_KEY is unset."""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+@router.post("/admin/storage/gc", dependencies=[Depends(require_admin)])
+async def storage_gc(db: AsyncSession = Depends(get_db)):
+    """
+    Runs a storage garbage-collection sweep now and reports what was reclaimed.
+    """
+    return await run_gc_sweep(db)
+
+
+@router.get("/admin/analyses/versions", dependencies=[Depends(require_admin)])
+async def analysis_versions(db: AsyncSession = Depends(get_db)):
+    """
+    Shows which provider/model/prompt versions the cached analyses were produced
+    by, next to the versions the agents use now. With fused mode on, results of the
+    fused agent count as current too.
+    """
+    accepted = accepted_versions()
+    stored = await version_summary(db)
+    for row in stored:
+        row["is_current"] = any(
+            all(row[field] == info.get(field) for field in VERSION_FIELDS) for info in accepted.get(row["stage"], [])
+        )
+    return {"current": current_versions(), "accepted": accepted, "stored": stored}
+
+
+@router.post("/admin/analyses/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_cached_analyses(
+    body: schemas.AnalysisInvalidateRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Drops cached analyses matching a stage/version filter, e.g. everything made
+    with an old narrative prompt. Dependent syntheses are dropped with them.
+    With reprocess=true the affected stages are re-run in the background.
+    """
+    filters = {
+        "stages": [stage.value for stage in body.stages] if body.stages else None,
+        "provider": body.provider,
+        "model": body.model,
+        "prompt_version": body.prompt_version,
+        "case_ids": body.case_ids,
+        "stale_against": accepted_versions() if body.stale_only else None,
+    }
+    if all(value is None for value in filters.values()):
+        raise HTTPException(status_code=400, detail="Pass at least one filter (or stale_only) to invalidate")
+    
+    removed = await invalidate_analyses(db, **filters)
+    await db.commit()
+    
+    for case_id in removed:
+        await cache.invalidate_case(case_id)
+    await cache.invalidate_prefix(cache.SAMPLE_CASES_PREFIX)
+    
+    if body.reprocess and removed:
+        background_tasks.add_task(reprocess_cases, removed)
+    
+    return {
+        "invalidated": sum(len(stages) for stages in removed.values()),
+        "cases": len(removed),
+        "reprocessing": bool(body.reprocess and removed),
+    }
+
+
+@router.get("/admin/llm/cost", dependencies=[Depends(require_admin)])
+async def llm_cost(
+    case_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Token spend per case from the llm_calls ledger, heaviest first, broken down by
+    stage, model and prompt version. Costs are priced with LLM_PRICING.
+    """
+    return {"items": await cost_by_case(db, case_id=case_id, since=since, limit=limit)}
+
+
+@router.get("/admin/llm/throughput", dependencies=[Depends(require_admin)])
+async def llm_throughput(
+    since: Optional[datetime] = None,
+    bucket: Literal["minute", "hour", "day"] = "hour",
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Calls, failures, tokens and latency per provider/model per time bucket.
+    """
+    return {"items": await provider_throughput(db, since=since, bucket=bucket)}
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def profiles():
+    """
+    Stored request profiles, newest first. Profile a request by sending it with
+    X-Profile: cprofile|sample (or ?profile=) and the admin key while PROFILING_ENABLED is on.
+    """
+    return {"enabled": settings.PROFILING_ENABLED, "items": profiling.list_profiles()}
+
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def profile_detail(
+    profile_id: str,
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative",
+    limit: int = Query(50, ge=1, le=1000),
+    match: Optional[str] = Query(None, description='Only functions/stacks matching this regex, e.g. "pdf_service|cloudqwen"'),
+    raw: bool = False,
+):
+    """
+    Text view of one profile (pstats for cProfile, heaviest stacks for sampled
+    profiles). raw=true downloads the .prof / collapsed-stack file instead.
+    """
+    meta = profiling.load_profile(profile_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if raw:
+        return FileResponse(meta["data_path"], filename=meta["data_path"].rsplit("/", 1)[-1])
+    text = await asyncio.to_thread(profiling.render_profile, meta, sort, limit, match)
+    return PlainTextResponse(text)
+
+
+@router.get("/admin/memory/tracemalloc", dependencies=[Depends(require_admin)])
+async def tracemalloc_status():
+    return profiling.tracemalloc_status()
+
+
+@router.post("/admin/memory/tracemalloc/start", dependencies=[Depends(require_admin)])
+async def tracemalloc_start(frames: int = Query(25, ge=1, le=100)):
+    """
+    Starts tracing allocations (with this many frames per traceback). Every
+    allocation pays for it until stopped, so turn it off when done.
+    """
+    return profiling.start_tracemalloc(frames)
+
+
+@router.post("/admin/memory/tracemalloc/stop", dependencies=[Depends(require_admin)])
+async def tracemalloc_stop():
+    return profiling.stop_tracemalloc()
+
+
+@router.post("/admin/memory/tracemalloc/snapshot", dependencies=[Depends(require_admin)])
+async def tracemalloc_snapshot(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+):
+    """
+    Top live allocators right now; the snapshot becomes the baseline for /diff.
+    """
+    try:
+        return await asyncio.to_thread(profiling.top_allocations, limit, group_by, True)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/admin/memory/tracemalloc/diff", dependencies=[Depends(require_admin)])
+async def tracemalloc_diff(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno",
+):
+    """
+    Allocation growth since the last snapshot, biggest first.
+    """
+    try:
+        return await asyncio.to_thread(profiling.diff_allocations, limit, group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
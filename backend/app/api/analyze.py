@@ -1,13 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from app.database import get_db
+from app.database import get_db, AsyncSessionLocal
 from app import models, schemas
 from app.services.agent_narrative import AgentNarrative
 from app.services.agent_vision import AgentVision
-from app.services.synthesizer import AgentSynthesizer
-from typing import List
+from app.services.agent_audio import AgentAudio
+from app.services.synthesizer import AgentSynthesizer, fingerprint, input_key, source_evidence_id
+from app.services.agent_fused import AgentFused
+from app.services.timeline_merge import MERGE_FIELDS, merge_timelines
+from app.services.pdf_service import PDFService
+from app.services.analysis_store import (
+    NARRATIVE, VISION, AUDIO, SYNTHESIS, RawAnalysis,
+    load_analysis, load_analysis_raw, has_analysis, has_newer_inputs, save_analysis, clear_analyses, is_stale,
+)
+from app.services.discrepancy_store import merge_discrepancies
+from app.utils.http_cache import json_bytes_response
+from app.utils import cache, metrics, llm_usage, image_exif, image_hash, image_quality
+from app.utils.storage import read_file_content
+from app.utils.hashing import sha256_hex
+from app.config import settings
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import json
 
 router = APIRouter()
@@ -15,14 +30,186 @@ router = APIRouter()
 # Instantiate agents
 narrative_agent = AgentNarrative()
 vision_agent = AgentVision()
+audio_agent = AgentAudio()
 synthesizer_agent = AgentSynthesizer()
+fused_agent = AgentFused()
+
+STAGE_AGENTS = {
+    NARRATIVE: narrative_agent,
+    VISION: vision_agent,
+    AUDIO: audio_agent,
+    SYNTHESIS: synthesizer_agent,
+}
+
+# Stages a fused (single-call) analysis produces, and its llm_usage / metrics label
+FUSED_STAGES = (NARRATIVE, VISION, SYNTHESIS)
+FUSED = "FUSED"
+
+def current_versions() -> dict:
+    """Stage -> provider/model/prompt_version the agents would tag new results with."""
+    return {stage: agent.version_info() for stage, agent in STAGE_AGENTS.items()}
+
+def accepted_versions() -> Dict[str, List[dict]]:
+    """
+    Stage -> every version info whose results count as current: the stage agent's, and
+    the fused agent's for the stages it produces while FUSED_ANALYSIS_ENABLED.
+    """
+    accepted = {stage: [info] for stage, info in current_versions().items()}
+    if settings.FUSED_ANALYSIS_ENABLED:
+        for stage in FUSED_STAGES:
+            accepted[stage].append(fused_agent.version_info())
+    return accepted
+
+ANALYZABLE_EVIDENCE = (models.EvidenceType.IMAGE, models.EvidenceType.VIDEO)
+
+async def _analyze_evidence(evidence: models.Evidence) -> dict:
+    """Vision analysis of one image or video evidence item."""
+    if evidence.type == models.EvidenceType.VIDEO:
+        return await vision_agent.analyze_video(evidence.file_path)
+    return await vision_agent.analyze_evidence(evidence.file_path)
+
+async def _image_info(evidence: models.Evidence) -> dict:
+    """
+    Evidence metadata with EXIF capture data, perceptual hashes and quality
+    scores; computed and stored for uploads that predate them.
+    """
+    metadata = json.loads(evidence.metadata_json) if evidence.metadata_json else {}
+    if any(key not in metadata for key in ("exif", "image_hash", "image_quality")):
+        try:
+            content = await read_file_content(evidence.file_path)
+        except Exception:
+            return {}
+        # Stored even when None (unreadable image) so it isn't retried every run
+        metadata.update(await asyncio.to_thread(image_quality.image_metadata, content))
+        evidence.metadata_json = json.dumps(metadata)
+    return metadata
+
+def _date_observations(observations: List[dict], info: dict):
+    """Give a still's observations its EXIF capture time in place of the model's placeholder timestamp."""
+    captured_at = (info.get("exif") or {}).get("captured_at")
+    if not captured_at:
+        return
+    for obs in observations:
+        obs["captured_at"] = captured_at
+        obs["timestamp_ref"] = image_exif.time_of_day(captured_at)
+
+def _quality_issues(info: dict) -> List[str]:
+    scores = info.get("image_quality")
+    return image_quality.issues(scores) if scores else []
+
+QUALITY_ACTIONS = {"flag": "flagged", "deprioritize": "deprioritized", "skip": "skipped"}
+
+async def _quality_flags(stills: List[models.Evidence]) -> List[dict]:
+    """Stills whose quality scores fail the IMAGE_QUALITY_* thresholds, with the action the policy takes."""
+    action = QUALITY_ACTIONS.get(settings.IMAGE_QUALITY_POLICY.lower())
+    if action is None:
+        return []
+    flags = []
+    for evidence in stills:
+        issues = _quality_issues(await _image_info(evidence))
+        if issues:
+            flags.append({"evidence_id": evidence.id, "issues": issues, "action": action})
+    return flags
+
+async def _near_duplicates(stills: List[models.Evidence]) -> Dict[int, Tuple[int, int]]:
+    """
+    Evidence id -> (id of the earlier image it duplicates, hash distance) for every
+    still within IMAGE_DEDUP_MAX_DISTANCE of an earlier, non-duplicate still.
+    """
+    representatives = []
+    duplicates = {}
+    for evidence in stills:
+        hashes = (await _image_info(evidence)).get("image_hash")
+        if hashes is None:
+            continue
+        match = min(
+            ((image_hash.distance(hashes, other), other_id) for other_id, other in representatives),
+            default=None,
+        )
+        if match and match[0] <= settings.IMAGE_DEDUP_MAX_DISTANCE:
+            duplicates[evidence.id] = (match[1], match[0])
+        else:
+            representatives.append((evidence.id, hashes))
+    return duplicates
+
+def _servable(cached, stage: str) -> bool:
+    """Whether a cached result may be returned as-is under ANALYSIS_STALE_POLICY."""
+    if cached is None:
+        return False
+    if settings.ANALYSIS_STALE_POLICY == "recompute":
+        return not _stale(cached, stage)
+    return True
+
+def _stale(cached, stage: str) -> bool:
+    """Made by none of the accepted versions (see accepted_versions)."""
+    return all(is_stale(cached, info) for info in accepted_versions()[stage])
+
+def _analysis_response(request: Request, raw: RawAnalysis, stage: str):
+    headers = None
+    if settings.ANALYSIS_STALE_POLICY == "warn" and _stale(raw, stage):
+        headers = {"X-Analysis-Stale": "true"}
+    return json_bytes_response(request, raw.text, raw.content_hash, headers)
+
+async def _commit_case(db: AsyncSession, case: models.Case):
+    """Commit, then drop the case's cached detail so the next poll sees the change."""
+    await db.commit()
+    await cache.invalidate_case(case.id, case.is_sample_case)
+
+def _validated(schema, analysis_dict: dict) -> dict:
+    """Validate an agent result once, before it is cached; cache hits are served without re-validation."""
+    try:
+        return schema(**analysis_dict).model_dump(mode="json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Schema Validation Failed: {e}")
 
 @router.post("/analyze/case/{case_id}/narrative", response_model=schemas.NarrativeAnalysisResult)
-async def analyze_narrative(case_id: int, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
+async def analyze_narrative(
+    case_id: int, request: Request, force_rerun: bool = False, full: bool = False, db: AsyncSession = Depends(get_db)
+):
     """
-    Triggers Agent 1 to read the report and extract claims.
-    If already analyzed, returns cached result unless force_rerun=True.
+    Triggers Agent 1 to read every report of the case and extract claims, merged
+    into one timeline. If already analyzed, returns cached result unless force_rerun=True;
+    a rerun only re-extracts reports that are new or changed, full=true all of them.
+    Cached results are served as stored, with an ETag.
     """
+    raw = await _run_narrative(case_id, force_rerun, db, full=full)
+    return _analysis_response(request, raw, NARRATIVE)
+
+def _previous_extractions(result: dict) -> Dict[int, Tuple[str, List[dict]]]:
+    """Report id -> (text hash, claims as extracted) from a stored narrative result."""
+    claims: Dict[int, List[dict]] = {}
+    for claim in result.get("timeline", []):
+        stripped = {k: v for k, v in claim.items() if k not in MERGE_FIELDS}
+        claims.setdefault(claim.get("report_id"), []).append(stripped)
+    return {
+        report["report_id"]: (report["content_hash"], claims.get(report["report_id"], []))
+        for report in result.get("reports", [])
+    }
+
+def _covers_reports(raw: RawAnalysis, reports: List[models.Report]) -> bool:
+    """Whether a stored narrative result was extracted from exactly these reports."""
+    stored = json.loads(raw.text).get("reports", [])
+    return {report["report_id"] for report in stored} == {report.id for report in reports}
+
+def _pending_reports(
+    reports: List[models.Report], hashes: Dict[int, str], previous: Dict[int, Tuple[str, List[dict]]]
+) -> List[models.Report]:
+    """Reports that are new, or whose text changed, since the previous extraction."""
+    return [report for report in reports if previous.get(report.id, (None,))[0] != hashes[report.id]]
+
+async def _extract_report_texts(db: AsyncSession, case: models.Case, reports: List[models.Report]):
+    """Extract report text once and keep it (it also feeds report full-text search)."""
+    missing = [report for report in reports if not report.narrative_text]
+    if missing:
+        try:
+            texts = await asyncio.gather(*(PDFService.extract_text(report.file_path) for report in missing))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to extract report text: {e}")
+        for report, text in zip(missing, texts):
+            report.narrative_text = text
+        await _commit_case(db, case)
+
+async def _run_narrative(case_id: int, force_rerun: bool, db: AsyncSession, full: bool = False) -> RawAnalysis:
     # Get case with reports
     result = await db.execute(
         select(models.Case)
@@ -34,46 +221,70 @@ async def analyze_narrative(case_id: int, force_rerun: bool = False, db: AsyncSe
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     
-    # Check for cached result
-    if case.narrative_analysis_json and not force_rerun:
-        try:
-            cached_result = json.loads(case.narrative_analysis_json)
-            return schemas.NarrativeAnalysisResult(**cached_result)
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Failed to parse cached narrative result: {e}")
+    # Check for cached result; one from before a report was added or removed is recomputed
+    cached = await load_analysis_raw(db, case_id, NARRATIVE) if not force_rerun else None
+    if _servable(cached, NARRATIVE) and _covers_reports(cached, case.reports):
+        return cached
     
-    # Get report
+    # Get reports, in upload order
     if not case.reports:
         raise HTTPException(status_code=404, detail="No report found for this case")
     
-    report = case.reports[0]
+    reports = sorted(case.reports, key=lambda report: report.id)
     
     # Update status to IN_PROGRESS
     case.analysis_status = "IN_PROGRESS"
-    await db.commit()
+    await _commit_case(db, case)
     
-    # Run Agent
-    analysis_dict = await narrative_agent.process_report(report.file_path)
+    await _extract_report_texts(db, case, reports)
     
-    if "error" in analysis_dict:
-        error_msg = analysis_dict["error"]
+    # Reports whose text is unchanged since a previous result from the same prompt and model keep their claims
+    previous = {}
+    previous_cached = await load_analysis(db, case_id, NARRATIVE) if not full else None
+    if previous_cached and not is_stale(previous_cached, narrative_agent.version_info()):
+        previous = _previous_extractions(previous_cached.result)
+    hashes = {report.id: sha256_hex(report.narrative_text)[:16] for report in reports}
+    pending = _pending_reports(reports, hashes, previous)
+    
+    # Run Agent on the rest, a bounded number of reports at a time
+    slots = asyncio.Semaphore(settings.NARRATIVE_CONCURRENCY)
+    
+    async def extract(report: models.Report) -> dict:
+        async with slots:
+            return await narrative_agent.extract_claims(report.narrative_text)
+    
+    with metrics.timed(metrics.ANALYSIS_STAGE_SECONDS, stage=NARRATIVE), \
+            llm_usage.call_scope(case_id, NARRATIVE, narrative_agent.PROMPT_VERSION):
+        extracted = await asyncio.gather(*(extract(report) for report in pending))
+    
+    failed = next((analysis for analysis in extracted if "error" in analysis), None)
+    if failed:
+        error_msg = failed["error"]
         print(f"Narrative Agent Error: {error_msg}")
         if "429" in error_msg or "Quota" in error_msg or "ResourceExhausted" in error_msg:
             raise HTTPException(status_code=429, detail=f"Rate Limit Exceeded: {error_msg}")
         raise HTTPException(status_code=500, detail=error_msg)
+    if len(reports) > 1:
+        print(f"[Narrative] Case {case_id}: extracted {len(pending)} of {len(reports)} reports")
+    
+    claims = {report.id: previous[report.id][1] for report in reports if report not in pending}
+    claims.update({report.id: analysis.get("timeline", []) for report, analysis in zip(pending, extracted)})
+    analysis_dict = {
+        "timeline": merge_timelines([(report.id, claims[report.id]) for report in reports]),
+        "reports": [
+            {"report_id": report.id, "report_index": idx + 1, "content_hash": hashes[report.id], "claims": len(claims[report.id])}
+            for idx, report in enumerate(reports)
+        ],
+    }
 
-    # Cache the result
-    case.narrative_analysis_json = json.dumps(analysis_dict)
-    await db.commit()
-    
-    # Validate & Return
-    try:
-        return schemas.NarrativeAnalysisResult(**analysis_dict)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Schema Validation Failed: {e}")
+    # Validate & cache the result
+    validated = _validated(schemas.NarrativeAnalysisResult, analysis_dict)
+    raw = await save_analysis(db, case_id, NARRATIVE, validated, **narrative_agent.version_info())
+    await _commit_case(db, case)
+    return raw
 
 @router.post("/analyze/evidence/{evidence_id}", response_model=schemas.VisionAnalysisResult)
-async def analyze_evidence_item(evidence_id: int, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
+async def analyze_evidence_item(evidence_id: int, request: Request, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
     """
     Triggers Agent 2 to analyze a specific piece of evidence.
     """
@@ -81,22 +292,28 @@ async def analyze_evidence_item(evidence_id: int, force_rerun: bool = False, db:
     if not evidence:
         raise HTTPException(status_code=404, detail="Evidence not found")
         
-    if evidence.type != models.EvidenceType.IMAGE:
-         raise HTTPException(status_code=400, detail="Only Image analysis supported in MVP")
+    if evidence.type not in ANALYZABLE_EVIDENCE:
+         raise HTTPException(status_code=400, detail="Only image and video analysis supported")
+    
+    if evidence.type == models.EvidenceType.IMAGE and settings.IMAGE_QUALITY_POLICY.lower() == "skip":
+        issues = _quality_issues(await _image_info(evidence))
+        if issues:
+            await db.commit()  # Keep freshly computed scores
+            raise HTTPException(status_code=422, detail=f"Image skipped as unusable: {', '.join(issues)}")
     
     # Get the case to cache results
     case = await db.get(models.Case, evidence.case_id)
     
     # Check for cached result
-    if case and case.vision_analysis_json and not force_rerun:
-        try:
-            cached_result = json.loads(case.vision_analysis_json)
-            return schemas.VisionAnalysisResult(**cached_result)
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Failed to parse cached vision result: {e}")
+    cached = await load_analysis_raw(db, case.id, VISION) if case and not force_rerun else None
+    if _servable(cached, VISION):
+        return _analysis_response(request, cached, VISION)
     
     # Run Agent
-    analysis_dict = await vision_agent.analyze_evidence(evidence.file_path)
+    with llm_usage.call_scope(evidence.case_id, VISION, vision_agent.PROMPT_VERSION):
+        analysis_dict = await _analyze_evidence(evidence)
+    if evidence.type == models.EvidenceType.IMAGE:
+        _date_observations(analysis_dict.get("observations", []), await _image_info(evidence))
     
     if "error" in analysis_dict:
         error_msg = analysis_dict["error"]
@@ -104,19 +321,18 @@ async def analyze_evidence_item(evidence_id: int, force_rerun: bool = False, db:
             raise HTTPException(status_code=429, detail=f"Rate Limit Exceeded: {error_msg}")
         raise HTTPException(status_code=500, detail=error_msg)
     
+    validated = _validated(schemas.VisionAnalysisResult, analysis_dict)
+    
     # Cache the result and update status
     if case:
-        case.vision_analysis_json = json.dumps(analysis_dict)
+        raw = await save_analysis(db, case.id, VISION, validated, **vision_agent.version_info())
         # Mark as completed if both analyses are done
-        if case.narrative_analysis_json:
+        if await has_analysis(db, case.id, NARRATIVE):
             case.analysis_status = "COMPLETED"
-        await db.commit()
-        
-    # Validate & Return
-    try:
-        return schemas.VisionAnalysisResult(**analysis_dict)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Schema Validation Failed: {e}")
+        await _commit_case(db, case)
+        return _analysis_response(request, raw, VISION)
+    
+    return json_bytes_response(request, json.dumps(validated))
 
 @router.post("/analyze/case/{case_id}/rerun")
 async def rerun_analysis(case_id: int, db: AsyncSession = Depends(get_db)):
@@ -137,44 +353,242 @@ async def rerun_analysis(case_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Case not found")
     
     # Clear cached results
-    case.narrative_analysis_json = None
-    case.vision_analysis_json = None
+    await clear_analyses(db, case_id, [NARRATIVE, VISION, AUDIO])
     case.analysis_status = "PENDING"
-    await db.commit()
+    await _commit_case(db, case)
     
     # Run fresh analysis
     narrative_result = None
     vision_result = None
+    audio_result = None
     
     # Narrative analysis
     if case.reports:
         try:
-            narrative_res = await analyze_narrative(case_id, force_rerun=True, db=db)
-            narrative_result = narrative_res
+            narrative_res = await _run_narrative(case_id, force_rerun=True, db=db)
+            narrative_result = json.loads(narrative_res.text)
         except HTTPException as e:
             narrative_result = {"error": e.detail}
     
     # Vision analysis - now analyzes ALL images
     if case.evidence:
         try:
-            vision_res = await analyze_all_evidence(case_id, force_rerun=True, db=db)
-            vision_result = vision_res
+            vision_res = await _run_all_evidence(case_id, force_rerun=True, db=db)
+            vision_result = json.loads(vision_res.text)
         except HTTPException as e:
             vision_result = {"error": e.detail}
     
+    # Audio transcription and claims, when the case has recordings
+    if any(e.type == models.EvidenceType.AUDIO for e in case.evidence):
+        try:
+            audio_res = await _run_audio(case_id, force_rerun=True, db=db)
+            audio_result = json.loads(audio_res.text)
+        except HTTPException as e:
+            audio_result = {"error": e.detail}
+    
     return {
         "message": "Analysis rerun completed",
         "narrative_analysis": narrative_result,
-        "vision_analysis": vision_result
+        "vision_analysis": vision_result,
+        "audio_analysis": audio_result
+    }
+
+
+@router.post("/analyze/case/{case_id}/pipeline")
+async def analyze_case_pipeline(case_id: int, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
+    """
+    Runs the whole analysis of a case: narrative, vision, audio (if any) and synthesis.
+    With FUSED_ANALYSIS_ENABLED, a small image-only case is analyzed in one multimodal
+    request instead; otherwise each stage runs, or is served from cache, as usual.
+    """
+    result = await db.execute(
+        select(models.Case)
+        .where(models.Case.id == case_id)
+        .options(
+            selectinload(models.Case.reports),
+            selectinload(models.Case.evidence)
+        )
+    )
+    case = result.scalar_one_or_none()
+    
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    results = {}
+    mode = "staged"
+    if settings.FUSED_ANALYSIS_ENABLED:
+        cached = [await load_analysis_raw(db, case_id, stage) for stage in FUSED_STAGES]
+        if force_rerun or not all(_servable(raw, stage) for raw, stage in zip(cached, FUSED_STAGES)):
+            fused = await _run_fused(case, db)
+            if fused:
+                mode = "fused"
+                results = {stage: json.loads(raw.text) for stage, raw in fused.items()}
+    
+    if mode == "staged":
+        for stage, applies in (
+            (NARRATIVE, bool(case.reports)),
+            (VISION, any(e.type in ANALYZABLE_EVIDENCE for e in case.evidence)),
+            (AUDIO, any(e.type == models.EvidenceType.AUDIO for e in case.evidence)),
+            (SYNTHESIS, bool(case.reports)),
+        ):
+            if not applies:
+                continue
+            try:
+                raw = await STAGE_RUNNERS[stage](case_id, force_rerun=force_rerun, db=db)
+                results[stage] = json.loads(raw.text)
+            except HTTPException as e:
+                results[stage] = {"error": e.detail}
+    
+    return {
+        "mode": mode,
+        "narrative_analysis": results.get(NARRATIVE),
+        "vision_analysis": results.get(VISION),
+        "audio_analysis": results.get(AUDIO),
+        "synthesis_analysis": results.get(SYNTHESIS),
+    }
+
+async def _run_fused(case: models.Case, db: AsyncSession) -> Optional[Dict[str, RawAnalysis]]:
+    """
+    Narrative, vision and synthesis results of a small image-only case from one request.
+    None when the case doesn't fit (FUSED_* settings, the provider's image budget) or the
+    answer can't be used, so the caller runs the stages one by one instead.
+    """
+    if not case.reports or not case.evidence or any(e.type != models.EvidenceType.IMAGE for e in case.evidence):
+        return None  # Video and audio need their own pipelines
+    
+    quality_flags = await _quality_flags(case.evidence)
+    skipped = {flag["evidence_id"] for flag in quality_flags if flag["action"] == "skipped"}
+    stills = [(idx + 1, e) for idx, e in enumerate(case.evidence) if e.id not in skipped]
+    if not stills or len(stills) > settings.FUSED_MAX_IMAGES:
+        return None
+    
+    reports = sorted(case.reports, key=lambda report: report.id)
+    await _extract_report_texts(db, case, reports)
+    texts = [report.narrative_text for report in reports]
+    images = await fused_agent.normalized_images([e.file_path for _, e in stills])
+    if any(image is None for image in images) or not fused_agent.accepts(
+        sum(len(text) for text in texts), [len(image) for image in images]
+    ):
+        return None
+    
+    case.analysis_status = "IN_PROGRESS"
+    await _commit_case(db, case)
+    
+    with metrics.timed(metrics.ANALYSIS_STAGE_SECONDS, stage=FUSED), \
+            llm_usage.call_scope(case.id, FUSED, fused_agent.PROMPT_VERSION):
+        answer = await fused_agent.analyze_case(texts, images)
+    
+    if "error" in answer:
+        error_msg = answer["error"]
+        print(f"Fused Agent Error: {error_msg}")
+        if "429" in error_msg or "Quota" in error_msg or "ResourceExhausted" in error_msg:
+            raise HTTPException(status_code=429, detail=f"Rate Limit Exceeded: {error_msg}")
+        return None
+    
+    try:
+        infos = [await _image_info(e) for _, e in stills]
+        stages = _split_fused(answer, reports, [(idx, e, info) for (idx, e), info in zip(stills, infos)], quality_flags)
+    except (ValueError, TypeError, HTTPException) as e:
+        print(f"[Fused] Case {case.id}: unusable answer, running stages one by one - {getattr(e, 'detail', e)}")
+        return None
+    
+    # All three stages and the discrepancy rows in one transaction
+    raws = {
+        stage: await save_analysis(db, case.id, stage, validated, **fused_agent.version_info())
+        for stage, validated in stages.items()
     }
+    await merge_discrepancies(db, case.id, stages[SYNTHESIS]["discrepancies"])
+    case.analysis_status = "COMPLETED"
+    await _commit_case(db, case)
+    print(f"[Fused] Case {case.id}: {len(reports)} report(s) and {len(stills)} image(s) in one request")
+    return raws
+
+def _numbered(value, label: str) -> Optional[int]:
+    """The number in a model's 3, "3" or "Image 3" style reference, None if there isn't one."""
+    try:
+        return int(str(value).strip().lower().removeprefix(label).strip())
+    except ValueError:
+        return None
+
+def _split_fused(
+    answer: dict, reports: List[models.Report], stills: List[Tuple[int, models.Evidence, dict]], quality_flags: List[dict]
+) -> Dict[str, dict]:
+    """
+    Validated narrative, vision and synthesis results from a fused answer, shaped as the
+    stages store them. stills are (evidence_index, evidence, image info) in prompt order.
+    Raises ValueError when the answer can't be attributed to the case's reports and images.
+    """
+    # Claims keep their prompt ref (C<n>) through the merge so discrepancies can find them
+    claims: Dict[int, List[dict]] = {report.id: [] for report in reports}
+    for n, claim in enumerate(answer["timeline"], 1):
+        if not isinstance(claim, dict):
+            raise ValueError(f"claim C{n} is not an object")
+        report_number = _numbered(claim.pop("report", 1), "report")
+        if report_number is None or not 1 <= report_number <= len(reports):
+            raise ValueError(f"claim C{n} cites an unknown report")
+        claims[reports[report_number - 1].id].append({**claim, "ref": f"C{n}"})
+    timeline = merge_timelines([(report.id, claims[report.id]) for report in reports])
+    narrative = _validated(schemas.NarrativeAnalysisResult, {
+        "timeline": timeline,
+        "reports": [
+            {"report_id": report.id, "report_index": idx + 1, "content_hash": sha256_hex(report.narrative_text)[:16],
+             "claims": len(claims[report.id])}
+            for idx, report in enumerate(reports)
+        ],
+    })
+    
+    entries = {}
+    for entry in answer["images"]:
+        if isinstance(entry, dict) and isinstance(entry.get("observations"), list):
+            entries.setdefault(_numbered(entry.get("image"), "image"), entry)
+    observations = []
+    for number, (evidence_index, evidence, info) in enumerate(stills, 1):
+        if number not in entries:
+            raise ValueError(f"no entry for image {number}")
+        image_observations = [dict(obs) for obs in entries[number]["observations"] if isinstance(obs, dict)]
+        _date_observations(image_observations, info)
+        for obs in image_observations:
+            obs["evidence_id"] = evidence.id
+            obs["evidence_index"] = evidence_index
+            obs["reused_from_evidence_id"] = None
+        observations.extend(image_observations)
+    vision = _validated(
+        schemas.VisionAnalysisResult, {"observations": observations, "duplicates": [], "quality_flags": quality_flags}
+    )
+    
+    # Inputs are keyed as the synthesizer keys them, so a later staged rerun is incremental
+    claim_keys = [input_key(claim) for claim in narrative["timeline"]]
+    evidence_keys = [input_key(obs) for obs in vision["observations"]]
+    claim_refs = {claim["ref"]: idx for idx, claim in enumerate(timeline)}
+    evidence_refs = {f"O{n}": key for n, key in enumerate(evidence_keys, 1)}
+    evidence_ids = {key: obs["evidence_id"] for key, obs in zip(evidence_keys, vision["observations"])}
+    discrepancies = [item for item in answer["discrepancies"] if isinstance(item, dict)]
+    for item in discrepancies:
+        claim_ref, refs = item.get("claim_ref"), item.get("evidence_refs")
+        idx = claim_refs.get(claim_ref) if isinstance(claim_ref, str) else None
+        item["claim_key"] = claim_keys[idx] if idx is not None else None
+        item["report_id"] = timeline[idx]["report_id"] if idx is not None else None
+        refs = refs if isinstance(refs, list) else []
+        item["source_keys"] = [evidence_refs[ref] for ref in refs if isinstance(ref, str) and ref in evidence_refs]
+        item["evidence_id"] = source_evidence_id(item["source_keys"], evidence_ids)
+        item["fingerprint"] = fingerprint(item)
+    synthesis = _validated(schemas.SynthesisAnalysisResult, {
+        "discrepancies": discrepancies, "claim_keys": claim_keys, "evidence_keys": evidence_keys,
+    })
+    return {NARRATIVE: narrative, VISION: vision, SYNTHESIS: synthesis}
 
 
 @router.post("/analyze/case/{case_id}/evidence", response_model=schemas.VisionAnalysisResult)
-async def analyze_all_evidence(case_id: int, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
+async def analyze_all_evidence(case_id: int, request: Request, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
     """
-    Analyzes ALL image evidence for a case and aggregates the results.
+    Analyzes ALL image and video evidence for a case and aggregates the results.
     Each observation includes the source evidence ID for reference.
+    Cached results are served as stored, with an ETag.
     """
+    raw = await _run_all_evidence(case_id, force_rerun, db)
+    return _analysis_response(request, raw, VISION)
+
+async def _run_all_evidence(case_id: int, force_rerun: bool, db: AsyncSession) -> RawAnalysis:
     # Get case with all evidence
     result = await db.execute(
         select(models.Case)
@@ -187,64 +601,186 @@ async def analyze_all_evidence(case_id: int, force_rerun: bool = False, db: Asyn
         raise HTTPException(status_code=404, detail="Case not found")
     
     # Check for cached result
-    if case.vision_analysis_json and not force_rerun:
-        try:
-            cached_result = json.loads(case.vision_analysis_json)
-            return schemas.VisionAnalysisResult(**cached_result)
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Failed to parse cached vision result: {e}")
+    cached = await load_analysis_raw(db, case_id, VISION) if not force_rerun else None
+    if _servable(cached, VISION):
+        return cached
     
-    # Get all image evidence
-    images = [e for e in case.evidence if e.type == models.EvidenceType.IMAGE]
+    # Get all image and video evidence
+    images = [e for e in case.evidence if e.type in ANALYZABLE_EVIDENCE]
     
     if not images:
-        raise HTTPException(status_code=404, detail="No image evidence found for this case")
+        raise HTTPException(status_code=404, detail="No image or video evidence found for this case")
     
     # Analyze each image and aggregate observations
     all_observations = []
     
-    for idx, evidence in enumerate(images):
-        try:
-            analysis_dict = await vision_agent.analyze_evidence(evidence.file_path)
-            
-            if "error" in analysis_dict:
-                print(f"Vision Agent Error for evidence {evidence.id}: {analysis_dict['error']}")
+    with metrics.timed(metrics.ANALYSIS_STAGE_SECONDS, stage=VISION), \
+            llm_usage.call_scope(case_id, VISION, vision_agent.PROMPT_VERSION):
+        stills = [e for e in images if e.type == models.EvidenceType.IMAGE]
+        
+        # Blank, dark, blurred or tiny stills are flagged, analyzed last or skipped (IMAGE_QUALITY_POLICY)
+        quality_flags = await _quality_flags(stills)
+        actions = {flag["evidence_id"]: flag["action"] for flag in quality_flags}
+        stills = [e for e in stills if actions.get(e.id) != "skipped"]
+        
+        # Near-duplicate stills reuse an earlier image's observations instead of a vision call
+        near_duplicates = await _near_duplicates(stills) if settings.IMAGE_DEDUP_ENABLED else {}
+        
+        # The rest go out together, packed into multi-image requests where the provider allows;
+        # deprioritized images only after the usable ones, and never in the same request
+        unique = [e for e in stills if e.id not in near_duplicates]
+        still_results = {}
+        for group in (
+            [e for e in unique if actions.get(e.id) != "deprioritized"],
+            [e for e in unique if actions.get(e.id) == "deprioritized"],
+        ):
+            try:
+                batched = await vision_agent.analyze_evidence_batch([e.file_path for e in group])
+                still_results.update({e.id: result for e, result in zip(group, batched)})
+            except Exception as e:
+                print(f"Batched vision analysis failed, analyzing images one by one: {e}")
+        
+        duplicates = []
+        for idx, evidence in enumerate(images):
+            if actions.get(evidence.id) == "skipped":
                 continue
-            
-            # Add source info to each observation
-            for obs in analysis_dict.get("observations", []):
-                obs["evidence_id"] = evidence.id
-                obs["evidence_index"] = idx + 1  # 1-based for display
-                all_observations.append(obs)
+            try:
+                reused_from = None
+                if evidence.id in near_duplicates:
+                    source_id, distance = near_duplicates[evidence.id]
+                    source = still_results.get(source_id)
+                    if source and "error" not in source:
+                        reused_from = source_id
+                        analysis_dict = {"observations": [dict(obs) for obs in source.get("observations", [])]}
+                        duplicates.append({"evidence_id": evidence.id, "duplicate_of": source_id, "distance": distance})
+                if reused_from is None:
+                    analysis_dict = still_results.get(evidence.id) or await _analyze_evidence(evidence)
                 
-        except Exception as e:
-            print(f"Failed to analyze evidence {evidence.id}: {e}")
-            continue
+                if "error" in analysis_dict:
+                    print(f"Vision Agent Error for evidence {evidence.id}: {analysis_dict['error']}")
+                    continue
+                
+                if evidence.type == models.EvidenceType.IMAGE:
+                    _date_observations(analysis_dict.get("observations", []), await _image_info(evidence))
+                
+                # Add source info to each observation
+                for obs in analysis_dict.get("observations", []):
+                    obs["evidence_id"] = evidence.id
+                    obs["evidence_index"] = idx + 1  # 1-based for display
+                    obs["reused_from_evidence_id"] = reused_from
+                    all_observations.append(obs)
+                    
+            except Exception as e:
+                print(f"Failed to analyze evidence {evidence.id}: {e}")
+                continue
     
     # Build aggregated result
-    aggregated_result = {"observations": all_observations}
+    aggregated_result = _validated(
+        schemas.VisionAnalysisResult,
+        {"observations": all_observations, "duplicates": duplicates, "quality_flags": quality_flags},
+    )
     
     # Cache the aggregated result
-    case.vision_analysis_json = json.dumps(aggregated_result)
+    raw = await save_analysis(db, case_id, VISION, aggregated_result, **vision_agent.version_info())
     
     # Mark as completed if narrative is also done
-    if case.narrative_analysis_json:
+    if await has_analysis(db, case_id, NARRATIVE):
         case.analysis_status = "COMPLETED"
     
-    await db.commit()
+    await _commit_case(db, case)
+    
+    return raw
+
+
+@router.post("/analyze/case/{case_id}/audio", response_model=schemas.AudioAnalysisResult)
+async def analyze_audio(case_id: int, request: Request, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
+    """
+    Transcribes ALL audio evidence for a case (e.g. dispatch recordings) and extracts
+    timestamped claims from the transcripts, as a second narrative source for synthesis.
+    """
+    raw = await _run_audio(case_id, force_rerun, db)
+    return _analysis_response(request, raw, AUDIO)
+
+async def _evidence_transcript(evidence: models.Evidence, force_rerun: bool) -> dict:
+    """Transcript of one recording, reused from the evidence metadata when the same engine made it."""
+    metadata = json.loads(evidence.metadata_json) if evidence.metadata_json else {}
+    engine = settings.ASR_ENGINE.lower()
+    cached = metadata.get("transcript")
+    if cached and not force_rerun and cached.get("engine") == engine and (engine == "stub" or cached.get("model") == settings.ASR_MODEL):
+        return cached
+    transcript = await audio_agent.transcribe(evidence.file_path)
+    metadata["transcript"] = transcript
+    evidence.metadata_json = json.dumps(metadata)
+    return transcript
+
+async def _run_audio(case_id: int, force_rerun: bool, db: AsyncSession) -> RawAnalysis:
+    result = await db.execute(
+        select(models.Case)
+        .where(models.Case.id == case_id)
+        .options(selectinload(models.Case.evidence))
+    )
+    case = result.scalar_one_or_none()
     
-    return schemas.VisionAnalysisResult(**aggregated_result)
+    if not case:
+        raise HTTPException(status_code=404, detail="Case not found")
+    
+    cached = await load_analysis_raw(db, case_id, AUDIO) if not force_rerun else None
+    if _servable(cached, AUDIO):
+        return cached
+    
+    recordings = [e for e in case.evidence if e.type == models.EvidenceType.AUDIO]
+    if not recordings:
+        raise HTTPException(status_code=404, detail="No audio evidence found for this case")
+    
+    transcripts = []
+    timeline = []
+    transcribe_error = None
+    with metrics.timed(metrics.ANALYSIS_STAGE_SECONDS, stage=AUDIO), \
+            llm_usage.call_scope(case_id, AUDIO, audio_agent.PROMPT_VERSION):
+        for idx, evidence in enumerate(recordings):
+            try:
+                transcript = await _evidence_transcript(evidence, force_rerun)
+            except Exception as e:
+                print(f"Failed to transcribe evidence {evidence.id}: {e}")
+                transcribe_error = e
+                continue
+            transcripts.append({**transcript, "evidence_id": evidence.id, "evidence_index": idx + 1})
+            
+            claims = await audio_agent.extract_claims(transcript)
+            if "error" in claims:
+                print(f"Audio Agent Error for evidence {evidence.id}: {claims['error']}")
+                continue
+            for claim in claims.get("timeline", []):
+                claim["evidence_id"] = evidence.id
+                claim["evidence_index"] = idx + 1
+                timeline.append(claim)
+    
+    if not transcripts:
+        raise HTTPException(status_code=500, detail=f"No audio evidence could be transcribed: {transcribe_error}")
+    
+    validated = _validated(schemas.AudioAnalysisResult, {"transcripts": transcripts, "timeline": timeline})
+    raw = await save_analysis(db, case_id, AUDIO, validated, **audio_agent.version_info())
+    await _commit_case(db, case)
+    return raw
 
 
 @router.post("/analyze/case/{case_id}/synthesize", response_model=schemas.SynthesisAnalysisResult)
-async def synthesize_analysis(case_id: int, force_rerun: bool = False, db: AsyncSession = Depends(get_db)):
+async def synthesize_analysis(
+    case_id: int, request: Request, force_rerun: bool = False, full: bool = False, db: AsyncSession = Depends(get_db)
+):
     """
     Cross-references narrative claims with visual observations to detect discrepancies.
     This is the core value proposition - finding contradictions between what the report says
     and what the evidence shows.
     
     Requires both narrative and vision analysis to be completed first.
+    A rerun only compares claims and observations that changed since the previous
+    result and merges them into it; full=true compares everything again.
     """
+    raw = await _run_synthesis(case_id, force_rerun, db, full=full)
+    return _analysis_response(request, raw, SYNTHESIS)
+
+async def _run_synthesis(case_id: int, force_rerun: bool, db: AsyncSession, full: bool = False) -> RawAnalysis:
     # Get case with all analysis data
     result = await db.execute(
         select(models.Case)
@@ -255,43 +791,52 @@ async def synthesize_analysis(case_id: int, force_rerun: bool = False, db: Async
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
     
-    # Check for cached result
-    if case.synthesis_analysis_json and not force_rerun:
-        try:
-            cached_result = json.loads(case.synthesis_analysis_json)
-            return schemas.SynthesisAnalysisResult(**cached_result)
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"Failed to parse cached synthesis result: {e}")
+    # Check for cached result; one built before an input was recomputed is extended below
+    cached = await load_analysis_raw(db, case_id, SYNTHESIS) if not force_rerun else None
+    if _servable(cached, SYNTHESIS) and not await has_newer_inputs(db, case_id, SYNTHESIS, (NARRATIVE, VISION, AUDIO)):
+        return cached
     
     # Verify both analyses are complete
-    if not case.narrative_analysis_json:
+    narrative_cached = await load_analysis(db, case_id, NARRATIVE)
+    if not narrative_cached:
         raise HTTPException(
             status_code=400, 
             detail="Narrative analysis must be completed before synthesis. Run narrative analysis first."
         )
     
-    if not case.vision_analysis_json:
+    vision_cached = await load_analysis(db, case_id, VISION)
+    if not vision_cached:
         raise HTTPException(
             status_code=400, 
             detail="Vision analysis must be completed before synthesis. Run vision analysis first."
         )
     
-    # Parse cached results
-    try:
-        narrative_data = json.loads(case.narrative_analysis_json)
-        vision_data = json.loads(case.vision_analysis_json)
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to parse cached analysis data: {e}")
+    # Dispatch audio is optional; when present its claims are cross-checked too
+    audio_cached = await load_analysis(db, case_id, AUDIO)
     
     # Convert to schemas for the synthesizer
     try:
-        narrative_result = schemas.NarrativeAnalysisResult(**narrative_data)
-        vision_result = schemas.VisionAnalysisResult(**vision_data)
+        narrative_result = schemas.NarrativeAnalysisResult(**narrative_cached.result)
+        vision_result = schemas.VisionAnalysisResult(**vision_cached.result)
+        audio_result = schemas.AudioAnalysisResult(**audio_cached.result) if audio_cached else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to validate analysis schemas: {e}")
     
+    # A previous result from the same prompt and model is extended rather than recomputed
+    previous_result = None
+    previous_cached = await load_analysis(db, case_id, SYNTHESIS) if not full else None
+    if previous_cached and not is_stale(previous_cached, synthesizer_agent.version_info()):
+        try:
+            previous_result = schemas.SynthesisAnalysisResult(**previous_cached.result)
+        except Exception as e:
+            print(f"Ignoring unreadable previous synthesis for case {case_id}: {e}")
+    
     # Run the synthesizer agent
-    synthesis_dict = await synthesizer_agent.detect_discrepancies(narrative_result, vision_result)
+    with metrics.timed(metrics.ANALYSIS_STAGE_SECONDS, stage=SYNTHESIS), \
+            llm_usage.call_scope(case_id, SYNTHESIS, synthesizer_agent.PROMPT_VERSION):
+        synthesis_dict = await synthesizer_agent.detect_discrepancies(
+            narrative_result, vision_result, audio_result, previous=previous_result
+        )
     
     if "error" in synthesis_dict:
         error_msg = synthesis_dict["error"]
@@ -300,13 +845,38 @@ async def synthesize_analysis(case_id: int, force_rerun: bool = False, db: Async
             raise HTTPException(status_code=429, detail=f"Rate Limit Exceeded: {error_msg}")
         raise HTTPException(status_code=500, detail=error_msg)
     
-    # Cache the result
-    case.synthesis_analysis_json = json.dumps(synthesis_dict)
+    # Validate, cache the result and sync the discrepancy rows in one transaction; rows
+    # for discrepancies carried over from the previous run keep their triage status
+    validated = _validated(schemas.SynthesisAnalysisResult, synthesis_dict)
+    raw = await save_analysis(db, case_id, SYNTHESIS, validated, **synthesizer_agent.version_info())
+    await merge_discrepancies(db, case_id, validated["discrepancies"])
     case.analysis_status = "COMPLETED"  # Fully complete now
-    await db.commit()
+    await _commit_case(db, case)
     
-    # Validate & Return
-    try:
-        return schemas.SynthesisAnalysisResult(**synthesis_dict)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Schema Validation Failed: {e}")
+    return raw
+
+
+STAGE_RUNNERS = {
+    NARRATIVE: _run_narrative,
+    VISION: _run_all_evidence,
+    AUDIO: _run_audio,
+    SYNTHESIS: _run_synthesis,
+}
+
+async def reprocess_cases(removed: Dict[int, List[str]]) -> None:
+    """
+    Background task: re-run the stages that were invalidated for each case,
+    narrative, vision and audio before synthesis. Each case gets its own session.
+    """
+    for case_id, stages in removed.items():
+        for stage in (NARRATIVE, VISION, AUDIO, SYNTHESIS):
+            if stage not in stages:
+                continue
+            try:
+                async with AsyncSessionLocal() as db:
+                    await STAGE_RUNNERS[stage](case_id, force_rerun=True, db=db)
+                print(f"[Reprocess] Case {case_id}: {stage} done")
+            except HTTPException as e:
+                print(f"[Reprocess] Case {case_id}: {stage} skipped - {e.detail}")
+            except Exception as e:
+                print(f"[Reprocess] Case {case_id}: {stage} failed - {e}")
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, exists
+from app.database import get_db
+from app import models, schemas
+from app.utils import cache
+from typing import Optional
+
+router = APIRouter()
+
+
+async def _ensure_case_exists(db: AsyncSession, case_id: int):
+    result = await db.execute(select(exists().where(models.Case.id == case_id)))
+    if not result.scalar():
+        raise HTTPException(status_code=404, detail="Case not found")
+
+
+@router.get("/cases/{case_id}/discrepancies", response_model=schemas.DiscrepancyPage)
+async def list_discrepancies(
+    case_id: int,
+    status: Optional[schemas.DiscrepancyStatus] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Lists a case's discrepancies in id order, optionally filtered by status.
+    Pass next_cursor back as ?cursor= to get the next page.
+    """
+    await _ensure_case_exists(db, case_id)
+    
+    query = select(models.Discrepancy).where(models.Discrepancy.case_id == case_id)
+    if status is not None:
+        query = query.where(models.Discrepancy.status == models.DiscrepancyStatus(status.value))
+    if cursor is not None:
+        query = query.where(models.Discrepancy.id > cursor)
+    
+    result = await db.execute(query.order_by(models.Discrepancy.id).limit(limit + 1))
+    rows = result.scalars().all()
+    
+    next_cursor = str(rows[limit - 1].id) if len(rows) > limit else None
+    return schemas.DiscrepancyPage(items=rows[:limit], next_cursor=next_cursor)
+
+
+@router.patch("/cases/{case_id}/discrepancies")
+async def bulk_update_discrepancies(
+    case_id: int,
+    body: schemas.DiscrepancyBulkUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Sets the review status of many discrepancies at once.
+    Ids that don't belong to the case are ignored.
+    """
+    await _ensure_case_exists(db, case_id)
+    
+    if not body.ids:
+        return {"updated": 0}
+    
+    result = await db.execute(
+        update(models.Discrepancy)
+        .where(models.Discrepancy.case_id == case_id, models.Discrepancy.id.in_(body.ids))
+        .values(status=models.DiscrepancyStatus(body.status.value))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    # Discrepancies are part of the cached case detail (the listing doesn't include them)
+    await cache.invalidate_case(case_id)
+    
+    return {"updated": result.rowcount}
@@ -0,0 +1,117 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal, union_all, exists
+from app.database import get_db
+from app import models, schemas
+from app.services.analysis_store import NARRATIVE, VISION
+from typing import Optional
+
+router = APIRouter()
+
+
+def _tsquery(text: str):
+    return func.websearch_to_tsquery(models.SEARCH_TEXT_CONFIG, text)
+
+
+def _analysis_hits(stage: str, text: str):
+    """(case_id, rank) for cases whose stage result matches the query - served by the GIN index."""
+    tsq = _tsquery(text)
+    vector = models.CaseAnalysis.search_vector
+    return (
+        select(models.CaseAnalysis.case_id.label("case_id"), func.ts_rank(vector, tsq).label("rank"))
+        .where(models.CaseAnalysis.stage == stage, vector.op("@@")(tsq))
+    )
+
+
+def _report_hits(text: str):
+    """(case_id, best rank) for cases with a report whose text matches the query."""
+    tsq = _tsquery(text)
+    vector = models.Report.search_vector
+    return (
+        select(models.Report.case_id.label("case_id"), func.max(func.ts_rank(vector, tsq)).label("rank"))
+        .where(vector.op("@@")(tsq))
+        .group_by(models.Report.case_id)
+    )
+
+
+def _any_source_hits(text: str):
+    """(case_id, summed rank) across narrative claims, observations and report text."""
+    hits = union_all(_analysis_hits(NARRATIVE, text), _analysis_hits(VISION, text), _report_hits(text)).subquery()
+    return select(hits.c.case_id, func.sum(hits.c.rank).label("rank")).group_by(hits.c.case_id)
+
+
+@router.get("/search", response_model=schemas.SearchPage)
+async def search_cases(
+    q: Optional[str] = Query(None, description="Match anywhere: claims, observations or report text"),
+    narrative: Optional[str] = Query(None, description="Match narrative claim descriptions"),
+    vision: Optional[str] = Query(None, description="Match observation labels, entities and details"),
+    report: Optional[str] = Query(None, description="Match extracted report text"),
+    label: Optional[str] = Query(None, description="Observation label, exact match"),
+    entity: Optional[str] = Query(None, description="Observation entity, exact match"),
+    category: Optional[str] = Query(None, description="Observation category, exact match"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Searches across cases. Every supplied filter must match, e.g.
+    ?narrative=firearm&vision=phone finds cases where the report claims a
+    firearm but the images show a phone. Results are ranked by text relevance.
+    """
+    text_filters = {"q": q, "narrative": narrative, "vision": vision, "report": report}
+    text_filters = {name: value for name, value in text_filters.items() if value}
+    structured = {"label": label, "entity": entity, "category": category}
+    structured = {name: value for name, value in structured.items() if value}
+    
+    if not text_filters and not structured:
+        raise HTTPException(status_code=400, detail="Provide at least one search filter")
+    
+    query = select(
+        models.Case.id,
+        models.Case.title,
+        models.Case.analysis_status,
+        models.Case.created_at,
+    )
+    rank = literal(0.0)
+    
+    for name, value in text_filters.items():
+        if name == "q":
+            hits = _any_source_hits(value)
+        elif name == "report":
+            hits = _report_hits(value)
+        else:
+            hits = _analysis_hits(NARRATIVE if name == "narrative" else VISION, value)
+        hits = hits.subquery(name)
+        query = query.join(hits, hits.c.case_id == models.Case.id)
+        rank = rank + hits.c.rank
+    
+    if structured:
+        # JSONB containment is answered by the jsonb_path_ops GIN index
+        query = query.where(exists().where(
+            models.CaseAnalysis.case_id == models.Case.id,
+            models.CaseAnalysis.stage == VISION,
+            models.CaseAnalysis.result.contains({"observations": [structured]}),
+        ))
+    
+    query = (
+        query.add_columns(rank.label("rank"))
+        .order_by(rank.desc(), models.Case.id.desc())
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(query)).all()
+    
+    matched_sources = list(text_filters) + list(structured)
+    items = [
+        schemas.SearchHit(
+            case_id=row.id,
+            title=row.title,
+            analysis_status=row.analysis_status or "PENDING",
+            created_at=row.created_at,
+            rank=float(row.rank),
+            matched_sources=matched_sources,
+        )
+        for row in rows[:limit]
+    ]
+    next_offset = offset + limit if len(rows) > limit else None
+    return schemas.SearchPage(items=items, next_offset=next_offset)
@@ -1,103 +1,142 @@
-from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException, BackgroundTasks, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func as sql_func
+from sqlalchemy import select, delete, update, tuple_
 from sqlalchemy.orm import selectinload
 from app.database import get_db
 from app import models, schemas
-from app.utils.storage import save_upload_file
-from typing import List
+from app.utils.storage import save_upload_file, delete_file
+from app.services.storage_gc import cleanup_case_storage
+from app.services.analysis_store import NARRATIVE, VISION, AUDIO, SYNTHESIS, load_analyses_raw
+from app.utils.http_cache import json_bytes_response
+from app.utils import cache
+from app.utils.image_quality import image_metadata
+from app.config import settings
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import base64
+import json
 import os
 
 router = APIRouter()
 
-@router.get("/cases", response_model=List[schemas.CaseListItem])
-async def list_cases(db: AsyncSession = Depends(get_db)):
-    """List all cases with their evidence and report counts."""
-    # Query cases with counts using subqueries
-    evidence_count_subq = (
-        select(models.Evidence.case_id, sql_func.count(models.Evidence.id).label("evidence_count"))
-        .group_by(models.Evidence.case_id)
-        .subquery()
-    )
-    report_count_subq = (
-        select(models.Report.case_id, sql_func.count(models.Report.id).label("report_count"))
-        .group_by(models.Report.case_id)
-        .subquery()
-    )
+# Stage -> legacy string field on schemas.Case
+ANALYSIS_FIELDS = {
+    NARRATIVE: "narrative_analysis_json",
+    VISION: "vision_analysis_json",
+    SYNTHESIS: "synthesis_analysis_json",
+    AUDIO: "audio_analysis_json",
+}
+
+# Columns needed for list views - never load analysis payloads or relationships here
+_CASE_LIST_COLUMNS = (
+    models.Case.id,
+    models.Case.title,
+    models.Case.description,
+    models.Case.status,
+    models.Case.analysis_status,
+    models.Case.created_at,
+    models.Case.updated_at,
+    models.Case.evidence_count,
+    models.Case.report_count,
+    models.Case.is_sample_case,
+    models.Case.thumbnail_path,
+)
+
+
+def _encode_cursor(created_at: datetime, case_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{case_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, case_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(case_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _list_case_page(
+    db: AsyncSession,
+    cursor: Optional[str],
+    limit: int,
+    status: Optional[str] = None,
+    analysis_status: Optional[str] = None,
+    is_sample_case: Optional[bool] = None,
+) -> schemas.CaseListPage:
+    """Fetch one page of cases, newest first, using keyset pagination on (created_at, id)."""
+    query = select(*_CASE_LIST_COLUMNS)
     
-    result = await db.execute(
-        select(
-            models.Case,
-            sql_func.coalesce(evidence_count_subq.c.evidence_count, 0).label("evidence_count"),
-            sql_func.coalesce(report_count_subq.c.report_count, 0).label("report_count")
-        )
-        .outerjoin(evidence_count_subq, models.Case.id == evidence_count_subq.c.case_id)
-        .outerjoin(report_count_subq, models.Case.id == report_count_subq.c.case_id)
-        .order_by(models.Case.created_at.desc())
-    )
+    if status is not None:
+        query = query.where(models.Case.status == status)
+    if analysis_status is not None:
+        query = query.where(models.Case.analysis_status == analysis_status)
+    if is_sample_case is not None:
+        query = query.where(models.Case.is_sample_case == is_sample_case)
+    if cursor:
+        created_at, case_id = _decode_cursor(cursor)
+        query = query.where(tuple_(models.Case.created_at, models.Case.id) < tuple_(created_at, case_id))
     
-    cases = []
-    for row in result.all():
-        case = row[0]
-        cases.append(schemas.CaseListItem(
-            id=case.id,
-            title=case.title,
-            description=case.description,
-            status=case.status,
-            analysis_status=case.analysis_status or "PENDING",
-            created_at=case.created_at,
-            updated_at=case.updated_at,
-            evidence_count=row[1],
-            report_count=row[2]
-        ))
-    
-    return cases
-
-@router.get("/sample-cases", response_model=List[schemas.CaseListItem])
-async def list_sample_cases(db: AsyncSession = Depends(get_db)):
-    """List all sample cases for demo purposes."""
-    # Query only sample cases with counts using subqueries
-    evidence_count_subq = (
-        select(models.Evidence.case_id, sql_func.count(models.Evidence.id).label("evidence_count"))
-        .group_by(models.Evidence.case_id)
-        .subquery()
-    )
-    report_count_subq = (
-        select(models.Report.case_id, sql_func.count(models.Report.id).label("report_count"))
-        .group_by(models.Report.case_id)
-        .subquery()
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(
+        query.order_by(models.Case.created_at.desc(), models.Case.id.desc()).limit(limit + 1)
     )
+    rows = result.all()
     
-    result = await db.execute(
-        select(
-            models.Case,
-            sql_func.coalesce(evidence_count_subq.c.evidence_count, 0).label("evidence_count"),
-            sql_func.coalesce(report_count_subq.c.report_count, 0).label("report_count")
+    items = [
+        schemas.CaseListItem(
+            id=row.id,
+            title=row.title,
+            description=row.description,
+            status=row.status,
+            analysis_status=row.analysis_status or "PENDING",
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            evidence_count=row.evidence_count,
+            report_count=row.report_count,
+            is_sample_case=bool(row.is_sample_case),
+            thumbnail_path=row.thumbnail_path
         )
-        .where(models.Case.is_sample_case == True)
-        .outerjoin(evidence_count_subq, models.Case.id == evidence_count_subq.c.case_id)
-        .outerjoin(report_count_subq, models.Case.id == report_count_subq.c.case_id)
-        .order_by(models.Case.created_at.desc())
-    )
+        for row in rows[:limit]
+    ]
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(last.created_at, last.id)
     
-    cases = []
-    for row in result.all():
-        case = row[0]
-        cases.append(schemas.CaseListItem(
-            id=case.id,
-            title=case.title,
-            description=case.description,
-            status=case.status,
-            analysis_status=case.analysis_status or "PENDING",
-            created_at=case.created_at,
-            updated_at=case.updated_at,
-            evidence_count=row[1],
-            report_count=row[2],
-            is_sample_case=True,
-            thumbnail_path=case.thumbnail_path
-        ))
-    
-    return cases
+    return schemas.CaseListPage(items=items, next_cursor=next_cursor)
+
+@router.get("/cases", response_model=schemas.CaseListPage)
+async def list_cases(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    status: Optional[str] = None,
+    analysis_status: Optional[str] = None,
+    is_sample_case: Optional[bool] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """List cases newest first, one page at a time, with their evidence and report counts."""
+    return await _list_case_page(db, cursor, limit, status, analysis_status, is_sample_case)
+
+@router.get("/sample-cases", response_model=schemas.CaseListPage)
+async def list_sample_cases(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """List sample cases for demo purposes. Served from the cache - sample cases rarely change."""
+    async def build():
+        page = await _list_case_page(db, cursor, limit, is_sample_case=True)
+        return page.model_dump_json()
+    
+    body = await cache.get_or_set(
+        cache.sample_cases_key(cursor, limit), settings.SAMPLE_CASES_CACHE_TTL_SECONDS, build
+    )
+    return json_bytes_response(request, body)
 
 @router.post("/cases", response_model=schemas.Case)
 async def create_case(case: schemas.CaseCreate, db: AsyncSession = Depends(get_db)):
@@ -118,7 +157,14 @@ async def create_case(case: schemas.CaseCreate, db: AsyncSession = Depends(get_d
     return result.scalar_one()
 
 @router.get("/cases/{case_id}", response_model=schemas.Case)
-async def get_case(case_id: int, db: AsyncSession = Depends(get_db)):
+async def get_case(case_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Case detail, served from the cache until an upload, analysis or delete invalidates it."""
+    body = await cache.get_or_set(
+        cache.case_key(case_id), settings.CACHE_TTL_SECONDS, lambda: _case_detail_json(db, case_id)
+    )
+    return json_bytes_response(request, body)
+
+async def _case_detail_json(db: AsyncSession, case_id: int) -> str:
     result = await db.execute(
         select(models.Case)
         .where(models.Case.id == case_id)
@@ -132,11 +178,21 @@ async def get_case(case_id: int, db: AsyncSession = Depends(get_db)):
     
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
-    return case
+    
+    # Cached agent results are kept out of the cases row; attach their stored JSON text as-is
+    case_out = schemas.Case.model_validate(case)
+    analyses = await load_analyses_raw(db, case_id)
+    for stage, field in ANALYSIS_FIELDS.items():
+        if stage in analyses:
+            setattr(case_out, field, analyses[stage].text)
+    return case_out.model_dump_json()
 
 @router.delete("/cases/{case_id}")
-async def delete_case(case_id: int, db: AsyncSession = Depends(get_db)):
-    """Delete a case and all associated files."""
+async def delete_case(case_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    """
+    Delete a case and all associated records.
+    Stored files are removed by a background task so large cases return immediately.
+    """
     case = await db.get(models.Case, case_id)
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
@@ -145,16 +201,25 @@ async def delete_case(case_id: int, db: AsyncSession = Depends(get_db)):
     if case.is_sample_case:
         raise HTTPException(status_code=403, detail="Sample cases cannot be deleted")
     
-    # Delete the case (cascade will handle related records)
-    await db.delete(case)
+    # Bulk-delete children in SQL instead of loading them through the ORM cascade
+    await db.execute(delete(models.Discrepancy).where(models.Discrepancy.case_id == case_id))
+    await db.execute(delete(models.CaseAnalysis).where(models.CaseAnalysis.case_id == case_id))
+    evidence_paths = await db.execute(
+        delete(models.Evidence).where(models.Evidence.case_id == case_id).returning(models.Evidence.file_path)
+    )
+    report_paths = await db.execute(
+        delete(models.Report).where(models.Report.case_id == case_id).returning(models.Report.file_path)
+    )
+    file_paths = list(evidence_paths.scalars()) + list(report_paths.scalars())
+    if case.thumbnail_path:
+        file_paths.append(case.thumbnail_path)
+    
+    await db.execute(delete(models.Case).where(models.Case.id == case_id))
     await db.commit()
+    await cache.invalidate_case(case_id)
     
-    # Optionally delete files from disk
-    from app.config import settings
-    import shutil
-    case_dir = os.path.join(settings.STORAGE_DIR, "cases", str(case_id))
-    if os.path.exists(case_dir):
-        shutil.rmtree(case_dir)
+    # Storage cleanup runs after the response is sent
+    background_tasks.add_task(cleanup_case_storage, case_id, file_paths)
     
     return {"message": f"Case {case_id} deleted successfully"}
 
@@ -169,14 +234,9 @@ async def upload_evidence(
     if not case:
         raise HTTPException(status_code=404, detail="Case not found")
         
-    # Check evidence limit (Max 3)
-    result = await db.execute(
-        select(sql_func.count(models.Evidence.id))
-        .where(models.Evidence.case_id == case_id)
-    )
-    current_count = result.scalar()
-    if current_count >= 3:
-        raise HTTPException(status_code=400, detail="Maximum 3 evidence files allowed per case")
+    # Check evidence limit - re-checked atomically below when the count is bumped
+    if case.evidence_count >= settings.MAX_EVIDENCE_PER_CASE:
+        raise HTTPException(status_code=400, detail=f"Maximum {settings.MAX_EVIDENCE_PER_CASE} evidence files allowed per case")
 
     # Determine type based on mime type or extension
     mime_type = file.content_type
@@ -186,6 +246,13 @@ async def upload_evidence(
     elif mime_type.startswith("audio"):
         evidence_type = models.EvidenceType.AUDIO
     
+    # EXIF capture data dates the observations; hashes and quality scores let analysis skip
+    # near-duplicate and unusable stills
+    metadata = {}
+    if evidence_type == models.EvidenceType.IMAGE:
+        metadata = await asyncio.to_thread(image_metadata, await file.read())
+        await file.seek(0)
+    
     # Save file to case-specific directory
     file_path = await save_upload_file(file, case_id=case_id, subfolder="evidence")
     
@@ -193,9 +260,31 @@ async def upload_evidence(
         case_id=case_id,
         file_path=file_path,
         type=evidence_type,
+        metadata_json=json.dumps(metadata) if metadata else None,
     )
-    db.add(new_evidence)
-    await db.commit()
+    try:
+        # Bump the denormalized count in the same transaction; the guard keeps
+        # concurrent uploads from slipping past the limit
+        bumped = await db.execute(
+            update(models.Case)
+            .where(models.Case.id == case_id, models.Case.evidence_count < settings.MAX_EVIDENCE_PER_CASE)
+            .values(evidence_count=models.Case.evidence_count + 1)
+            .returning(models.Case.id)
+        )
+        if bumped.scalar_one_or_none() is None:
+            await db.rollback()
+            await delete_file(file_path)
+            raise HTTPException(status_code=400, detail=f"Maximum {settings.MAX_EVIDENCE_PER_CASE} evidence files allowed per case")
+        
+        db.add(new_evidence)
+        await db.commit()
+    except HTTPException:
+        raise
+    except Exception:
+        # Don't leave an orphaned file behind if the row never made it
+        await delete_file(file_path)
+        raise
+    await cache.invalidate_case(case_id, case.is_sample_case)
     await db.refresh(new_evidence)
     return new_evidence
 
@@ -230,7 +319,18 @@ async def upload_report(
         file_path=file_path
     )
     db.add(new_report)
-    await db.commit()
+    try:
+        await db.execute(
+            update(models.Case)
+            .where(models.Case.id == case_id)
+            .values(report_count=models.Case.report_count + 1)
+        )
+        await db.commit()
+    except Exception:
+        # Don't leave an orphaned file behind if the row never made it
+        await delete_file(file_path)
+        raise
+    await cache.invalidate_case(case_id, case.is_sample_case)
     await db.refresh(new_report)
     return new_report
 
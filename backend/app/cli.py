@@ -0,0 +1,163 @@
+"""
+Maintenance commands. Run from the backend directory:
+
+    python -m app.cli analyses versions
+    python -m app.cli analyses invalidate --stage NARRATIVE --prompt-version 1a2b3c4d5e6f
+    python -m app.cli analyses invalidate --stale --reprocess
+    python -m app.cli corpus generate --cases 100000 --pages 3 --images 2 --analyses
+    python -m app.cli corpus purge
+"""
+import argparse
+import asyncio
+import json
+from app.database import AsyncSessionLocal
+from app.services.analysis_store import NARRATIVE, VISION, AUDIO, SYNTHESIS, version_summary, invalidate_analyses
+from app.utils import cache
+
+
+async def analyses_versions(args) -> None:
+    from app.api.analyze import accepted_versions, current_versions
+
+    async with AsyncSessionLocal() as db:
+        stored = await version_summary(db)
+    print(json.dumps({"current": current_versions(), "accepted": accepted_versions(), "stored": stored}, indent=2, default=str))
+
+
+async def analyses_invalidate(args) -> None:
+    from app.api.analyze import accepted_versions, reprocess_cases
+
+    filters = {
+        "stages": args.stage,
+        "provider": args.provider,
+        "model": args.model,
+        "prompt_version": args.prompt_version,
+        "case_ids": args.case,
+        "stale_against": accepted_versions() if args.stale else None,
+    }
+    if all(value is None for value in filters.values()):
+        raise SystemExit("Pass at least one filter (or --stale) to invalidate")
+
+    async with AsyncSessionLocal() as db:
+        removed = await invalidate_analyses(db, **filters)
+        if args.dry_run:
+            await db.rollback()
+        else:
+            await db.commit()
+
+    print(f"{'Would invalidate' if args.dry_run else 'Invalidated'} "
+          f"{sum(len(s) for s in removed.values())} results across {len(removed)} cases")
+    if args.dry_run or not removed:
+        return
+
+    # Only reaches a shared (Redis) cache; in-process caches expire on their TTL
+    for case_id in removed:
+        await cache.invalidate_case(case_id)
+    await cache.invalidate_prefix(cache.SAMPLE_CASES_PREFIX)
+    await cache.close()
+
+    if args.reprocess:
+        await reprocess_cases(removed)
+
+
+def _image_size(value: str):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected WIDTHxHEIGHT, e.g. 1280x720")
+    return width, height
+
+
+async def corpus_generate(args) -> None:
+    from app.services.corpus_generator import CorpusSpec, generate
+    from app.database import engine
+
+    # Echoing thousand-row batches costs more than inserting them
+    engine.echo = False
+    versions = None
+    if args.analyses:
+        from app.api.analyze import current_versions
+        # Stamp synthetic results as current so they're served rather than treated as stale
+        versions = current_versions()
+
+    totals = await generate(CorpusSpec(
+        cases=args.cases,
+        reports_per_case=args.reports,
+        pages=args.pages,
+        images_per_case=args.images,
+        image_size=args.image_size,
+        templates=args.templates,
+        analyses=args.analyses,
+        versions=versions,
+        batch_size=args.batch_size,
+        days=args.days,
+        seed=args.seed,
+    ))
+    print(json.dumps(totals, indent=2))
+
+
+async def corpus_purge(args) -> None:
+    from app.services.corpus_generator import purge
+    from app.database import engine
+
+    engine.echo = False
+    totals = await purge(args.batch_size)
+    await cache.invalidate_prefix(cache.CASE_PREFIX)
+    await cache.close()
+    print(json.dumps(totals, indent=2))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Justitia Lens maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyses = commands.add_parser("analyses", help="Cached analysis results")
+    analyses_commands = analyses.add_subparsers(dest="action", required=True)
+
+    versions = analyses_commands.add_parser("versions", help="Count cached results per provider/model/prompt version")
+    versions.set_defaults(handler=analyses_versions)
+
+    invalidate = analyses_commands.add_parser("invalidate", help="Drop cached results by stage/version")
+    invalidate.add_argument("--stage", action="append", choices=[NARRATIVE, VISION, AUDIO, SYNTHESIS],
+                            help="Stage to invalidate (repeatable)")
+    invalidate.add_argument("--provider")
+    invalidate.add_argument("--model")
+    invalidate.add_argument("--prompt-version")
+    invalidate.add_argument("--case", type=int, action="append", help="Limit to a case id (repeatable)")
+    invalidate.add_argument("--stale", action="store_true",
+                            help="Only results not produced by the current provider/model/prompt")
+    invalidate.add_argument("--reprocess", action="store_true", help="Re-run the dropped stages afterwards")
+    invalidate.add_argument("--dry-run", action="store_true", help="Report what would be dropped")
+    invalidate.set_defaults(handler=analyses_invalidate)
+
+    corpus = commands.add_parser("corpus", help="Synthetic cases for scale testing")
+    corpus_commands = corpus.add_subparsers(dest="action", required=True)
+
+    generate = corpus_commands.add_parser("generate", help="Bulk-create synthetic cases with stored files")
+    generate.add_argument("--cases", type=int, required=True)
+    generate.add_argument("--reports", type=int, default=1, help="PDF reports per case")
+    generate.add_argument("--pages", type=int, default=2, help="Pages per PDF report")
+    generate.add_argument("--images", type=int, default=2, help="Evidence images per case")
+    generate.add_argument("--image-size", type=_image_size, default=(1280, 720), help="WIDTHxHEIGHT")
+    generate.add_argument("--templates", type=int, default=16,
+                          help="Distinct reports/images rendered and shared across cases")
+    generate.add_argument("--analyses", action="store_true",
+                          help="Pre-fill cached analyses and discrepancies with synthetic results")
+    generate.add_argument("--batch-size", type=int, default=1000, help="Cases per transaction")
+    generate.add_argument("--days", type=int, default=365, help="Spread created_at over this many days")
+    generate.add_argument("--seed", type=int, default=1)
+    generate.set_defaults(handler=corpus_generate)
+
+    purge = corpus_commands.add_parser("purge", help="Delete all generated cases and their files")
+    purge.add_argument("--batch-size", type=int, default=1000, help="Cases per transaction")
+    purge.set_defaults(handler=corpus_purge)
+
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -18,9 +19,15 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     
+    # Hot-read cache for case detail payloads and sample-case listings
+    CACHE_BACKEND: str = "redis"  # "redis" (falls back to in-process LRU if unreachable), "memory" or "off"
+    CACHE_TTL_SECONDS: int = 300  # Case detail payloads; writes invalidate them explicitly
+    SAMPLE_CASES_CACHE_TTL_SECONDS: int = 3600  # Sample cases are effectively immutable
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024  # LRU size for the in-process fallback
+    
     # AI
     GEMINI_API_KEY: str = "placeholder_key"
-    AI_PROVIDER: str = "ollama" # Options: "gemini", "ollama", "cloudqwen"
+    AI_PROVIDER: str = "ollama" # Options: "gemini", "ollama", "cloudqwen", "fake" (offline, for benchmarks)
     OLLAMA_BASE_URL: str = "http://localhost:11434/api"
     OLLAMA_MODEL: str = "llama3.1:8b"
     OLLAMA_VISION_MODEL: str = "llava"
@@ -32,6 +39,84 @@ class Settings(BaseSettings):
     CLOUDQWEN_MODEL: str = "qwen-plus"
     CLOUDQWEN_VISION_MODEL: str = "qwen-vl-plus"
     
+    # Cached analyses produced by a different provider/model/prompt than the current one
+    ANALYSIS_STALE_POLICY: str = "warn"  # "ignore", "warn" (X-Analysis-Stale header) or "recompute"
+    
+    # Fake provider (AI_PROVIDER=fake) - simulated latency and failure injection
+    FAKE_LATENCY_MS: float = 200  # Median call latency
+    FAKE_LATENCY_DISTRIBUTION: str = "lognormal"  # "fixed", "uniform", "normal" or "lognormal"
+    FAKE_LATENCY_SPREAD: float = 0.5  # Relative spread (sigma for lognormal)
+    FAKE_FAILURE_RATE: float = 0.0  # Fraction of calls returning a generic error
+    FAKE_RATE_LIMIT_RATE: float = 0.0  # Fraction of calls returning a 429
+    FAKE_INVALID_JSON_RATE: float = 0.0  # Fraction of calls returning unparseable output
+    FAKE_MAX_ITEMS: int = 8  # Cap on claims/observations/discrepancies per result
+    FAKE_SEED: int = 0
+    
+    # Record/replay of provider calls for offline, reproducible runs
+    AI_CASSETTE_MODE: str = "off"  # "off", "record", "replay" or "auto" (replay, record on miss)
+    AI_CASSETTE_DIR: str = os.path.join(os.getcwd(), "cassettes")
+    AI_CASSETTE_LATENCY_SCALE: float = 0.0  # Replay delay as a fraction of the recorded latency (1.0 = real time)
+    
+    # Several images per vision request, up to the provider's image/byte budget
+    VISION_BATCH_ENABLED: bool = True
+    VISION_BATCH_MAX_IMAGES: int = 0  # Lower cap on images per request; 0 uses the provider's limit
+    VISION_BATCH_MAX_DIMENSION: int = 1536  # Longest side of each normalized image, pixels
+    
+    # Near-duplicate stills (burst photos, consecutive frames) reuse one image's observations
+    IMAGE_DEDUP_ENABLED: bool = True
+    IMAGE_DEDUP_MAX_DISTANCE: int = 6  # Max perceptual hash Hamming distance (of 64 bits), dHash and pHash both
+    
+    # Fused mode: a small image-only case gets claims, observations and discrepancies from one
+    # multimodal request (POST /analyze/case/{id}/pipeline); larger cases run stage by stage
+    FUSED_ANALYSIS_ENABLED: bool = False
+    FUSED_MAX_IMAGES: int = 4  # Also bounded by the provider's multi-image budget
+    FUSED_MAX_REPORT_CHARS: int = 20000  # Combined report text
+    
+    # Reports of a case are extracted concurrently, this many at once
+    NARRATIVE_CONCURRENCY: int = 4
+    
+    # Evidence files per case; synthesis splits big cases into partitions, so this bounds cost, not prompt size
+    MAX_EVIDENCE_PER_CASE: int = 500
+    
+    # Synthesis prompts stay under this many characters of claims and evidence (~4 characters per token);
+    # larger cases are partitioned by evidence item and capture time, then consolidated
+    SYNTHESIS_MAX_PROMPT_CHARS: int = 40000
+    SYNTHESIS_CONCURRENCY: int = 4  # Partition prompts in flight at once
+    
+    # Opt-in: a report claim with a dated wall-clock time ("2024-03-01T04:20") is only compared with images
+    # captured (EXIF) that day within this many minutes of it. Check the camera clocks (UTC vs local) before
+    # enabling. 0 compares every claim with every observation
+    SYNTHESIS_TIME_WINDOW_MINUTES: int = 0
+    
+    # Image quality prefilter: scores stored at upload, judged against these thresholds at analysis
+    IMAGE_QUALITY_POLICY: str = "flag"  # "off", "flag" (analyze, report issues), "deprioritize" (analyze last) or "skip"
+    IMAGE_QUALITY_MIN_DIMENSION: int = 160  # Shorter side, pixels
+    IMAGE_QUALITY_MIN_LUMINANCE: float = 20  # Mean, 0-255
+    IMAGE_QUALITY_MAX_LUMINANCE: float = 240
+    IMAGE_QUALITY_MIN_CONTRAST: float = 8  # Luminance standard deviation
+    IMAGE_QUALITY_MIN_SHARPNESS: float = 20  # Laplacian variance, measured at 512px
+    
+    # Video evidence: keyframes picked by scene change / motion, analyzed as contact sheets
+    VIDEO_WORKERS: int = 2  # Decoder processes
+    VIDEO_SAMPLE_FPS: float = 4  # Frames per second examined for scene changes
+    VIDEO_SCENE_THRESHOLD: float = 0.35  # Colour histogram (Bhattacharyya) distance from the last keyframe
+    VIDEO_MOTION_THRESHOLD: float = 0.08  # Mean pixel change between sampled frames (0-1)
+    VIDEO_MIN_KEYFRAME_GAP_SECONDS: float = 1.0
+    VIDEO_DEDUP_DISTANCE: int = 6  # Max dHash Hamming distance treated as the same frame
+    VIDEO_MAX_KEYFRAMES: int = 48  # Strongest scene changes kept beyond this
+    VIDEO_FRAMES_PER_CALL: int = 4  # Keyframes tiled into one vision call
+    VIDEO_FRAME_MAX_DIMENSION: int = 768  # Longest side of each tile, pixels
+    
+    # Audio evidence transcription (chunked, overlapping, transcribed concurrently)
+    # "stub" marks speech only; for real transcripts install requirements-asr.txt and set "faster-whisper"
+    ASR_ENGINE: str = "stub"
+    ASR_MODEL: str = "small"  # faster-whisper model size or path
+    ASR_COMPUTE_TYPE: str = "int8"
+    ASR_LANGUAGE: str = ""  # Empty auto-detects
+    ASR_CHUNK_SECONDS: float = 30
+    ASR_CHUNK_OVERLAP_SECONDS: float = 2
+    ASR_CONCURRENCY: int = 2  # Chunks transcribed (and held in memory) at once
+    
     # Storage
     STORAGE_DIR: str = "/tmp" if os.environ.get("K_SERVICE") else os.path.join(os.getcwd(), "data")
     STORAGE_BACKEND: str = "local"  # "local" or "supabase"
@@ -41,6 +126,28 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str = ""  # Service role key
     SUPABASE_BUCKET: str = "evidence"  # Storage bucket name
     
+    # Storage garbage collection
+    STORAGE_GC_INTERVAL_SECONDS: int = 0  # Periodic orphan sweep interval; 0 disables it
+    STORAGE_GC_GRACE_SECONDS: int = 3600  # Never collect files younger than this (uploads in flight)
+    
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
+    
+    # Per-call LLM usage ledger (llm_calls table)
+    LLM_LEDGER_ENABLED: bool = True
+    # USD per 1M tokens, keyed by "provider/model", "model" or "provider", e.g.
+    # LLM_PRICING='{"gemini-3.0-flash": {"prompt": 0.30, "completion": 2.50}}'
+    LLM_PRICING: Dict[str, Dict[str, float]] = {}
+    
+    # Per-request profiling (X-Profile: cprofile|sample with a valid X-Admin-Key); off adds no middleware
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = os.path.join(os.getcwd(), "profiles")
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5
+    PROFILE_MAX_FILES: int = 100  # Oldest profiles are deleted beyond this
+    
+    # Admin endpoints are disabled unless a key is configured
+    ADMIN_API_KEY: str = ""
+    
     def get_database_url(self) -> str:
         """Get the database URL, preferring DATABASE_URL if set."""
         if self.DATABASE_URL:
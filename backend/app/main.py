@@ -1,13 +1,41 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 from app.config import settings
+import asyncio
 import os
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background maintenance tasks
+    background_tasks = []
+    if settings.STORAGE_GC_INTERVAL_SECONDS > 0:
+        from app.services.storage_gc import gc_loop
+        background_tasks.append(asyncio.create_task(gc_loop()))
+    if settings.LLM_LEDGER_ENABLED:
+        from app.services.llm_ledger import ledger_worker
+        background_tasks.append(asyncio.create_task(ledger_worker()))
+    
+    yield
+    
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    
+    from app.utils import cache
+    await cache.close()
+    
+    from app.services import video_service
+    video_service.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS
@@ -18,6 +46,16 @@ origins = [
     "*" # Permissive for Hackathon/Local
 ]
 
+if settings.METRICS_ENABLED:
+    from app.utils.metrics import MetricsMiddleware, instrument_engine
+    from app.database import engine
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+
+if settings.PROFILING_ENABLED:
+    from app.utils.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # Allow all for simplicity in local dev
@@ -26,10 +64,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from app.api import upload, analyze
+from app.api import upload, analyze, discrepancies, search, admin
 
 app.include_router(upload.router, prefix=settings.API_V1_STR, tags=["upload"])
 app.include_router(analyze.router, prefix=settings.API_V1_STR, tags=["analyze"])
+app.include_router(discrepancies.router, prefix=settings.API_V1_STR, tags=["discrepancies"])
+app.include_router(search.router, prefix=settings.API_V1_STR, tags=["search"])
+app.include_router(admin.router, prefix=settings.API_V1_STR, tags=["admin"])
 
 # Mount static files to serve evidence/report images
 # This allows frontend to access files via /static/cases/{case_id}/evidence/{filename}
@@ -41,6 +82,15 @@ if os.path.exists(settings.STORAGE_DIR):
 async def root():
     return {"message": "Justitia Lens API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    from app.utils.metrics import render_latest
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum, Boolean, Index, UniqueConstraint, Computed, Float
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -14,6 +15,15 @@ class DiscrepancyStatus(str, enum.Enum):
     REVIEWED = "REVIEWED"
     DISMISSED = "DISMISSED"
 
+class AnalysisStage(str, enum.Enum):
+    NARRATIVE = "NARRATIVE"
+    VISION = "VISION"
+    SYNTHESIS = "SYNTHESIS"
+    AUDIO = "AUDIO"
+
+# Text search configuration used by the generated tsvector columns
+SEARCH_TEXT_CONFIG = "english"
+
 class Case(Base):
     __tablename__ = "cases"
 
@@ -24,20 +34,65 @@ class Case(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # Analysis cache fields
-    narrative_analysis_json = Column(Text, nullable=True)  # Cached narrative agent result
-    vision_analysis_json = Column(Text, nullable=True)     # Cached vision agent result
-    synthesis_analysis_json = Column(Text, nullable=True)  # Cached discrepancy detection result
+    # Agent results live in case_analyses so loading a case never drags them along
     analysis_status = Column(String, default="PENDING")    # PENDING, IN_PROGRESS, COMPLETED
     
     # Sample case fields
     is_sample_case = Column(Boolean, default=False)  # True for pre-loaded sample cases
     thumbnail_path = Column(String, nullable=True)   # Path to thumbnail image for display
+    
+    # Denormalized child counts, maintained by the upload endpoints
+    evidence_count = Column(Integer, nullable=False, default=0, server_default="0")
+    report_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        # Keyset pagination for case listings
+        Index("ix_cases_created_at_id", "created_at", "id"),
+    )
 
     evidence = relationship("Evidence", back_populates="case", cascade="all, delete-orphan")
     reports = relationship("Report", back_populates="case", cascade="all, delete-orphan")
     discrepancies = relationship("Discrepancy", back_populates="case", cascade="all, delete-orphan")
 
+class CaseAnalysis(Base):
+    """Cached agent result for one analysis stage of a case"""
+    __tablename__ = "case_analyses"
+
+    id = Column(Integer, primary_key=True, index=True)
+    case_id = Column(Integer, ForeignKey("cases.id", ondelete="CASCADE"), nullable=False)
+    stage = Column(String, nullable=False)  # AnalysisStage value
+    result = Column(JSONB, nullable=False)
+    
+    # What produced the result
+    provider = Column(String, nullable=True)
+    model = Column(String, nullable=True)
+    prompt_version = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True)  # sha256 of result as served; used as the ETag
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Full-text index over claim descriptions (narrative) and observation text (vision)
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"""CASE stage
+            WHEN 'NARRATIVE' THEN to_tsvector('{SEARCH_TEXT_CONFIG}',
+                jsonb_path_query_array(result, '$.timeline[*].description')
+                || jsonb_path_query_array(result, '$.timeline[*].object'))
+            WHEN 'VISION' THEN to_tsvector('{SEARCH_TEXT_CONFIG}',
+                jsonb_path_query_array(result, '$.observations[*].label')
+                || jsonb_path_query_array(result, '$.observations[*].entity')
+                || jsonb_path_query_array(result, '$.observations[*].details'))
+        END""",
+        persisted=True
+    )))
+
+    __table_args__ = (
+        UniqueConstraint("case_id", "stage", name="uq_case_analyses_case_stage"),
+        Index("ix_case_analyses_search_vector", "search_vector", postgresql_using="gin"),
+        # Structured containment filters, e.g. result @> '{"observations": [{"label": "Phone"}]}'
+        Index("ix_case_analyses_result", "result", postgresql_using="gin", postgresql_ops={"result": "jsonb_path_ops"}),
+    )
+
 class Evidence(Base):
     __tablename__ = "evidence"
 
@@ -60,6 +115,14 @@ class Report(Base):
     file_path = Column(String, nullable=False)
     narrative_text = Column(Text, nullable=True) # Extracted text
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        f"to_tsvector('{SEARCH_TEXT_CONFIG}', coalesce(narrative_text, ''))", persisted=True
+    )))
+
+    __table_args__ = (
+        Index("ix_reports_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     case = relationship("Case", back_populates="reports")
 
@@ -71,12 +134,45 @@ class Discrepancy(Base):
     evidence_id = Column(Integer, ForeignKey("evidence.id"), nullable=True)
     report_id = Column(Integer, ForeignKey("reports.id"), nullable=True)
     
+    timestamp_ref = Column(String, nullable=True)
     clean_claim = Column(Text, nullable=False) # "Suspect held knife"
     visual_fact = Column(Text, nullable=False) # "Suspect held phone"
     description = Column(Text, nullable=True) # "Object mismatch"
     status = Column(Enum(DiscrepancyStatus), default=DiscrepancyStatus.FLAGGED)
+    fingerprint = Column(String, nullable=True) # Claim/evidence provenance; matches rows across synthesis runs
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Per-case triage listings filtered by status, paged by id
+        Index("ix_discrepancies_case_status_id", "case_id", "status", "id"),
+    )
+
     case = relationship("Case", back_populates="discrepancies")
     evidence = relationship("Evidence", back_populates="discrepancies")
     # report relation could be added effectively
+
+class LLMCall(Base):
+    """One model call, for token/cost accounting. Kept after the case is deleted."""
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True)
+    case_id = Column(Integer, ForeignKey("cases.id", ondelete="SET NULL"), nullable=True)
+    stage = Column(String, nullable=True)  # AnalysisStage value, when called from a pipeline stage
+    prompt_version = Column(String, nullable=True)
+    
+    provider = Column(String, nullable=False)
+    model = Column(String, nullable=True)
+    operation = Column(String, nullable=False)  # "text" or "vision"
+    
+    prompt_tokens = Column(Integer, nullable=True)  # None when the provider doesn't report usage
+    completion_tokens = Column(Integer, nullable=True)
+    latency_seconds = Column(Float, nullable=False)
+    retries = Column(Integer, nullable=False, server_default="0")
+    outcome = Column(String, nullable=False)  # ok, error, invalid_json, rate_limited, exception
+    
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_llm_calls_case_id", "case_id"),
+        Index("ix_llm_calls_provider_created_at", "provider", "created_at"),
+    )
@@ -13,8 +13,15 @@ class DiscrepancyStatus(str, Enum):
     REVIEWED = "REVIEWED"
     DISMISSED = "DISMISSED"
 
+class AnalysisStage(str, Enum):
+    NARRATIVE = "NARRATIVE"
+    VISION = "VISION"
+    SYNTHESIS = "SYNTHESIS"
+    AUDIO = "AUDIO"
+
 # --- Discrepancy Schemas ---
 class DiscrepancyBase(BaseModel):
+    timestamp_ref: Optional[str] = None
     clean_claim: str
     visual_fact: str
     description: Optional[str] = None
@@ -32,6 +39,15 @@ class Discrepancy(DiscrepancyBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class DiscrepancyPage(BaseModel):
+    """A page of discrepancies; pass next_cursor back as ?cursor= to fetch the next page"""
+    items: List[Discrepancy]
+    next_cursor: Optional[str] = None
+
+class DiscrepancyBulkUpdate(BaseModel):
+    ids: List[int]
+    status: DiscrepancyStatus
+
 # --- Evidence Schemas ---
 class EvidenceBase(BaseModel):
     type: EvidenceType
@@ -78,6 +94,7 @@ class Case(CaseBase):
     narrative_analysis_json: Optional[str] = None
     vision_analysis_json: Optional[str] = None
     synthesis_analysis_json: Optional[str] = None
+    audio_analysis_json: Optional[str] = None
     is_sample_case: bool = False
     thumbnail_path: Optional[str] = None
     evidence: List[Evidence] = []
@@ -102,10 +119,39 @@ class CaseListItem(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+class CaseListPage(BaseModel):
+    """A page of cases; pass next_cursor back as ?cursor= to fetch the next page"""
+    items: List[CaseListItem]
+    next_cursor: Optional[str] = None
+
+# --- Search Schemas ---
+class SearchHit(BaseModel):
+    case_id: int
+    title: str
+    analysis_status: str = "PENDING"
+    created_at: datetime
+    rank: float
+    matched_sources: List[str] = []
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_offset: Optional[int] = None
+
+# --- Admin Schemas ---
+class AnalysisInvalidateRequest(BaseModel):
+    """Selects cached analyses to drop; filters combine with AND"""
+    stages: Optional[List[AnalysisStage]] = None
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    prompt_version: Optional[str] = None
+    case_ids: Optional[List[int]] = None
+    stale_only: bool = False  # Only results not produced by the current provider/model/prompt
+    reprocess: bool = False  # Re-run the dropped stages in the background
+
 # --- Agent Analysis Schemas ---
 
 class VisionObservation(BaseModel):
-    timestamp_ref: str
+    timestamp_ref: str  # Capture time of day (HH:MM:SS) for dated stills, position in the recording for video
     category: str
     entity: str
     label: str
@@ -113,9 +159,23 @@ class VisionObservation(BaseModel):
     details: Optional[str] = None
     evidence_id: Optional[int] = None  # Which evidence this observation came from
     evidence_index: Optional[int] = None  # 1-based index for display
+    reused_from_evidence_id: Optional[int] = None  # Copied from a near-duplicate image instead of analyzed
+    captured_at: Optional[str] = None  # EXIF capture time (ISO 8601, camera-local) of the source image
+
+class DuplicateEvidence(BaseModel):
+    evidence_id: int
+    duplicate_of: int  # Evidence whose observations were reused
+    distance: int  # Perceptual hash Hamming distance (0-64)
+
+class QualityFlag(BaseModel):
+    evidence_id: int
+    issues: List[str]  # too_small, too_dark, overexposed, blank, blurred
+    action: str  # flagged, deprioritized or skipped (IMAGE_QUALITY_POLICY)
 
 class VisionAnalysisResult(BaseModel):
     observations: List[VisionObservation]
+    duplicates: List[DuplicateEvidence] = []
+    quality_flags: List[QualityFlag] = []
 
 class NarrativeClaim(BaseModel):
     timestamp_ref: Optional[str] = None
@@ -124,9 +184,42 @@ class NarrativeClaim(BaseModel):
     object: Optional[str] = None
     certainty: str # EXPLICIT, IMPLIED
     description: str
+    report_id: Optional[int] = None  # Which report the claim was extracted from
+    report_index: Optional[int] = None  # 1-based index for display
+    agrees_with: List[int] = []  # Ids of other reports corroborating the claim
+    conflicts_with: List[int] = []  # Ids of other reports contradicting it
+
+class ReportExtraction(BaseModel):
+    report_id: int
+    report_index: int
+    content_hash: str  # Of the report text the claims were extracted from
+    claims: int
 
 class NarrativeAnalysisResult(BaseModel):
-    timeline: List[NarrativeClaim]
+    timeline: List[NarrativeClaim]  # All reports' claims, merged in time order
+    reports: List[ReportExtraction] = []
+
+class TranscriptSegment(BaseModel):
+    start: float  # Seconds from the start of the recording
+    end: float
+    timestamp_ref: str
+    text: str
+
+class AudioTranscript(BaseModel):
+    evidence_id: int
+    evidence_index: int  # 1-based index for display
+    engine: str
+    model: Optional[str] = None
+    duration_seconds: float
+    segments: List[TranscriptSegment]
+
+class AudioClaim(NarrativeClaim):
+    evidence_id: Optional[int] = None  # Which recording the claim was heard in
+    evidence_index: Optional[int] = None
+
+class AudioAnalysisResult(BaseModel):
+    transcripts: List[AudioTranscript]
+    timeline: List[AudioClaim]
 
 # --- Synthesis/Discrepancy Detection Schemas ---
 
@@ -136,6 +229,14 @@ class SynthesisDiscrepancy(BaseModel):
     visual_fact: str  # What the evidence shows
     description: str  # Explanation of the discrepancy
     status: str = "FLAGGED"
+    report_id: Optional[int] = None  # Report of the claim
+    evidence_id: Optional[int] = None  # Evidence item of the first observation / audio claim it rests on
+    claim_key: Optional[str] = None  # input_key of the report claim it was found for
+    source_keys: List[str] = []  # input_keys of the observations / audio claims it rests on
+    fingerprint: Optional[str] = None  # Matches its discrepancies row across runs
 
 class SynthesisAnalysisResult(BaseModel):
     discrepancies: List[SynthesisDiscrepancy]
+    # Inputs the result covers, so a rerun only has to compare what changed
+    claim_keys: List[str] = []
+    evidence_keys: List[str] = []
@@ -0,0 +1,65 @@
+from typing import Optional
+from app.services import asr_service
+from app.services.model_factory import get_provider
+from app.services.base_provider import BaseAIProvider
+from app.utils.hashing import prompt_version
+
+class AgentAudio:
+    PROMPT_TEMPLATE = """
+        You are a Forensic Narrative Analyst. Extract a chronological timeline of OBJECTIVE FACTUAL ASSERTIONS
+        from this machine transcript of dispatch / radio audio. Each line starts with its [HH:MM:SS] position in the recording.
+
+        STRICT RULES:
+        1.  **Objective Only**: Ignore subjective statements like "He looked aggressive". Record physical actions only.
+        2.  **Certainty**: Assign a certainty level (EXPLICIT, IMPLIED) to each claim.
+            -   EXPLICIT: "Suspect has a gun."
+            -   IMPLIED: "He's reaching for something." (describe the movement, not the intent).
+        3.  **Timestamps**: "timestamp_ref" is the [HH:MM:SS] of the line the claim was heard in.
+        4.  **Transcription errors**: The transcript may contain recognition mistakes. Do not build claims on garbled words.
+
+        Return JSON format:
+        {{
+            "timeline": [
+                {{
+                    "timestamp_ref": "00:04:20",
+                    "entity": "Suspect",
+                    "action": "produced",
+                    "object": "black firearm",
+                    "certainty": "EXPLICIT",
+                    "description": "Caller reports suspect produced a black firearm"
+                }}
+            ]
+        }}
+
+        TRANSCRIPT:
+        {text}
+        """
+    PROMPT_VERSION = prompt_version(PROMPT_TEMPLATE)
+
+    def __init__(self, llm: Optional[BaseAIProvider] = None):
+        # Factory automatically selects provider based on settings.AI_PROVIDER
+        self.llm = llm or get_provider()
+
+    def version_info(self) -> dict:
+        """Provider, model and prompt version that produce this agent's results."""
+        return {
+            "provider": self.llm.name,
+            "model": self.llm.model_name_for("text"),
+            "prompt_version": self.PROMPT_VERSION,
+        }
+
+    async def transcribe(self, file_path: str) -> dict:
+        """Timestamped transcript of a recording through the configured ASR engine."""
+        return await asr_service.transcribe(file_path)
+
+    async def extract_claims(self, transcript: dict) -> dict:
+        """
+        Extracts factual claims from a transcript, like AgentNarrative does for reports.
+        """
+        if not transcript["segments"]:
+            return {"timeline": []}
+        prompt = self.PROMPT_TEMPLATE.format(text=asr_service.transcript_text(transcript))
+        try:
+            return await self.llm.generate_json(prompt)
+        except Exception as e:
+            return {"error": str(e), "timeline": []}
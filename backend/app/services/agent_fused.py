@@ -0,0 +1,134 @@
+import asyncio
+from typing import List, Optional
+from app.config import settings
+from app.services.model_factory import get_provider
+from app.services.base_provider import BaseAIProvider
+from app.utils.hashing import prompt_version
+from app.utils.image_normalize import normalize_image
+from app.utils.storage import read_file_content
+
+class AgentFused:
+    """
+    Narrative, vision and synthesis for a small case in one multimodal request:
+    the report text and every image go out together, and the answer carries the
+    claims, per-image observations and discrepancies of the three stages.
+    """
+    PROMPT_TEMPLATE = """
+        You are a Forensic Analyst. You are given {reports} police report(s) below and {count} separate images,
+        labelled "Image 1" to "Image {count}". Do all three tasks in one answer.
+
+        TASK 1 - Claims: Extract a chronological timeline of OBJECTIVE FACTUAL ASSERTIONS from the report(s).
+        1.  **Objective Only**: Ignore subjective statements like "He looked aggressive". Record physical actions only.
+        2.  **Certainty**: Assign a certainty level (EXPLICIT, IMPLIED) to each claim.
+        3.  **Source**: "report" is the number of the report the claim comes from.
+
+        TASK 2 - Observations: Analyze EACH image independently for objective discovery points.
+        1.  **Do NOT infer intent**, threat level, or emotional state. Describe only what is visually observable.
+        2.  **Object Identification**: If an object is not clearly identifiable, describe its shape/color/material rather than guessing specific models.
+        3.  **Confidence**: Assign LOW, MEDIUM or HIGH. Poor lighting, fast handling or occlusion means LOW or MEDIUM.
+        4.  **Timestamps**: These are static images; output "timestamp_ref": "00:00:00".
+        5.  **Attribution**: Return exactly one entry per image, numbered as labelled, even if it has no observations.
+
+        TASK 3 - Discrepancies: Identify where the images CONTRADICT or FAIL TO SUPPORT a claim.
+        1.  **Direct Contradictions**: Report says "Gun", Image says "Phone". (HIGH PRIORITY)
+        2.  **Omissions**: Report says "Suspect punched officer", Image shows suspect hands at sides. (MEDIUM PRIORITY)
+        3.  **Ambiguity**: If visual confidence is LOW, do not flag as a contradiction.
+        4.  **References**: "claim_ref" is "C<n>" for the n-th claim of your timeline; "evidence_refs" lists "O<n>" for
+            the n-th observation, counting observations across all images in order.
+
+        Return JSON:
+        {{
+            "timeline": [
+                {{
+                    "report": 1,
+                    "timestamp_ref": "04:20",
+                    "entity": "Suspect",
+                    "action": "produced",
+                    "object": "black firearm",
+                    "certainty": "EXPLICIT",
+                    "description": "Suspect produced a black firearm from waistband"
+                }}
+            ],
+            "images": [
+                {{
+                    "image": 1,
+                    "observations": [
+                        {{
+                            "timestamp_ref": "00:00:00",
+                            "category": "OBJECT",
+                            "entity": "Suspect",
+                            "label": "Unknown object",
+                            "confidence": "MEDIUM",
+                            "details": "Black rectangular object held in right hand, reflective surface visible"
+                        }}
+                    ]
+                }}
+            ],
+            "discrepancies": [
+                {{
+                    "timestamp_ref": "04:20",
+                    "clean_claim": "Suspect produced a black firearm",
+                    "visual_fact": "Suspect held a black rectangular object (likely phone)",
+                    "description": "Object misidentification. Visual evidence does not support firearm.",
+                    "status": "FLAGGED",
+                    "claim_ref": "C1",
+                    "evidence_refs": ["O1"]
+                }}
+            ]
+        }}
+
+        REPORT TEXT:
+        {text}
+        """
+    PROMPT_VERSION = prompt_version(PROMPT_TEMPLATE)
+
+    def __init__(self, llm: Optional[BaseAIProvider] = None):
+        # Factory automatically selects provider based on settings.AI_PROVIDER
+        self.llm = llm or get_provider()
+
+    def version_info(self) -> dict:
+        """Provider, model and prompt version that produce this agent's results."""
+        return {
+            "provider": self.llm.name,
+            "model": self.llm.model_name_for("vision"),
+            "prompt_version": self.PROMPT_VERSION,
+        }
+
+    async def normalized_images(self, image_paths: List[str]) -> List[Optional[bytes]]:
+        """Request-ready JPEGs of the images, None for any that can't be read."""
+        async def normalized(path: str) -> Optional[bytes]:
+            try:
+                content = await read_file_content(path)
+                return await asyncio.to_thread(normalize_image, content, settings.VISION_BATCH_MAX_DIMENSION)
+            except Exception as e:
+                print(f"[Fused] Could not normalize {path}: {e}")
+                return None
+        return await asyncio.gather(*(normalized(path) for path in image_paths))
+
+    def accepts(self, report_chars: int, image_sizes: List[int]) -> bool:
+        """Whether a case this size fits in one request (FUSED_* settings and the provider's image budget)."""
+        max_images, max_bytes = self.llm.vision_batch_limits()
+        return (
+            settings.FUSED_ANALYSIS_ENABLED
+            and max_images > 1
+            and 1 <= len(image_sizes) <= min(max_images, settings.FUSED_MAX_IMAGES)
+            and sum(image_sizes) <= max_bytes
+            and report_chars <= settings.FUSED_MAX_REPORT_CHARS
+        )
+
+    async def analyze_case(self, report_texts: List[str], images: List[bytes]) -> dict:
+        """
+        Claims, observations and discrepancies in one call, as the model returned them,
+        or {"error": ...} if the call failed or the answer lacks one of the parts.
+        """
+        text = "\n\n".join(f"--- REPORT {i} ---\n{report}" for i, report in enumerate(report_texts, 1))
+        prompt = self.PROMPT_TEMPLATE.format(reports=len(report_texts), count=len(images), text=text)
+        try:
+            result = await self.llm.analyze_images(images, prompt)
+        except Exception as e:
+            return {"error": str(e)}
+        if "error" in result:
+            return result
+        if not all(isinstance(result.get(part), list) for part in ("timeline", "images", "discrepancies")):
+            return {"error": "Fused response is missing timeline, images or discrepancies"}
+        return result
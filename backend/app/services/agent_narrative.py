@@ -1,18 +1,12 @@
+from typing import Optional
 from app.services.model_factory import get_provider
+from app.services.base_provider import BaseAIProvider
 from app.services.pdf_service import PDFService
+from app.utils.hashing import prompt_version
 import json
 
 class AgentNarrative:
-    def __init__(self):
-        # Factory automatically selects provider based on settings.AI_PROVIDER
-        self.llm = get_provider()
-    
-    async def extract_claims(self, text: str) -> dict:
-        """
-        Analyzes narrative text to extract factual claims.
-        """
-        # ... prompt construction remains ...
-        prompt = f"""
+    PROMPT_TEMPLATE = """
         You are a Forensic Narrative Analyst. Extract a chronological timeline of OBJECTIVE FACTUAL ASSERTIONS from the police report.
         
         STRICT RULES:
@@ -38,6 +32,25 @@ class AgentNarrative:
         REPORT TEXT:
         {text}
         """
+    PROMPT_VERSION = prompt_version(PROMPT_TEMPLATE)
+
+    def __init__(self, llm: Optional[BaseAIProvider] = None):
+        # Factory automatically selects provider based on settings.AI_PROVIDER
+        self.llm = llm or get_provider()
+
+    def version_info(self) -> dict:
+        """Provider, model and prompt version that produce this agent's results."""
+        return {
+            "provider": self.llm.name,
+            "model": self.llm.model_name_for("text"),
+            "prompt_version": self.PROMPT_VERSION,
+        }
+    
+    async def extract_claims(self, text: str) -> dict:
+        """
+        Analyzes narrative text to extract factual claims.
+        """
+        prompt = self.PROMPT_TEMPLATE.format(text=text)
         
         try:
             # All providers now implement the same interface
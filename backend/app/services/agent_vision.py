@@ -1,17 +1,19 @@
+import asyncio
+import os
+import re
+import tempfile
+from typing import List, Optional
+from app.config import settings
+from app.services import video_service
 from app.services.model_factory import get_provider
+from app.services.base_provider import BaseAIProvider
+from app.utils.hashing import prompt_version
+from app.utils.image_normalize import normalize_image
+from app.utils.storage import read_file_content
 import json
 
 class AgentVision:
-    def __init__(self):
-        # Factory automatically selects provider based on settings.AI_PROVIDER
-        self.llm = get_provider()
-
-    async def analyze_evidence(self, image_path: str) -> dict:
-        """
-        Analyzes an image for forensic discovery points with strict guardrails.
-        """
-        # ... prompt construction ...
-        prompt = """
+    PROMPT_TEMPLATE = """
         You are a Forensic Visual Analyst. Analyze this image for objective discovery points.
         
         STRICT RULES:
@@ -50,6 +52,98 @@ class AgentVision:
             ]
         }
         """
+    VIDEO_PROMPT_TEMPLATE = """
+        You are a Forensic Visual Analyst. This image is a contact sheet of keyframes from one video,
+        in time order. Each tile is labelled in its top-left corner with its tile number and timestamp:
+        {tiles}
+
+        STRICT RULES:
+        1.  **Do NOT infer intent**, threat level, or emotional state. Describe only what is visually observable.
+        2.  **Object Identification**: If an object is not clearly identifiable, describe its shape/color/material rather than guessing specific models.
+        3.  **Confidence**: You must assign a confidence level (LOW, MEDIUM, HIGH) to every observation.
+            -   If lighting is poor, motion is fast, or the object is partially occluded, confidence must be LOW or MEDIUM.
+            -   HIGH confidence is reserved for clear, unobstructed views.
+        4.  **Timestamps**: Every observation's "timestamp_ref" must be the exact timestamp of the tile it was seen in.
+            Note changes between tiles (an object appearing, being handed over, a person leaving) as separate observations.
+
+        Identify:
+        1. Objects held (Any object. If unknown, describe properties).
+        2. Clothing and visible attributes.
+        3. Lighting conditions.
+        4. Procedural markers.
+
+        Return JSON:
+        {{
+            "observations": [
+                {{
+                    "timestamp_ref": "{example}",
+                    "category": "OBJECT",
+                    "entity": "Suspect",
+                    "label": "Unknown object",
+                    "confidence": "MEDIUM",
+                    "details": "Black rectangular object held in right hand, reflective surface visible"
+                }}
+            ]
+        }}
+        """
+    BATCH_PROMPT_TEMPLATE = """
+        You are a Forensic Visual Analyst. You are given {count} separate images, labelled "Image 1" to "Image {count}".
+        Analyze EACH image independently for objective discovery points. Never merge observations across images.
+
+        STRICT RULES:
+        1.  **Do NOT infer intent**, threat level, or emotional state. Describe only what is visually observable.
+        2.  **Object Identification**: If an object is not clearly identifiable, describe its shape/color/material (e.g., "Black rectangular object") rather than guessing specific models (e.g., "iPhone 13").
+        3.  **Confidence**: You must assign a confidence level (LOW, MEDIUM, HIGH) to every observation.
+            -   If lighting is poor, handling is fast, or object is partially occluded, confidence must be LOW or MEDIUM.
+            -   HIGH confidence is reserved for clear, unobstructed views.
+        4.  **Timestamps**: These are static images; output "timestamp_ref": "00:00:00" to maintain schema compatibility with video analysis.
+        5.  **Attribution**: Return exactly one entry per image, numbered as labelled, even if it has no observations.
+
+        Identify, per image:
+        1. Objects held (Any object. If unknown, describe properties).
+        2. Clothing and visible attributes.
+        3. Lighting conditions.
+        4. Procedural markers.
+
+        Return JSON:
+        {{
+            "images": [
+                {{
+                    "image": 1,
+                    "observations": [
+                        {{
+                            "timestamp_ref": "00:00:00",
+                            "category": "OBJECT",
+                            "entity": "Suspect",
+                            "label": "Unknown object",
+                            "confidence": "MEDIUM",
+                            "details": "Black rectangular object held in right hand, reflective surface visible"
+                        }}
+                    ]
+                }}
+            ]
+        }}
+        """
+    # Image, batched-image and video results land in the same stage, so any prompt changing invalidates it
+    PROMPT_VERSION = prompt_version(PROMPT_TEMPLATE + BATCH_PROMPT_TEMPLATE + VIDEO_PROMPT_TEMPLATE)
+
+    def __init__(self, llm: Optional[BaseAIProvider] = None):
+        # Factory automatically selects provider based on settings.AI_PROVIDER
+        self.llm = llm or get_provider()
+
+    def version_info(self) -> dict:
+        """Provider, model and prompt version that produce this agent's results."""
+        return {
+            "provider": self.llm.name,
+            "model": self.llm.model_name_for("vision"),
+            "prompt_version": self.PROMPT_VERSION,
+        }
+
+    async def analyze_evidence(self, image_path: str) -> dict:
+        """
+        Analyzes an image for forensic discovery points with strict guardrails.
+        """
+        prompt = self.PROMPT_TEMPLATE
         
         try:
             # All providers now implement the same interface
@@ -58,3 +152,140 @@ class AgentVision:
         except Exception as e:
             # Fallback for JSON parsing or API errors
             return {"error": str(e), "observations": []}
+
+    async def analyze_evidence_batch(self, image_paths: List[str]) -> List[dict]:
+        """
+        Analyzes several images, one result per path as analyze_evidence returns it.
+        Normalized images are packed into multi-image requests up to the provider's
+        image and byte budget; images a batch fails on or doesn't attribute are
+        retried with single-image calls.
+        """
+        max_images, max_bytes = self.llm.vision_batch_limits()
+        if settings.VISION_BATCH_MAX_IMAGES > 0:
+            max_images = min(max_images, settings.VISION_BATCH_MAX_IMAGES)
+        if not settings.VISION_BATCH_ENABLED or max_images < 2 or len(image_paths) < 2:
+            return [await self.analyze_evidence(path) for path in image_paths]
+
+        normalized = await asyncio.gather(*(self._normalized(path) for path in image_paths))
+        results: List[Optional[dict]] = [None] * len(image_paths)
+        for batch in _plan_batches([len(image) if image else None for image in normalized], max_images, max_bytes):
+            if len(batch) > 1:
+                attributed = await self._analyze_batch([normalized[i] for i in batch])
+                for i, result in zip(batch, attributed):
+                    results[i] = result
+                missing = sum(result is None for result in attributed)
+                if missing:
+                    print(f"[Vision] Batch of {len(batch)}: {missing} image(s) unattributed, retrying them singly")
+            for i in batch:
+                if results[i] is None:
+                    results[i] = await self.analyze_evidence(image_paths[i])
+        return results
+
+    async def _normalized(self, image_path: str) -> Optional[bytes]:
+        """Batch-ready JPEG of an image, or None if it can't be read (it then goes single)."""
+        try:
+            content = await read_file_content(image_path)
+            return await asyncio.to_thread(normalize_image, content, settings.VISION_BATCH_MAX_DIMENSION)
+        except Exception as e:
+            print(f"[Vision] Could not normalize {image_path} for batching: {e}")
+            return None
+
+    async def _analyze_batch(self, images: List[bytes]) -> List[Optional[dict]]:
+        """Per-image results of one multi-image call; None where the response can't be attributed."""
+        prompt = self.BATCH_PROMPT_TEMPLATE.format(count=len(images))
+        try:
+            result = await self.llm.analyze_images(images, prompt)
+        except Exception as e:
+            result = {"error": str(e)}
+        attributed: List[Optional[dict]] = [None] * len(images)
+        if "error" in result:
+            print(f"[Vision] Batch of {len(images)} failed: {result['error']}")
+            return attributed
+        entries = result.get("images")
+        if not isinstance(entries, list):
+            return attributed
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get("observations"), list):
+                continue
+            try:
+                index = int(str(entry.get("image")).strip().lower().removeprefix("image").strip())
+            except ValueError:
+                continue
+            if 1 <= index <= len(images) and attributed[index - 1] is None:
+                attributed[index - 1] = {"observations": entry["observations"]}
+        return attributed
+
+    async def analyze_video(self, video_path: str) -> dict:
+        """
+        Analyzes a video through its keyframe contact sheets, one vision call per sheet.
+        Each observation's timestamp_ref is the timestamp of the keyframe it came from.
+        """
+        try:
+            sheets, stats = await video_service.contact_sheets(video_path)
+        except Exception as e:
+            return {"error": f"Video keyframe extraction failed: {e}", "observations": []}
+
+        observations, errors = [], []
+        with tempfile.TemporaryDirectory(prefix="video-sheets-") as sheet_dir:
+            for i, sheet in enumerate(sheets):
+                # Providers read images from disk
+                sheet_path = os.path.join(sheet_dir, f"sheet-{i}.jpg")
+                with open(sheet_path, "wb") as f:
+                    f.write(sheet.jpeg)
+                tiles = "\n".join(f"        #{n} = {ts}" for n, ts in enumerate(sheet.timestamps, 1))
+                prompt = self.VIDEO_PROMPT_TEMPLATE.format(tiles=tiles, example=sheet.timestamps[0])
+                try:
+                    result = await self.llm.analyze_image(sheet_path, prompt)
+                except Exception as e:
+                    result = {"error": str(e)}
+                if "error" in result:
+                    errors.append(result["error"])
+                    continue
+                for obs in result.get("observations", []):
+                    obs["timestamp_ref"] = _sheet_timestamp(obs.get("timestamp_ref"), sheet.timestamps)
+                    observations.append(obs)
+
+        if errors and not observations:
+            return {"error": errors[0], "observations": []}
+        return {"observations": observations, "video": stats}
+
+
+def _plan_batches(sizes: List[Optional[int]], max_images: int, max_bytes: int) -> List[List[int]]:
+    """
+    Group image indices, in order, into batches within the image and byte budget.
+    Unreadable (None) or over-budget images get a batch of their own.
+    """
+    batches, current, current_bytes = [], [], 0
+    for i, size in enumerate(sizes):
+        if size is None or size > max_bytes:
+            batches.append([i])
+            continue
+        if current and (len(current) >= max_images or current_bytes + size > max_bytes):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(i)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _sheet_timestamp(reported, timestamps: List[str]) -> str:
+    """Snap a model-reported timestamp or tile reference onto one of the sheet's real timestamps."""
+    reported = str(reported or "").strip()
+    if reported in timestamps:
+        return reported
+    tile = re.fullmatch(r"#?\s*(\d+)", reported)
+    if tile and 1 <= int(tile.group(1)) <= len(timestamps):
+        return timestamps[int(tile.group(1)) - 1]
+    # "00:12" or "0:00:12" style variants of a listed timestamp
+    digits = re.findall(r"\d+", reported)
+    if digits:
+        seconds = 0
+        for part in digits[-3:]:
+            seconds = seconds * 60 + int(part)
+        for ts in timestamps:
+            h, m, s = (int(x) for x in ts.split(":"))
+            if h * 3600 + m * 60 + s == seconds:
+                return ts
+    return timestamps[0]
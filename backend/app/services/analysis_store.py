@@ -0,0 +1,277 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy import select, delete, update, exists, cast, literal, or_, and_, Text
+from sqlalchemy.dialects.postgresql import insert, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from app import models
+
+NARRATIVE = models.AnalysisStage.NARRATIVE.value
+VISION = models.AnalysisStage.VISION.value
+SYNTHESIS = models.AnalysisStage.SYNTHESIS.value
+AUDIO = models.AnalysisStage.AUDIO.value
+
+
+VERSION_FIELDS = ("provider", "model", "prompt_version")
+
+
+class RawAnalysis(NamedTuple):
+    """A stored result exactly as Postgres renders it, plus the hash of that text and what produced it."""
+    text: str
+    content_hash: str
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    prompt_version: Optional[str] = None
+
+
+_RAW_COLUMNS = (
+    cast(models.CaseAnalysis.result, Text),
+    models.CaseAnalysis.content_hash,
+    models.CaseAnalysis.provider,
+    models.CaseAnalysis.model,
+    models.CaseAnalysis.prompt_version,
+)
+
+
+def _content_hash(jsonb_value):
+    """SQL expression hashing the text form of a JSONB value - the same bytes we serve."""
+    return func.encode(func.sha256(func.convert_to(cast(jsonb_value, Text), "UTF8")), "hex")
+
+
+async def load_analysis(db: AsyncSession, case_id: int, stage: str) -> Optional[models.CaseAnalysis]:
+    """Fetch the cached result for one stage of a case, or None."""
+    result = await db.execute(
+        select(models.CaseAnalysis)
+        .where(models.CaseAnalysis.case_id == case_id, models.CaseAnalysis.stage == stage)
+    )
+    return result.scalar_one_or_none()
+
+
+async def load_analyses(db: AsyncSession, case_id: int) -> Dict[str, models.CaseAnalysis]:
+    """Fetch every cached stage result for a case, keyed by stage."""
+    result = await db.execute(
+        select(models.CaseAnalysis).where(models.CaseAnalysis.case_id == case_id)
+    )
+    return {row.stage: row for row in result.scalars()}
+
+
+async def load_analysis_raw(db: AsyncSession, case_id: int, stage: str) -> Optional[RawAnalysis]:
+    """Fetch a stage result as JSON text without decoding it in Python."""
+    result = await db.execute(
+        select(*_RAW_COLUMNS)
+        .where(models.CaseAnalysis.case_id == case_id, models.CaseAnalysis.stage == stage)
+    )
+    row = result.first()
+    return RawAnalysis(*row) if row else None
+
+
+async def load_analyses_raw(db: AsyncSession, case_id: int) -> Dict[str, RawAnalysis]:
+    """Fetch every stage result for a case as JSON text, keyed by stage."""
+    result = await db.execute(
+        select(models.CaseAnalysis.stage, *_RAW_COLUMNS)
+        .where(models.CaseAnalysis.case_id == case_id)
+    )
+    return {row[0]: RawAnalysis(*row[1:]) for row in result.all()}
+
+
+async def has_analysis(db: AsyncSession, case_id: int, stage: str) -> bool:
+    """Check whether a stage has a cached result without loading it."""
+    result = await db.execute(
+        select(
+            exists().where(models.CaseAnalysis.case_id == case_id, models.CaseAnalysis.stage == stage)
+        )
+    )
+    return bool(result.scalar())
+
+
+async def has_newer_inputs(db: AsyncSession, case_id: int, stage: str, inputs: Iterable[str]) -> bool:
+    """Whether any of the inputs' results was saved after the stage result built from them."""
+    built = (
+        select(models.CaseAnalysis.updated_at)
+        .where(models.CaseAnalysis.case_id == case_id, models.CaseAnalysis.stage == stage)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            exists().where(
+                models.CaseAnalysis.case_id == case_id,
+                models.CaseAnalysis.stage.in_(list(inputs)),
+                models.CaseAnalysis.updated_at > built,
+            )
+        )
+    )
+    return bool(result.scalar())
+
+
+async def save_analysis(
+    db: AsyncSession,
+    case_id: int,
+    stage: str,
+    result: dict,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+) -> RawAnalysis:
+    """
+    Insert or replace the cached result for a stage. Callers validate the result
+    against its schema first; it is never re-validated on read. Does not commit,
+    so callers can bundle it with their own status updates.
+    Returns: The stored result as served to clients, with its content hash.
+    """
+    values = {
+        "result": result,
+        "provider": provider,
+        "model": model,
+        "prompt_version": prompt_version,
+    }
+    stmt = insert(models.CaseAnalysis).values(
+        case_id=case_id,
+        stage=stage,
+        content_hash=_content_hash(literal(result, type_=JSONB)),
+        **values
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_case_analyses_case_stage",
+        set_={**values, "content_hash": _content_hash(stmt.excluded.result), "updated_at": func.now()},
+    ).returning(*_RAW_COLUMNS)
+    row = (await db.execute(stmt)).first()
+    return RawAnalysis(*row)
+
+
+async def insert_analyses(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    Bulk-insert results for cases that have none yet (case_id, stage, result and
+    version columns per row), then fill in their content hashes in one UPDATE.
+    Does not commit.
+    """
+    if not rows:
+        return
+    await db.execute(insert(models.CaseAnalysis), rows)
+    await db.execute(
+        update(models.CaseAnalysis)
+        .where(
+            models.CaseAnalysis.case_id.in_({row["case_id"] for row in rows}),
+            models.CaseAnalysis.content_hash.is_(None),
+        )
+        .values(content_hash=_content_hash(models.CaseAnalysis.result))
+    )
+
+
+async def clear_analyses(db: AsyncSession, case_id: int, stages: Optional[Iterable[str]] = None) -> None:
+    """Drop cached results for a case (all stages unless given). Does not commit."""
+    stmt = delete(models.CaseAnalysis).where(models.CaseAnalysis.case_id == case_id)
+    if stages is not None:
+        stmt = stmt.where(models.CaseAnalysis.stage.in_(list(stages)))
+    await db.execute(stmt)
+
+
+def is_stale(stored, current: dict) -> bool:
+    """
+    True when a stored result (RawAnalysis or CaseAnalysis) was produced by a
+    different provider, model or prompt than the agent would use now.
+    Untagged results from before versioning count as stale.
+    """
+    return any(getattr(stored, field) != current.get(field) for field in VERSION_FIELDS)
+
+
+def _version_filter(
+    stages: Optional[Iterable[str]] = None,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    prompt_version: Optional[str] = None,
+    case_ids: Optional[Iterable[int]] = None,
+    stale_against: Optional[Dict[str, List[dict]]] = None,
+) -> list:
+    """
+    WHERE clauses selecting case_analyses rows by stage/version; stale_against maps
+    stage -> the version infos that count as current, and selects rows matching none.
+    """
+    clauses = []
+    if stages is not None:
+        clauses.append(models.CaseAnalysis.stage.in_(list(stages)))
+    if provider is not None:
+        clauses.append(models.CaseAnalysis.provider == provider)
+    if model is not None:
+        clauses.append(models.CaseAnalysis.model == model)
+    if prompt_version is not None:
+        clauses.append(models.CaseAnalysis.prompt_version == prompt_version)
+    if case_ids is not None:
+        clauses.append(models.CaseAnalysis.case_id.in_(list(case_ids)))
+    if stale_against is not None:
+        clauses.append(or_(*(
+            and_(
+                models.CaseAnalysis.stage == stage,
+                *(
+                    or_(*(
+                        getattr(models.CaseAnalysis, field).is_distinct_from(info.get(field))
+                        for field in VERSION_FIELDS
+                    ))
+                    for info in infos
+                ),
+            )
+            for stage, infos in stale_against.items()
+        )))
+    return clauses
+
+
+async def version_summary(db: AsyncSession) -> List[dict]:
+    """Row counts per stage/provider/model/prompt version."""
+    result = await db.execute(
+        select(
+            models.CaseAnalysis.stage,
+            models.CaseAnalysis.provider,
+            models.CaseAnalysis.model,
+            models.CaseAnalysis.prompt_version,
+            func.count().label("count"),
+            func.max(models.CaseAnalysis.updated_at).label("last_updated"),
+        )
+        .group_by(
+            models.CaseAnalysis.stage,
+            models.CaseAnalysis.provider,
+            models.CaseAnalysis.model,
+            models.CaseAnalysis.prompt_version,
+        )
+        .order_by(models.CaseAnalysis.stage, func.count().desc())
+    )
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def invalidate_analyses(db: AsyncSession, **filters) -> Dict[int, List[str]]:
+    """
+    Delete cached results matching the version filters (see _version_filter).
+    Dropping a narrative or vision result also drops that case's synthesis, which
+    was built from it, and a dropped synthesis takes the case's discrepancy rows
+    (and their triage status) with it, so no findings are served without the result
+    they came from. Affected cases go back to PENDING. Does not commit.
+    Returns: case_id -> stages removed.
+    """
+    deleted = await db.execute(
+        delete(models.CaseAnalysis)
+        .where(*_version_filter(**filters))
+        .returning(models.CaseAnalysis.case_id, models.CaseAnalysis.stage)
+    )
+    removed: Dict[int, List[str]] = {}
+    for case_id, stage in deleted.all():
+        removed.setdefault(case_id, []).append(stage)
+
+    # Syntheses built on an invalidated input are stale too
+    upstream = [case_id for case_id, stages in removed.items() if SYNTHESIS not in stages]
+    if upstream:
+        cascaded = await db.execute(
+            delete(models.CaseAnalysis)
+            .where(models.CaseAnalysis.case_id.in_(upstream), models.CaseAnalysis.stage == SYNTHESIS)
+            .returning(models.CaseAnalysis.case_id)
+        )
+        for case_id in cascaded.scalars():
+            removed[case_id].append(SYNTHESIS)
+
+    synthesized = [case_id for case_id, stages in removed.items() if SYNTHESIS in stages]
+    if synthesized:
+        await db.execute(delete(models.Discrepancy).where(models.Discrepancy.case_id.in_(synthesized)))
+
+    if removed:
+        await db.execute(
+            update(models.Case)
+            .where(models.Case.id.in_(list(removed)))
+            .values(analysis_status="PENDING")
+        )
+    return removed
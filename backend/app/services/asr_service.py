@@ -0,0 +1,273 @@
+"""
+Speech-to-text for audio evidence.
+
+Audio is decoded as a stream into fixed-length chunks (16 kHz mono float32)
+that overlap by ASR_CHUNK_OVERLAP_SECONDS, so words cut at a chunk boundary are
+heard whole in one of the two chunks. Chunks are transcribed concurrently
+through a pluggable engine, and only a bounded number of chunks is held in
+memory at once, however long the recording. Each chunk keeps the segments
+whose midpoint falls in its own half of the overlaps, which stitches the
+transcript without duplicated words.
+
+Engines register by name like AI providers do:
+    stub           - energy-based speech detection, no model (tests, benchmarks)
+    faster-whisper - local CPU Whisper (optional: pip install -r requirements-asr.txt)
+"""
+import asyncio
+import os
+import tempfile
+import time
+import wave
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+from app.config import settings
+from app.services.video_service import format_timestamp
+from app.utils import metrics
+from app.utils.storage import is_url, read_file_content
+
+SAMPLE_RATE = 16000
+_DECODE_BLOCK_SECONDS = 5
+
+_ENGINE_REGISTRY = {}
+_engines: Dict[str, "BaseASREngine"] = {}
+
+
+class BaseASREngine(ABC):
+    """A speech recognizer for one chunk of 16 kHz mono audio."""
+    name: str = "base"
+    model: Optional[str] = None
+
+    @abstractmethod
+    def transcribe(self, samples: np.ndarray) -> List[dict]:
+        """
+        Blocking; called from worker threads. Returns segments as
+        {"start": seconds, "end": seconds, "text": str}, relative to the chunk.
+        """
+        pass
+
+
+class StubASREngine(BaseASREngine):
+    """Marks stretches of speech-level energy; needs no model."""
+    name = "stub"
+    model = "energy"
+    WINDOW_SECONDS = 0.5
+    THRESHOLD = 0.02  # RMS, full scale = 1.0
+
+    def transcribe(self, samples: np.ndarray) -> List[dict]:
+        window = int(SAMPLE_RATE * self.WINDOW_SECONDS)
+        segments = []
+        start = None
+        count = len(samples) // window
+        for i in range(count + 1):
+            block = samples[i * window:(i + 1) * window]
+            active = i < count and float(np.sqrt(np.mean(block ** 2))) >= self.THRESHOLD
+            if active and start is None:
+                start = i * self.WINDOW_SECONDS
+            elif not active and start is not None:
+                end = i * self.WINDOW_SECONDS
+                segments.append({"start": start, "end": end, "text": f"[speech, {end - start:.1f}s]"})
+                start = None
+        return segments
+
+
+class FasterWhisperEngine(BaseASREngine):
+    """Whisper on CPU through CTranslate2."""
+    name = "faster-whisper"
+
+    def __init__(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError(
+                "ASR_ENGINE=faster-whisper requires the faster-whisper package "
+                "(pip install -r requirements-asr.txt), or set ASR_ENGINE=stub"
+            )
+        self.model = settings.ASR_MODEL
+        self._model = WhisperModel(
+            settings.ASR_MODEL, device="cpu", compute_type=settings.ASR_COMPUTE_TYPE,
+            num_workers=settings.ASR_CONCURRENCY,
+        )
+
+    def transcribe(self, samples: np.ndarray) -> List[dict]:
+        segments, _ = self._model.transcribe(
+            samples, language=settings.ASR_LANGUAGE or None, vad_filter=True, beam_size=1,
+        )
+        return [{"start": s.start, "end": s.end, "text": s.text.strip()} for s in segments if s.text.strip()]
+
+
+def register_engine(name: str, engine_class):
+    """Register an ASR engine class under a name usable in ASR_ENGINE."""
+    _ENGINE_REGISTRY[name.lower()] = engine_class
+
+
+register_engine("stub", StubASREngine)
+register_engine("faster-whisper", FasterWhisperEngine)
+
+
+def get_engine(name: Optional[str] = None) -> BaseASREngine:
+    """Shared engine instance (models are loaded once per process)."""
+    name = (name or settings.ASR_ENGINE).lower()
+    if name not in _ENGINE_REGISTRY:
+        available = ", ".join(_ENGINE_REGISTRY.keys())
+        raise ValueError(f"Unknown ASR engine: '{name}'. Available engines: {available}")
+    if name not in _engines:
+        _engines[name] = _ENGINE_REGISTRY[name]()
+    return _engines[name]
+
+
+def _decode_wav(path: str) -> Iterator[np.ndarray]:
+    with wave.open(path, "rb") as wav:
+        rate, channels, width = wav.getframerate(), wav.getnchannels(), wav.getsampwidth()
+        dtype = {1: np.uint8, 2: np.int16, 4: np.int32}.get(width)
+        if dtype is None:
+            raise ValueError(f"Unsupported WAV sample width: {width * 8} bits")
+        # 8-bit WAV is unsigned, centred on 128
+        zero, scale = (128, 128.0) if width == 1 else (0, float(np.iinfo(dtype).max))
+        while True:
+            raw = wav.readframes(rate * _DECODE_BLOCK_SECONDS)
+            if not raw:
+                break
+            block = np.frombuffer(raw, dtype=dtype).astype(np.float32) - zero
+            block = block.reshape(-1, channels).mean(axis=1) / scale
+            if rate != SAMPLE_RATE:
+                positions = np.arange(0, len(block), rate / SAMPLE_RATE)
+                block = np.interp(positions, np.arange(len(block)), block).astype(np.float32)
+            yield block
+
+
+def _decode_av(path: str) -> Iterator[np.ndarray]:
+    import av
+
+    with av.open(path) as container:
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                yield out.to_ndarray().reshape(-1).astype(np.float32) / 32768
+        for out in resampler.resample(None):
+            yield out.to_ndarray().reshape(-1).astype(np.float32) / 32768
+
+
+def decode_blocks(path: str) -> Iterator[np.ndarray]:
+    """Stream a recording as 16 kHz mono float32 blocks (PyAV for any format, stdlib for WAV)."""
+    try:
+        import av  # noqa: F401 - installed with faster-whisper
+    except ImportError:
+        if not path.lower().endswith(".wav"):
+            raise RuntimeError("Decoding non-WAV audio requires the av package (pip install -r requirements-asr.txt)")
+        return _decode_wav(path)
+    return _decode_av(path)
+
+
+def overlap_samples(chunk_seconds: float, overlap_seconds: float) -> int:
+    """Samples consecutive chunks share: the configured overlap, at most half a chunk."""
+    return min(int(overlap_seconds * SAMPLE_RATE), int(chunk_seconds * SAMPLE_RATE) // 2)
+
+
+def iter_chunks(blocks: Iterator[np.ndarray], chunk_seconds: float, overlap_seconds: float) -> Iterator[tuple]:
+    """(offset seconds, samples) per chunk; consecutive chunks share overlap_samples() of audio."""
+    chunk_size = int(chunk_seconds * SAMPLE_RATE)
+    overlap = overlap_samples(chunk_seconds, overlap_seconds)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0
+    for block in blocks:
+        buffer = np.concatenate((buffer, block))
+        while len(buffer) >= chunk_size:
+            yield offset / SAMPLE_RATE, buffer[:chunk_size]
+            buffer = buffer[chunk_size - overlap:]
+            offset += chunk_size - overlap
+    if len(buffer) > overlap or (offset == 0 and len(buffer)):
+        yield offset / SAMPLE_RATE, buffer
+
+
+async def _transcribe_file(path: str, engine: BaseASREngine) -> dict:
+    chunk_seconds = settings.ASR_CHUNK_SECONDS
+    chunks = iter_chunks(decode_blocks(path), chunk_seconds, settings.ASR_CHUNK_OVERLAP_SECONDS)
+    # Stitched with the overlap the chunks actually have
+    overlap = overlap_samples(chunk_seconds, settings.ASR_CHUNK_OVERLAP_SECONDS) / SAMPLE_RATE
+    # Decoding never runs more than ASR_CONCURRENCY chunks ahead of transcription
+    slots = asyncio.Semaphore(settings.ASR_CONCURRENCY)
+    results = {}
+
+    async def run(index: int, offset: float, samples: np.ndarray):
+        try:
+            started = time.perf_counter()
+            segments = await asyncio.to_thread(engine.transcribe, samples)
+            metrics.ASR_CHUNK_SECONDS.labels(engine.name).observe(time.perf_counter() - started)
+            results[index] = (offset, len(samples) / SAMPLE_RATE, segments)
+        finally:
+            slots.release()
+
+    tasks = []
+    try:
+        while True:
+            await slots.acquire()
+            failed = next((t for t in tasks if t.done() and t.exception()), None)
+            chunk = None if failed else await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                slots.release()
+                break
+            tasks.append(asyncio.create_task(run(len(tasks), *chunk)))
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    # Stitch: each chunk owns the audio up to the middle of its overlaps
+    segments = []
+    last = len(results) - 1
+    duration = 0.0
+    for i in range(len(results)):
+        offset, length, chunk_segments = results[i]
+        duration = offset + length
+        own_start = offset + overlap / 2 if i > 0 else 0
+        own_end = offset + length - overlap / 2 if i < last else float("inf")
+        for segment in chunk_segments:
+            start, end = offset + segment["start"], offset + segment["end"]
+            if not own_start <= (start + end) / 2 < own_end:
+                continue
+            previous = segments[-1] if segments else None
+            if previous and start < previous["end"]:
+                # The same speech cut at a chunk edge and heard again in the next chunk:
+                # keep the longer (less truncated) reading across the combined span
+                if end - start > previous["end"] - previous["start"]:
+                    previous["text"] = segment["text"]
+                previous["end"] = round(max(end, previous["end"]), 2)
+                continue
+            segments.append({
+                "start": round(start, 2),
+                "end": round(end, 2),
+                "timestamp_ref": format_timestamp(start),
+                "text": segment["text"],
+            })
+    return {
+        "engine": engine.name,
+        "model": engine.model,
+        "duration_seconds": round(duration, 2),
+        "chunks": len(results),
+        "segments": segments,
+    }
+
+
+async def transcribe(file_path: str) -> dict:
+    """Timestamped transcript of a stored recording (local path or URL)."""
+    engine = await asyncio.to_thread(get_engine)
+    temp_path = None
+    if is_url(file_path):
+        content = await read_file_content(file_path)
+        fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(file_path)[1] or ".audio")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+    started = time.perf_counter()
+    try:
+        transcript = await _transcribe_file(temp_path or file_path, engine)
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+    print(f"[ASR] {os.path.basename(file_path)}: {transcript['duration_seconds']}s in {transcript['chunks']} chunks, "
+          f"{len(transcript['segments'])} segments ({time.perf_counter() - started:.2f}s, {engine.name})")
+    return transcript
+
+
+def transcript_text(transcript: dict) -> str:
+    return "\n".join(f"[{s['timestamp_ref']}] {s['text']}" for s in transcript["segments"])
@@ -1,5 +1,7 @@
+import os
+import tempfile
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 class BaseAIProvider(ABC):
@@ -8,6 +10,18 @@ class BaseAIProvider(ABC):
     All AI service implementations must inherit from this class.
     """
     
+    # Identifies the provider in stored results
+    name: str = "unknown"
+    
+    def model_name_for(self, operation: str) -> str:
+        """
+        Model used for an operation when no override is passed.
+        
+        Args:
+            operation: "text" or "vision"
+        """
+        return "unknown"
+    
     @abstractmethod
     async def generate_json(self, prompt: str, model_name: Optional[str] = None) -> dict:
         """
@@ -37,6 +51,50 @@ class BaseAIProvider(ABC):
         """
         pass
     
+    def vision_batch_limits(self) -> Tuple[int, int]:
+        """
+        Most images, and most total image bytes, one analyze_images call may carry.
+        Providers without multi-image support keep the default of one image.
+        """
+        return 1, 0
+    
+    async def analyze_images(self, images: List[bytes], prompt: str, model_name: Optional[str] = None) -> dict:
+        """
+        Analyzes several images in one multimodal request.
+        The default makes one analyze_image call per image with the same prompt and
+        merges the answers: "images" entries (or a bare "observations" list) are
+        numbered by the image they came from, other lists are concatenated in order.
+        Providers with real multi-image requests override this.
+        
+        Args:
+            images: JPEG-encoded images, in the order the prompt refers to them
+            prompt: The analysis prompt
+            model_name: Optional vision model name override
+            
+        Returns:
+            dict: Parsed JSON response covering all images
+        """
+        merged: dict = {"images": []}
+        with tempfile.TemporaryDirectory(prefix="analyze-images-") as image_dir:
+            for number, image in enumerate(images, 1):
+                # analyze_image reads from disk
+                image_path = os.path.join(image_dir, f"image-{number}.jpg")
+                with open(image_path, "wb") as f:
+                    f.write(image)
+                result = await self.analyze_image(image_path, prompt, model_name)
+                if "error" in result:
+                    return result
+                entries = result.pop("images", None)
+                if not isinstance(entries, list):
+                    entries = [{"observations": result.pop("observations", [])}]
+                merged["images"].extend({**entry, "image": number} for entry in entries if isinstance(entry, dict))
+                for key, value in result.items():
+                    if isinstance(value, list):
+                        merged.setdefault(key, []).extend(value)
+                    else:
+                        merged.setdefault(key, value)
+        return merged
+    
     async def generate_content(self, prompt: str, model_name: Optional[str] = None) -> str:
         """
         Generates plain text content from a prompt.
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.config import settings
+from app.services.base_provider import BaseAIProvider
+from app.utils import llm_usage
+from app.utils.hashing import sha256_hex
+
+CASSETTE_FORMAT = 1
+
+# Database ids embedded in prompts (synthesis sees each observation's evidence_id);
+# they differ between runs, so they're left out of the cassette key
+_RUN_SPECIFIC_IDS = re.compile(r'("evidence_id"\s*:\s*)\d+')
+
+
+class CassetteProvider(BaseAIProvider):
+    """
+    Records real provider responses to cassette files and replays them offline.
+
+    Each call is keyed by provider, model, operation, prompt and (for vision)
+    the image's content hash, so the same evidence replays under any upload path.
+    Responses are stored exactly as the provider returned them - including
+    parse failures and API errors - together with the call latency and token usage.
+
+    Modes (AI_CASSETTE_MODE):
+        record - call the provider and write a cassette for every call
+        replay - serve cassettes only; a missing cassette is returned as an error
+        auto   - replay when a cassette exists, otherwise call and record
+    """
+
+    def __init__(self, inner: BaseAIProvider, mode: Optional[str] = None, directory: Optional[str] = None):
+        self.inner = inner
+        self.name = inner.name
+        self.mode = (mode or settings.AI_CASSETTE_MODE).lower()
+        self.directory = directory or settings.AI_CASSETTE_DIR
+        if self.mode not in ("record", "replay", "auto"):
+            raise ValueError(f"Unknown cassette mode: '{self.mode}'")
+
+    def __getattr__(self, item):
+        if item == "inner":
+            raise AttributeError(item)
+        return getattr(self.inner, item)
+
+    def model_name_for(self, operation: str) -> str:
+        return self.inner.model_name_for(operation)
+
+    def _key(self, operation: str, model: str, prompt: str, image_path: Optional[str] = None,
+             images: Optional[List[bytes]] = None) -> str:
+        normalized = _RUN_SPECIFIC_IDS.sub(r"\1 0", prompt)
+        parts = {"provider": self.name, "model": model, "operation": operation, "prompt": sha256_hex(normalized)}
+        if images is not None:
+            parts["images"] = [sha256_hex(image) for image in images]
+        if image_path is not None:
+            try:
+                with open(image_path, "rb") as f:
+                    parts["image"] = sha256_hex(f.read())
+            except OSError:
+                parts["image"] = sha256_hex(os.path.basename(image_path))
+        return sha256_hex(json.dumps(parts, sort_keys=True))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, self.name, key[:2], f"{key}.json")
+
+    def _load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[Cassette] Unreadable cassette {key}: {e}")
+            return None
+
+    def _save(self, key: str, cassette: dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent replays never see a half-written file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cassette, f, indent=2)
+        os.replace(tmp_path, path)
+
+    async def _replay(self, key: str, cassette: dict):
+        delay = cassette.get("latency_seconds", 0) * settings.AI_CASSETTE_LATENCY_SCALE
+        if delay > 0:
+            await asyncio.sleep(delay)
+        usage = cassette.get("usage") or {}
+        llm_usage.record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        return cassette["response"]
+
+    async def _call(self, operation: str, model_name: Optional[str], prompt: str, call, image_path: Optional[str] = None,
+                    images: Optional[List[bytes]] = None):
+        model = model_name or self.inner.model_name_for(operation)
+        key = self._key(operation, model, prompt, image_path, images)
+
+        if self.mode != "record":
+            cassette = self._load(key)
+            if cassette is not None:
+                call.close()  # never awaited
+                return await self._replay(key, cassette)
+            if self.mode == "replay":
+                call.close()
+                print(f"[Cassette] No cassette for {self.name}/{model} {operation} call ({key[:12]})")
+                miss = f"No recorded cassette for this {operation} call ({key[:12]})"
+                return miss if operation == "content" else {"error": miss}
+
+        # Capture the token usage the provider reports, whether or not the call is metered
+        usage = llm_usage.current_call.get()
+        token = None
+        if usage is None:
+            usage = llm_usage.CallUsage()
+            token = llm_usage.current_call.set(usage)
+        before = (usage.prompt_tokens, usage.completion_tokens)
+        start = time.perf_counter()
+        try:
+            response = await call
+        finally:
+            if token is not None:
+                llm_usage.current_call.reset(token)
+        elapsed = time.perf_counter() - start
+
+        self._save(key, {
+            "format": CASSETTE_FORMAT,
+            "key": key,
+            "provider": self.name,
+            "model": model,
+            "operation": operation,
+            "image": os.path.basename(image_path) if image_path else None,
+            "images": len(images) if images is not None else None,
+            "prompt": prompt,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "latency_seconds": round(elapsed, 4),
+            "usage": {
+                "prompt_tokens": _delta(usage.prompt_tokens, before[0]),
+                "completion_tokens": _delta(usage.completion_tokens, before[1]),
+            },
+            "response": response,
+        })
+        return response
+
+    async def generate_json(self, prompt, *args, **kwargs) -> dict:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._call("text", model_name, prompt, self.inner.generate_json(prompt, *args, **kwargs))
+
+    async def analyze_image(self, image_path, prompt, *args, **kwargs) -> dict:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._call(
+            "vision", model_name, prompt, self.inner.analyze_image(image_path, prompt, *args, **kwargs), image_path
+        )
+
+    def vision_batch_limits(self):
+        return self.inner.vision_batch_limits()
+
+    async def analyze_images(self, images, prompt, *args, **kwargs) -> dict:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._call(
+            "vision", model_name, prompt, self.inner.analyze_images(images, prompt, *args, **kwargs), images=images
+        )
+
+    async def generate_content(self, prompt, *args, **kwargs) -> str:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._call("content", model_name, prompt, self.inner.generate_content(prompt, *args, **kwargs))
+
+
+def _delta(after: Optional[int], before: Optional[int]) -> Optional[int]:
+    if after is None:
+        return None
+    return after - (before or 0)
@@ -4,9 +4,10 @@ import base64
 from typing import Optional
 from app.config import settings
 from app.services.base_provider import BaseAIProvider
-from PIL import Image
-import io
+from app.utils import metrics, llm_usage
+from app.utils.image_normalize import normalize_image
 import asyncio
+import time
 
 
 class CloudQwenService(BaseAIProvider):
@@ -14,12 +15,20 @@ class CloudQwenService(BaseAIProvider):
     CloudQwen API integration for multimodal AI capabilities.
     Supports both text generation and vision analysis.
     """
+    name = "cloudqwen"
     
     def __init__(self):
         self.api_key = settings.CLOUDQWEN_API_KEY
         self.base_url = settings.CLOUDQWEN_BASE_URL
         self.model = settings.CLOUDQWEN_MODEL
         self.vision_model = settings.CLOUDQWEN_VISION_MODEL
+    
+    def model_name_for(self, operation: str) -> str:
+        return self.vision_model if operation == "vision" else self.model
+    
+    def _record_usage(self, data: dict):
+        usage = data.get("usage") or {}
+        llm_usage.record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
         
     async def generate_json(self, prompt: str, model_name: Optional[str] = None) -> dict:
         """
@@ -57,11 +66,14 @@ class CloudQwenService(BaseAIProvider):
                 async with session.post(url, json=payload, headers=headers) as response:
                     if response.status != 200:
                         error_text = await response.text()
+                        if response.status == 429:
+                            metrics.record_rate_limit(self.name)
                         return {
                             "error": f"CloudQwen API Error: {response.status} - {error_text}"
                         }
                     
                     data = await response.json()
+                    self._record_usage(data)
                     
                     # Extract content from response
                     if "choices" in data and len(data["choices"]) > 0:
@@ -87,14 +99,8 @@ class CloudQwenService(BaseAIProvider):
         """
         Analyzes an image using CloudQwen's multimodal vision model.
         """
-        url = f"{self.base_url}/chat/completions"
         model = model_name or self.vision_model
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         # Read and encode image with compression if needed
         try:
             # CloudQwen has a 10MB limit for base64 images
@@ -109,54 +115,18 @@ class CloudQwenService(BaseAIProvider):
             
             if len(base64_data) > MAX_SIZE_BYTES:
                 print(f"Image too large ({len(base64_data)} bytes), compressing...")
+                compress_started = time.perf_counter()
+                # Base64 inflates by 4/3
+                compressed_bytes = await asyncio.to_thread(
+                    normalize_image, image_bytes, 2048, MAX_SIZE_BYTES * 3 // 4, 80
+                )
+                base64_data = base64.b64encode(compressed_bytes).decode('utf-8')
+                if len(base64_data) > MAX_SIZE_BYTES:
+                    print(f"Warning: Could not compress image below 10MB limit")
+                else:
+                    print(f"Compressed to {len(base64_data)} bytes")
                 
-                # Open with PIL and compress
-                img = Image.open(image_path)
-                
-                # Convert RGBA to RGB if needed
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                    img = background
-                
-                # Resize image to reduce size
-                # Start with 80% quality and reduce dimensions if needed
-                quality = 80
-                max_dimension = 2048
-                
-                while True:
-                    # Resize if larger than max_dimension
-                    if img.width > max_dimension or img.height > max_dimension:
-                        ratio = min(max_dimension / img.width, max_dimension / img.height)
-                        new_size = (int(img.width * ratio), int(img.height * ratio))
-                        resized_img = img.resize(new_size, Image.Resampling.LANCZOS)
-                    else:
-                        resized_img = img
-                    
-                    # Save to bytes with compression
-                    buffer = io.BytesIO()
-                    resized_img.save(buffer, format='JPEG', quality=quality, optimize=True)
-                    compressed_bytes = buffer.getvalue()
-                    
-                    # Check size
-                    base64_data = base64.b64encode(compressed_bytes).decode('utf-8')
-                    
-                    if len(base64_data) <= MAX_SIZE_BYTES:
-                        print(f"Compressed to {len(base64_data)} bytes (quality={quality}, size={resized_img.size})")
-                        break
-                    
-                    # Try reducing quality or dimensions
-                    if quality > 50:
-                        quality -= 10
-                    elif max_dimension > 1024:
-                        max_dimension = int(max_dimension * 0.8)
-                    else:
-                        # If we still can't compress enough, give up
-                        print(f"Warning: Could not compress image below 10MB limit")
-                        break
-                
+                metrics.IMAGE_COMPRESS_SECONDS.labels(self.name).observe(time.perf_counter() - compress_started)
                 image_data = base64_data
             else:
                 image_data = base64_data
@@ -173,6 +143,42 @@ class CloudQwenService(BaseAIProvider):
         
         full_prompt = f"{prompt}\n\nIMPORTANT: Return ONLY valid JSON."
         
+        return await self._vision_chat(model, [
+            {
+                "type": "text",
+                "text": full_prompt
+            },
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{mime_type};base64,{image_data}"
+                }
+            }
+        ])
+    
+    def vision_batch_limits(self):
+        # 10MB per request body, base64 inflates by 4/3
+        return 6, 6 * 1024 * 1024
+    
+    async def analyze_images(self, images, prompt: str, model_name: Optional[str] = None) -> dict:
+        """
+        Analyzes several JPEG images in one request; each is preceded by an "Image N:" label.
+        """
+        content = [{"type": "text", "text": f"{prompt}\n\nIMPORTANT: Return ONLY valid JSON."}]
+        for i, image in enumerate(images, 1):
+            content.append({"type": "text", "text": f"Image {i}:"})
+            content.append({
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{base64.b64encode(image).decode('utf-8')}"}
+            })
+        return await self._vision_chat(model_name or self.vision_model, content)
+    
+    async def _vision_chat(self, model: str, content: list) -> dict:
+        url = f"{self.base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
         payload = {
             "model": model,
             "messages": [
@@ -182,18 +188,7 @@ class CloudQwenService(BaseAIProvider):
                 },
                 {
                     "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": full_prompt
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{image_data}"
-                            }
-                        }
-                    ]
+                    "content": content
                 }
             ],
             "response_format": {"type": "json_object"},
@@ -210,9 +205,12 @@ class CloudQwenService(BaseAIProvider):
                         
                         if response.status != 200:
                             print(f"CloudQwen Vision API Error (attempt {attempt + 1}/{max_retries + 1}): {response.status} - {error_text}")
+                            if response.status == 429:
+                                metrics.record_rate_limit(self.name)
                             
                             # Retry on 401 or 500 errors
                             if response.status in [401, 500, 503] and attempt < max_retries:
+                                metrics.record_retry(self.name, f"http_{response.status}")
                                 await asyncio.sleep(1 * (attempt + 1))  # Exponential backoff
                                 continue
                             
@@ -221,6 +219,7 @@ class CloudQwenService(BaseAIProvider):
                             }
                         
                         data = await response.json()
+                        self._record_usage(data)
                         
                         # Extract content from response
                         if "choices" in data and len(data["choices"]) > 0:
@@ -242,12 +241,14 @@ class CloudQwenService(BaseAIProvider):
             except aiohttp.ClientError as e:
                 print(f"CloudQwen Vision Connection Error (attempt {attempt + 1}/{max_retries + 1}): {str(e)}")
                 if attempt < max_retries:
+                    metrics.record_retry(self.name, "connection")
                     await asyncio.sleep(1 * (attempt + 1))
                     continue
                 return {"error": f"CloudQwen Vision Connection Failed: {str(e)}"}
             except Exception as e:
                 print(f"CloudQwen Vision Unexpected Error (attempt {attempt + 1}/{max_retries + 1}): {str(e)}")
                 if attempt < max_retries:
+                    metrics.record_retry(self.name, "unexpected")
                     await asyncio.sleep(1 * (attempt + 1))
                     continue
         
@@ -284,6 +285,7 @@ class CloudQwenService(BaseAIProvider):
                         return f"CloudQwen Error: {response.status} - {error_text}"
                     
                     data = await response.json()
+                    self._record_usage(data)
                     
                     if "choices" in data and len(data["choices"]) > 0:
                         return data["choices"][0]["message"]["content"]
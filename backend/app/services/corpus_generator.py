@@ -0,0 +1,301 @@
+import asyncio
+import io
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw
+from sqlalchemy import select, delete, insert
+from app import models, schemas
+from app.database import AsyncSessionLocal
+from app.services.analysis_store import NARRATIVE, VISION, SYNTHESIS, insert_analyses
+from app.services.discrepancy_store import insert_discrepancies
+from app.utils import storage
+
+# Description prefix that marks generated cases; purge() only ever deletes these
+SYNTHETIC_MARKER = "[synthetic corpus]"
+
+# Files written (or case directories removed) concurrently per batch
+FILE_WRITE_CONCURRENCY = 32
+
+_SUBJECTS = ["Suspect", "Officer Reyes", "Officer Chen", "The driver", "A witness", "The passenger"]
+_ACTIONS = ["produced", "reached toward", "raised", "dropped", "pointed", "concealed", "handed over"]
+_OBJECTS = ["black firearm", "cell phone", "set of keys", "flashlight", "wallet", "knife", "bag"]
+_PLACES = ["near the vehicle", "by the curb", "at the doorway", "on the sidewalk", "inside the car"]
+_OBSERVATIONS = [
+    ("OBJECT", "Suspect", "Phone", "Black rectangular object held in right hand"),
+    ("OBJECT", "Suspect", "Keys", "Small metallic object, partially obscured"),
+    ("OBJECT", "Officer", "Flashlight", "Handheld light source pointed at subject"),
+    ("ACTION", "Suspect", "Hands raised", "Both palms open at shoulder height"),
+    ("ACTION", "Officer", "Approaching", "Officer moving toward vehicle on foot"),
+    ("ENVIRONMENT", "Scene", "Low light", "Street lighting visible, dark sky"),
+    ("ENVIRONMENT", "Scene", "Vehicle", "Sedan parked at curb, doors closed"),
+    ("PERSON", "Bystander", "Witness", "Person standing on the sidewalk"),
+]
+
+
+@dataclass
+class CorpusSpec:
+    cases: int
+    reports_per_case: int = 1
+    pages: int = 2
+    images_per_case: int = 2
+    image_size: Tuple[int, int] = (1280, 720)
+    templates: int = 16  # Distinct PDFs/images rendered; cases reuse them so rendering stays O(templates)
+    analyses: bool = False  # Pre-fill case_analyses (and discrepancies) with synthetic results
+    versions: Optional[Dict[str, dict]] = None  # Per stage provider/model/prompt_version stamped on the results
+    batch_size: int = 1000
+    days: int = 365  # Spread created_at over this many days back
+    seed: int = 1
+
+
+@dataclass
+class _ReportTemplate:
+    pdf: bytes
+    text: str
+    claims: List[dict]
+
+
+@dataclass
+class _ImageTemplate:
+    jpeg: bytes
+    observations: List[dict]
+
+
+def _render_report(rng: random.Random, pages: int) -> _ReportTemplate:
+    doc = fitz.open()
+    claims, paragraphs = [], []
+    clock = rng.randint(0, 600)
+    for _ in range(pages):
+        sentences = []
+        for _ in range(rng.randint(8, 14)):
+            clock += rng.randint(5, 90)
+            minute, second = divmod(clock, 60)
+            subject, action, obj = rng.choice(_SUBJECTS), rng.choice(_ACTIONS), rng.choice(_OBJECTS)
+            sentence = f"At {minute:02d}:{second:02d} {subject} {action} a {obj} {rng.choice(_PLACES)}."
+            sentences.append(sentence)
+            claims.append({
+                "timestamp_ref": f"{minute:02d}:{second:02d}",
+                "entity": subject,
+                "action": action,
+                "object": obj,
+                "certainty": rng.choice(["EXPLICIT", "IMPLIED"]),
+                "description": sentence,
+            })
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(72, 72, 540, 770), paragraph, fontsize=11)
+    pdf = doc.tobytes()
+    doc.close()
+    return _ReportTemplate(pdf=pdf, text="\n".join(paragraphs), claims=claims)
+
+
+def _render_image(rng: random.Random, size: Tuple[int, int]) -> _ImageTemplate:
+    image = Image.new("RGB", size, tuple(rng.randint(0, 255) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(24):
+        x0, y0 = rng.randint(0, size[0]), rng.randint(0, size[1])
+        x1, y1 = x0 + rng.randint(20, size[0] // 3), y0 + rng.randint(20, size[1] // 3)
+        draw.rectangle((x0, y0, x1, y1), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    observations = []
+    for i, (category, entity, label, details) in enumerate(rng.sample(_OBSERVATIONS, rng.randint(1, 3))):
+        observations.append({
+            "timestamp_ref": f"00:00:{i:02d}",
+            "category": category,
+            "entity": entity,
+            "label": label,
+            "confidence": rng.choice(["LOW", "MEDIUM", "HIGH"]),
+            "details": details,
+        })
+    return _ImageTemplate(jpeg=buffer.getvalue(), observations=observations)
+
+
+def _render_templates(spec: CorpusSpec) -> Tuple[List[_ReportTemplate], List[_ImageTemplate]]:
+    """Blocking: renders the PDF and JPEG pool every generated case draws from."""
+    rng = random.Random(spec.seed)
+    reports = [_render_report(rng, spec.pages) for _ in range(spec.templates)]
+    images = [_render_image(rng, spec.image_size) for _ in range(spec.templates)]
+    # Validate once here rather than per row
+    for template in reports:
+        schemas.NarrativeAnalysisResult(timeline=template.claims)
+    for template in images:
+        schemas.VisionAnalysisResult(observations=template.observations)
+    return reports, images
+
+
+async def _store_files(jobs: List[Tuple[int, str, bytes, str, str]]) -> List[str]:
+    """(case_id, subfolder, content, extension, content type) -> stored paths, in order."""
+    semaphore = asyncio.Semaphore(FILE_WRITE_CONCURRENCY)
+
+    async def store(job):
+        async with semaphore:
+            return await storage.save_bytes(job[2], job[0], job[1], job[3], job[4])
+
+    return await asyncio.gather(*(store(job) for job in jobs))
+
+
+async def _generate_batch(db, spec: CorpusSpec, rng: random.Random, offset: int, count: int,
+                          reports: List[_ReportTemplate], images: List[_ImageTemplate]) -> dict:
+    now = datetime.now(timezone.utc)
+    plan = []
+    for i in range(count):
+        plan.append({
+            "reports": [rng.randrange(len(reports)) for _ in range(spec.reports_per_case)],
+            "images": [rng.randrange(len(images)) for _ in range(spec.images_per_case)],
+        })
+    case_rows = [{
+        "title": f"Synthetic case {offset + i + 1}",
+        "description": f"{SYNTHETIC_MARKER} seed {spec.seed}",
+        "status": "OPEN",
+        "analysis_status": "COMPLETED" if spec.analyses else "PENDING",
+        "is_sample_case": False,
+        "evidence_count": spec.images_per_case,
+        "report_count": spec.reports_per_case,
+        "created_at": now - timedelta(seconds=rng.randint(0, spec.days * 86400)),
+    } for i in range(count)]
+    case_ids = (await db.execute(
+        insert(models.Case).returning(models.Case.id, sort_by_parameter_order=True), case_rows
+    )).scalars().all()
+
+    file_jobs = []
+    for case_id, entry in zip(case_ids, plan):
+        for t in entry["reports"]:
+            file_jobs.append((case_id, "reports", reports[t].pdf, ".pdf", "application/pdf"))
+        for t in entry["images"]:
+            file_jobs.append((case_id, "evidence", images[t].jpeg, ".jpg", "image/jpeg"))
+    paths = iter(await _store_files(file_jobs))
+
+    report_rows, evidence_rows = [], []
+    for case_id, entry in zip(case_ids, plan):
+        for t in entry["reports"]:
+            report_rows.append({"case_id": case_id, "file_path": next(paths), "narrative_text": reports[t].text})
+        for t in entry["images"]:
+            evidence_rows.append({"case_id": case_id, "file_path": next(paths), "type": models.EvidenceType.IMAGE})
+    if report_rows:
+        await db.execute(insert(models.Report), report_rows)
+    evidence_ids = []
+    if evidence_rows:
+        evidence_ids = (await db.execute(
+            insert(models.Evidence).returning(models.Evidence.id, sort_by_parameter_order=True), evidence_rows
+        )).scalars().all()
+
+    analyses = discrepancies = 0
+    if spec.analyses:
+        analysis_rows, discrepancy_items = [], []
+        evidence_iter = iter(evidence_ids)
+        for case_id, entry in zip(case_ids, plan):
+            claims = [claim for t in entry["reports"] for claim in reports[t].claims]
+            observations = []
+            for index, t in enumerate(entry["images"]):
+                evidence_id = next(evidence_iter)
+                observations += [
+                    {**obs, "evidence_id": evidence_id, "evidence_index": index + 1} for obs in images[t].observations
+                ]
+            flagged = []
+            if observations:
+                for claim in rng.sample(claims, min(len(claims), rng.randint(0, 3))):
+                    observation = rng.choice(observations)
+                    flagged.append({
+                        "timestamp_ref": claim["timestamp_ref"],
+                        "clean_claim": claim["description"],
+                        "visual_fact": f"{observation['entity']}: {observation['label']}",
+                        "description": "Visual evidence does not support the claim.",
+                        "status": "FLAGGED",
+                    })
+            for stage, result in ((NARRATIVE, {"timeline": claims}),
+                                  (VISION, {"observations": observations}),
+                                  (SYNTHESIS, {"discrepancies": flagged})):
+                analysis_rows.append({"case_id": case_id, "stage": stage, "result": result, **(spec.versions or {}).get(stage, {})})
+            discrepancy_items += [(case_id, item) for item in flagged]
+        await insert_analyses(db, analysis_rows)
+        discrepancies = await insert_discrepancies(db, discrepancy_items)
+        analyses = len(analysis_rows)
+
+    await db.commit()
+    return {
+        "cases": len(case_ids),
+        "reports": len(report_rows),
+        "evidence": len(evidence_rows),
+        "analyses": analyses,
+        "discrepancies": discrepancies,
+    }
+
+
+async def generate(spec: CorpusSpec) -> dict:
+    """
+    Create spec.cases synthetic cases with stored files, in batches of
+    spec.batch_size cases per transaction. Child counts are written with the
+    case rows, so listings are consistent as soon as each batch commits.
+    Returns: Totals of rows created plus elapsed seconds.
+    """
+    started = time.perf_counter()
+    reports, images = await asyncio.to_thread(_render_templates, spec)
+    print(f"[Corpus] Rendered {len(reports)} report and {len(images)} image templates "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(spec.seed)
+    totals = {"cases": 0, "reports": 0, "evidence": 0, "analyses": 0, "discrepancies": 0}
+    async with AsyncSessionLocal() as db:
+        for offset in range(0, spec.cases, spec.batch_size):
+            count = min(spec.batch_size, spec.cases - offset)
+            batch = await _generate_batch(db, spec, rng, offset, count, reports, images)
+            for key, value in batch.items():
+                totals[key] += value
+            elapsed = time.perf_counter() - started
+            print(f"[Corpus] {totals['cases']}/{spec.cases} cases ({totals['cases'] / elapsed:.0f} cases/s)")
+    totals["seconds"] = round(time.perf_counter() - started, 1)
+    return totals
+
+
+async def purge(batch_size: int = 1000) -> dict:
+    """Delete every generated case (matched by SYNTHETIC_MARKER), its rows and its stored files."""
+    started = time.perf_counter()
+    deleted = 0
+    freed = 0
+    last_id = 0
+    semaphore = asyncio.Semaphore(FILE_WRITE_CONCURRENCY)
+
+    async def delete_files(case_id: int, paths: List[str]) -> int:
+        async with semaphore:
+            return await storage.delete_case_files(case_id, paths)
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            case_ids = (await db.execute(
+                select(models.Case.id)
+                .where(
+                    models.Case.id > last_id,
+                    models.Case.description.startswith(SYNTHETIC_MARKER),
+                    models.Case.is_sample_case.is_(False),
+                )
+                .order_by(models.Case.id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not case_ids:
+                break
+            last_id = case_ids[-1]
+            await db.execute(delete(models.Discrepancy).where(models.Discrepancy.case_id.in_(case_ids)))
+            await db.execute(delete(models.CaseAnalysis).where(models.CaseAnalysis.case_id.in_(case_ids)))
+            evidence = await db.execute(
+                delete(models.Evidence).where(models.Evidence.case_id.in_(case_ids))
+                .returning(models.Evidence.case_id, models.Evidence.file_path)
+            )
+            reports = await db.execute(
+                delete(models.Report).where(models.Report.case_id.in_(case_ids))
+                .returning(models.Report.case_id, models.Report.file_path)
+            )
+            paths: Dict[int, List[str]] = {}
+            for case_id, path in list(evidence.all()) + list(reports.all()):
+                paths.setdefault(case_id, []).append(path)
+            await db.execute(delete(models.Case).where(models.Case.id.in_(case_ids)))
+            await db.commit()
+
+            freed += sum(await asyncio.gather(*(delete_files(c, paths.get(c, [])) for c in case_ids)))
+            deleted += len(case_ids)
+            print(f"[Corpus] Purged {deleted} cases")
+    return {"cases": deleted, "bytes_freed": freed, "seconds": round(time.perf_counter() - started, 1)}
@@ -0,0 +1,68 @@
+from typing import Iterable, List, Tuple
+from sqlalchemy import delete, insert, select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+
+# Rows per INSERT statement; keeps bind parameters well under the Postgres limit
+INSERT_CHUNK_SIZE = 1000
+
+
+def _to_row(case_id: int, item: dict) -> dict:
+    """Map one validated synthesis discrepancy onto discrepancies columns."""
+    status = item.get("status") or models.DiscrepancyStatus.FLAGGED.value
+    if status not in models.DiscrepancyStatus.__members__:
+        status = models.DiscrepancyStatus.FLAGGED.value
+    return {
+        "case_id": case_id,
+        "evidence_id": item.get("evidence_id"),
+        "report_id": item.get("report_id"),
+        "timestamp_ref": item.get("timestamp_ref"),
+        "clean_claim": item.get("clean_claim") or "",
+        "visual_fact": item.get("visual_fact") or "",
+        "description": item.get("description"),
+        "status": models.DiscrepancyStatus(status),
+        "fingerprint": item.get("fingerprint"),
+    }
+
+
+async def merge_discrepancies(db: AsyncSession, case_id: int, discrepancies: List[dict]) -> Tuple[int, int]:
+    """
+    Bring a case's discrepancy rows in line with a synthesis result by fingerprint:
+    rows the result no longer contains (or without a fingerprint) are deleted and
+    rows for new fingerprints inserted. Rows that carry over keep their id and
+    triage status. Does not commit.
+    Returns: (rows inserted, rows deleted).
+    """
+    wanted = {}
+    for item in discrepancies:
+        wanted.setdefault(item.get("fingerprint"), item)
+    wanted.pop(None, None)
+    
+    deleted = await db.execute(
+        delete(models.Discrepancy)
+        .where(
+            models.Discrepancy.case_id == case_id,
+            or_(models.Discrepancy.fingerprint.is_(None), models.Discrepancy.fingerprint.notin_(list(wanted))),
+        )
+        .returning(models.Discrepancy.id)
+    )
+    removed = len(deleted.all())
+    existing = set((await db.execute(
+        select(models.Discrepancy.fingerprint).where(models.Discrepancy.case_id == case_id)
+    )).scalars())
+    
+    added = [item for fingerprint, item in wanted.items() if fingerprint not in existing]
+    return await insert_discrepancies(db, ((case_id, item) for item in added)), removed
+
+
+async def insert_discrepancies(db: AsyncSession, items: Iterable[Tuple[int, dict]]) -> int:
+    """
+    Append (case_id, discrepancy dict) pairs, possibly spanning many cases,
+    with multi-row INSERTs. Does not commit.
+    Returns: Number of rows inserted.
+    """
+    rows = [_to_row(case_id, item) for case_id, item in items]
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        await db.execute(insert(models.Discrepancy).values(rows[start:start + INSERT_CHUNK_SIZE]))
+    
+    return len(rows)
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import random
+import re
+from typing import List, Optional
+from app.config import settings
+from app.services.base_provider import BaseAIProvider
+from app.utils import metrics, llm_usage
+from app.utils.hashing import sha256_hex
+
+# Vocabulary for canned vision observations: (category, entity, label, details)
+_OBSERVATION_CATALOG = [
+    ("OBJECT", "Suspect", "Phone", "Black rectangular object held in right hand"),
+    ("OBJECT", "Suspect", "Keys", "Small metallic object, partially obscured"),
+    ("OBJECT", "Officer", "Flashlight", "Handheld light source pointed at subject"),
+    ("ACTION", "Suspect", "Hands raised", "Both palms open at shoulder height"),
+    ("ACTION", "Officer", "Approaching", "Officer moving toward vehicle on foot"),
+    ("ENVIRONMENT", "Scene", "Low light", "Street lighting visible, dark sky"),
+    ("ENVIRONMENT", "Scene", "Vehicle", "Sedan parked at curb, doors closed"),
+    ("PERSON", "Bystander", "Witness", "Person standing on the sidewalk"),
+]
+_ACTIONS = ["produced", "reached for", "approached", "held", "dropped", "fled with", "displayed"]
+_CONFIDENCE = ["LOW", "MEDIUM", "HIGH"]
+_TIMESTAMP = re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\b")
+
+_rng: Optional[random.Random] = None
+
+
+def reset_rng(seed: Optional[int] = None) -> None:
+    """Restart the latency/failure sequence, e.g. between benchmark runs."""
+    global _rng
+    _rng = random.Random(settings.FAKE_SEED if seed is None else seed)
+
+
+def _random() -> random.Random:
+    if _rng is None:
+        reset_rng()
+    return _rng
+
+
+def _pick(key: str, options: list, salt: str = ""):
+    """Deterministic choice - the same input always gets the same output."""
+    return options[int(sha256_hex(f"{key}|{salt}")[:8], 16) % len(options)]
+
+
+def _extract_json_after(prompt: str, marker: str) -> Optional[dict]:
+    start = prompt.find(marker)
+    if start == -1:
+        return None
+    brace = prompt.find("{", start)
+    if brace == -1:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(prompt, brace)
+        return value
+    except json.JSONDecodeError:
+        return None
+
+
+class FakeService(BaseAIProvider):
+    """
+    Offline provider for benchmarks and demos. Returns schema-valid results
+    derived from the prompt (the same input always yields the same output),
+    after a simulated latency, with optional injected failures and 429s.
+    Configure with the FAKE_* settings.
+    """
+    name = "fake"
+
+    def model_name_for(self, operation: str) -> str:
+        return "fake-vision" if operation == "vision" else "fake-text"
+
+    def _latency_seconds(self) -> float:
+        rng = _random()
+        base = settings.FAKE_LATENCY_MS
+        spread = settings.FAKE_LATENCY_SPREAD
+        distribution = settings.FAKE_LATENCY_DISTRIBUTION
+        if distribution == "uniform":
+            ms = rng.uniform(base * (1 - spread), base * (1 + spread))
+        elif distribution == "normal":
+            ms = rng.gauss(base, base * spread)
+        elif distribution == "lognormal":
+            ms = base * rng.lognormvariate(0, spread)  # base is the median; long right tail
+        else:
+            ms = base
+        return max(ms, 0) / 1000
+
+    async def _simulate(self, prompt: str) -> Optional[dict]:
+        """Sleep for the simulated latency, then maybe return an injected failure."""
+        await asyncio.sleep(self._latency_seconds())
+        roll = _random().random()
+        if roll < settings.FAKE_RATE_LIMIT_RATE:
+            metrics.record_rate_limit(self.name)
+            return {"error": "429 Fake provider quota exceeded (ResourceExhausted)"}
+        roll -= settings.FAKE_RATE_LIMIT_RATE
+        if roll < settings.FAKE_FAILURE_RATE:
+            return {"error": "Fake provider injected failure"}
+        roll -= settings.FAKE_FAILURE_RATE
+        if roll < settings.FAKE_INVALID_JSON_RATE:
+            return {"error": "Failed to parse JSON from Fake provider", "raw": "{not json"}
+        return None
+
+    def _respond(self, prompt: str, result: dict) -> dict:
+        # Roughly 4 characters per token, so the ledger has something to count
+        llm_usage.record_usage(len(prompt) // 4, len(json.dumps(result)) // 4)
+        return result
+
+    def _narrative(self, prompt: str, variant: str = "") -> dict:
+        text = re.split(r"REPORT TEXT:|TRANSCRIPT:", prompt, 1)[-1]
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.strip()) > 12]
+        timeline = []
+        for sentence in sentences[:settings.FAKE_MAX_ITEMS]:
+            words = re.findall(r"[A-Za-z][A-Za-z'-]+", sentence)
+            capitalized = [w for w in words if w[0].isupper()]
+            timestamp = _TIMESTAMP.search(sentence)
+            timeline.append({
+                "timestamp_ref": timestamp.group(0) if timestamp else None,
+                "entity": capitalized[0] if capitalized else "Subject",
+                "action": _pick(sentence, _ACTIONS, variant),
+                "object": words[-1].lower() if words else None,
+                "certainty": _pick(sentence, ["EXPLICIT", "IMPLIED"], f"{variant}certainty"),
+                "description": sentence[:240],
+            })
+        return {"timeline": timeline}
+
+    def _synthesis(self, prompt: str) -> dict:
+        narrative = _extract_json_after(prompt, "Narrative Claims") or {}
+        vision = _extract_json_after(prompt, "Visual Observations") or {}
+        claims: List[dict] = narrative.get("timeline", [])
+        observations: List[dict] = vision.get("observations", [])
+        discrepancies = []
+        if not observations:
+            return {"discrepancies": discrepancies}
+        for claim in claims:
+            description = claim.get("description", "")
+            # Flag roughly a third of the claims, deterministically
+            # Only observations inside the claim's capture-time window, when the prompt lists them
+            candidates = observations
+            if claim.get("compare_with") is not None:
+                candidates = [obs for obs in observations if obs.get("ref") in claim["compare_with"]]
+            if candidates and _pick(description, [True, False, False], "flag"):
+                observation = _pick(description, candidates, "match")
+                discrepancies.append({
+                    "timestamp_ref": claim.get("timestamp_ref"),
+                    "clean_claim": description,
+                    "visual_fact": f"{observation.get('entity')}: {observation.get('label')}",
+                    "description": "Visual evidence does not support the claim.",
+                    "status": "FLAGGED",
+                    "claim_ref": claim.get("ref"),
+                    "evidence_refs": [observation["ref"]] if observation.get("ref") else [],
+                })
+        return {"discrepancies": discrepancies[:settings.FAKE_MAX_ITEMS]}
+
+    def _consolidation(self, prompt: str) -> dict:
+        findings = (_extract_json_after(prompt, "FINDINGS:") or {}).get("findings", [])
+        groups = {}
+        for finding in findings:
+            groups.setdefault((finding.get("claim"), finding.get("visual_fact")), []).append(finding.get("id"))
+        return {"duplicates": [ids for ids in groups.values() if len(ids) > 1]}
+
+    async def generate_json(self, prompt: str, model_name: Optional[str] = None) -> dict:
+        failure = await self._simulate(prompt)
+        if failure:
+            return failure
+        if '"duplicates"' in prompt:
+            return self._respond(prompt, self._consolidation(prompt))
+        if '"discrepancies"' in prompt:
+            return self._respond(prompt, self._synthesis(prompt))
+        if '"timeline"' in prompt:
+            return self._respond(prompt, self._narrative(prompt, model_name or ""))
+        return self._respond(prompt, {"result": _pick(prompt, ["ok", "done", "complete"])})
+
+    async def analyze_image(self, image_path: str, prompt: str, model_name: Optional[str] = None) -> dict:
+        failure = await self._simulate(prompt)
+        if failure:
+            return failure
+        # Key on the image content so the same picture gets the same observations under any path
+        try:
+            with open(image_path, "rb") as f:
+                image_key = sha256_hex(f.read())
+        except OSError:
+            image_key = image_path
+        return self._respond(prompt, {"observations": self._observations(image_key, model_name)})
+
+    def vision_batch_limits(self):
+        return 8, 16 * 1024 * 1024
+
+    async def analyze_images(self, images: List[bytes], prompt: str, model_name: Optional[str] = None) -> dict:
+        # One simulated round trip for the whole batch
+        failure = await self._simulate(prompt)
+        if failure:
+            return failure
+        per_image = [
+            {"image": i, "observations": self._observations(sha256_hex(image), model_name)}
+            for i, image in enumerate(images, 1)
+        ]
+        if '"discrepancies"' in prompt:
+            return self._respond(prompt, self._fused(prompt, per_image, model_name or ""))
+        return self._respond(prompt, {"images": per_image})
+
+    def _fused(self, prompt: str, per_image: List[dict], variant: str) -> dict:
+        # Claims from the report text, then the same deterministic flagging as _synthesis
+        timeline = self._narrative(prompt, variant)["timeline"]
+        observations = [obs for entry in per_image for obs in entry["observations"]]
+        discrepancies = []
+        for n, claim in enumerate(timeline, 1):
+            claim["report"] = 1
+            description = claim["description"]
+            if observations and _pick(description, [True, False, False], "flag"):
+                k = _pick(description, list(range(1, len(observations) + 1)), "match")
+                observation = observations[k - 1]
+                discrepancies.append({
+                    "timestamp_ref": claim.get("timestamp_ref"),
+                    "clean_claim": description,
+                    "visual_fact": f"{observation.get('entity')}: {observation.get('label')}",
+                    "description": "Visual evidence does not support the claim.",
+                    "status": "FLAGGED",
+                    "claim_ref": f"C{n}",
+                    "evidence_refs": [f"O{k}"],
+                })
+        return {"timeline": timeline, "images": per_image, "discrepancies": discrepancies[:settings.FAKE_MAX_ITEMS]}
+
+    def _observations(self, image_key: str, model_name: Optional[str]) -> List[dict]:
+        # A non-default model name acts as a variant with different (but still deterministic) picks
+        image_key = f"{model_name}|{image_key}" if model_name else image_key
+        count = 1 + int(sha256_hex(image_key)[:2], 16) % min(3, settings.FAKE_MAX_ITEMS)
+        observations = []
+        for i in range(count):
+            category, entity, label, details = _pick(image_key, _OBSERVATION_CATALOG, str(i))
+            observations.append({
+                "timestamp_ref": f"00:00:{i:02d}",
+                "category": category,
+                "entity": entity,
+                "label": label,
+                "confidence": _pick(image_key, _CONFIDENCE, f"confidence{i}"),
+                "details": details,
+            })
+        return observations
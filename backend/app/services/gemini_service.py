@@ -1,6 +1,7 @@
 import google.generativeai as genai
 from app.config import settings
 from app.services.base_provider import BaseAIProvider
+from app.utils import metrics, llm_usage
 from typing import Optional
 import json
 import asyncio
@@ -11,6 +12,9 @@ from google.api_core.exceptions import ResourceExhausted
 
 
 class GeminiService(BaseAIProvider):
+    name = "gemini"
+    DEFAULT_MODEL = "gemini-3.0-flash"
+
     # Class-level rate limiting (shared across all instances)
     _last_request_time: float = 0.0
     _rate_limit_lock: Optional[asyncio.Lock] = None
@@ -40,6 +44,17 @@ class GeminiService(BaseAIProvider):
             }
         ]
 
+    def model_name_for(self, operation: str) -> str:
+        return self.DEFAULT_MODEL
+
+    def _record_usage(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            llm_usage.record_usage(
+                getattr(usage, "prompt_token_count", None),
+                getattr(usage, "candidates_token_count", None),
+            )
+
     def _get_lock(self) -> asyncio.Lock:
         """Get or create the rate limit lock for the current event loop (thread-safe)."""
         # Check if we need to recreate the lock for a new event loop
@@ -89,8 +104,10 @@ class GeminiService(BaseAIProvider):
             try:
                 return await func(*args, **kwargs)
             except ResourceExhausted as e:
+                metrics.record_rate_limit(self.name)
                 if attempt == retries - 1:
                     raise e
+                metrics.record_retry(self.name, "rate_limited")
                 
                 wait_time = 40 * (attempt + 1)  # Exponential backoff: 40s, 80s, 120s
                 print(f"Quota exceeded. Retrying in {wait_time}s... (Attempt {attempt + 1}/{retries})")
@@ -114,6 +131,7 @@ class GeminiService(BaseAIProvider):
             prompt,
             safety_settings=self.safety_settings
         )
+        self._record_usage(response)
         
         return response.text
 
@@ -133,6 +151,7 @@ class GeminiService(BaseAIProvider):
             prompt,
             safety_settings=self.safety_settings
         )
+        self._record_usage(response)
         
         try:
             return json.loads(response.text)
@@ -181,6 +200,7 @@ class GeminiService(BaseAIProvider):
                 [prompt, cookie_picture],
                 safety_settings=self.safety_settings
             )
+            self._record_usage(response)
             
             try:
                 return json.loads(response.text)
@@ -190,4 +210,39 @@ class GeminiService(BaseAIProvider):
         except FileNotFoundError:
             return {"error": f"Image file not found: {image_path}"}
         except Exception as e:
-            return {"error": f"Failed to read image: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Failed to read image: {str(e)}"}
+
+    def vision_batch_limits(self):
+        # Inline data is capped at 20MB per request; leave room for the prompt
+        return 8, 15 * 1024 * 1024
+
+    async def analyze_images(self, images, prompt: str, model_name: Optional[str] = "gemini-3.0-flash") -> dict:
+        """
+        Analyzes several JPEG images in one request (one rate-limit slot);
+        each is preceded by an "Image N:" label.
+        """
+        await self._wait_for_rate_limit()
+        
+        model = genai.GenerativeModel(
+            model_name,
+            generation_config={"response_mime_type": "application/json"}
+        )
+        parts = [prompt]
+        for i, image in enumerate(images, 1):
+            parts.append(f"Image {i}:")
+            parts.append({'mime_type': 'image/jpeg', 'data': image})
+        
+        try:
+            response = await self._retry_async(
+                model.generate_content_async,
+                parts,
+                safety_settings=self.safety_settings
+            )
+            self._record_usage(response)
+            
+            try:
+                return json.loads(response.text)
+            except json.JSONDecodeError:
+                return {"error": "Failed to parse JSON", "raw": response.text}
+        except Exception as e:
+            return {"error": f"Gemini multi-image request failed: {str(e)}"}
@@ -0,0 +1,226 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import select, insert, func, case as sql_case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app import models
+
+LEDGER_QUEUE_SIZE = 10000  # Records beyond this are dropped rather than slowing requests down
+LEDGER_BATCH_SIZE = 200
+LEDGER_FLUSH_SECONDS = 2.0
+
+_queue: Optional[asyncio.Queue] = None
+
+
+def record_call(entry: dict) -> None:
+    """
+    Queue one llm_calls row for the background writer. Never blocks and never
+    raises; a no-op when the writer isn't running (CLI, scripts).
+    """
+    if _queue is None:
+        return
+    try:
+        _queue.put_nowait(entry)
+    except asyncio.QueueFull:
+        print("[LLM Ledger] Queue full, dropping call record")
+
+
+async def _write(batch: List[dict]) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(insert(models.LLMCall).values(batch))
+                await db.commit()
+            except IntegrityError:
+                # A case was deleted while its calls were queued - keep the rows, drop the link
+                await db.rollback()
+                case_ids = {entry["case_id"] for entry in batch if entry.get("case_id") is not None}
+                existing = set((await db.execute(
+                    select(models.Case.id).where(models.Case.id.in_(case_ids))
+                )).scalars().all())
+                for entry in batch:
+                    if entry.get("case_id") not in existing:
+                        entry["case_id"] = None
+                await db.execute(insert(models.LLMCall).values(batch))
+                await db.commit()
+    except Exception as e:
+        print(f"[LLM Ledger] Failed to write {len(batch)} call records: {e}")
+
+
+async def ledger_worker() -> None:
+    """Drain queued call records into llm_calls in multi-row inserts until cancelled."""
+    global _queue
+    _queue = asyncio.Queue(maxsize=LEDGER_QUEUE_SIZE)
+    loop = asyncio.get_running_loop()
+    batch: List[dict] = []
+    try:
+        while True:
+            batch.append(await _queue.get())
+            deadline = loop.time() + LEDGER_FLUSH_SECONDS
+            while len(batch) < LEDGER_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await _write(batch)
+            batch = []
+    finally:
+        # Shutdown: flush whatever is still queued
+        queue, _queue = _queue, None
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch:
+            await _write(batch)
+
+
+def _price_for(provider: str, model: Optional[str]) -> Optional[dict]:
+    """LLM_PRICING entry for "provider/model", falling back to "model" then "provider"."""
+    pricing = settings.LLM_PRICING
+    for key in (f"{provider}/{model}", model, provider):
+        if key and key in pricing:
+            return pricing[key]
+    return None
+
+
+def _cost(provider: str, model: Optional[str], prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    price = _price_for(provider, model)
+    if price is None:
+        return None
+    return round(
+        (prompt_tokens * price.get("prompt", 0) + completion_tokens * price.get("completion", 0)) / 1_000_000, 6
+    )
+
+
+async def cost_by_case(
+    db: AsyncSession,
+    case_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    limit: int = 50,
+) -> List[dict]:
+    """
+    Token spend per case, broken down by stage, provider, model and prompt version,
+    heaviest cases first. Costs use LLM_PRICING (USD per 1M tokens); None if unpriced.
+    """
+    filters = [models.LLMCall.case_id.isnot(None)]
+    if case_id is not None:
+        filters.append(models.LLMCall.case_id == case_id)
+    if since is not None:
+        filters.append(models.LLMCall.created_at >= since)
+
+    prompt_sum = func.coalesce(func.sum(models.LLMCall.prompt_tokens), 0)
+    completion_sum = func.coalesce(func.sum(models.LLMCall.completion_tokens), 0)
+
+    top_cases = (
+        select(models.LLMCall.case_id)
+        .where(*filters)
+        .group_by(models.LLMCall.case_id)
+        .order_by((prompt_sum + completion_sum).desc())
+        .limit(limit)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            models.LLMCall.case_id,
+            models.LLMCall.stage,
+            models.LLMCall.provider,
+            models.LLMCall.model,
+            models.LLMCall.prompt_version,
+            func.count().label("calls"),
+            prompt_sum.label("prompt_tokens"),
+            completion_sum.label("completion_tokens"),
+            func.sum(models.LLMCall.latency_seconds).label("latency_seconds"),
+        )
+        .where(*filters, models.LLMCall.case_id.in_(select(top_cases.c.case_id)))
+        .group_by(
+            models.LLMCall.case_id,
+            models.LLMCall.stage,
+            models.LLMCall.provider,
+            models.LLMCall.model,
+            models.LLMCall.prompt_version,
+        )
+    )
+
+    cases: Dict[int, dict] = {}
+    for row in result.all():
+        entry = cases.setdefault(row.case_id, {
+            "case_id": row.case_id,
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost_usd": 0.0,
+            "breakdown": [],
+        })
+        cost = _cost(row.provider, row.model, row.prompt_tokens, row.completion_tokens)
+        entry["calls"] += row.calls
+        entry["prompt_tokens"] += row.prompt_tokens
+        entry["completion_tokens"] += row.completion_tokens
+        if cost is None:
+            entry["cost_usd"] = None
+        elif entry["cost_usd"] is not None:
+            entry["cost_usd"] = round(entry["cost_usd"] + cost, 6)
+        entry["breakdown"].append({
+            "stage": row.stage,
+            "provider": row.provider,
+            "model": row.model,
+            "prompt_version": row.prompt_version,
+            "calls": row.calls,
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "avg_tokens_per_call": round((row.prompt_tokens + row.completion_tokens) / row.calls, 1),
+            "latency_seconds": round(row.latency_seconds, 3),
+            "cost_usd": cost,
+        })
+
+    return sorted(cases.values(), key=lambda c: c["prompt_tokens"] + c["completion_tokens"], reverse=True)
+
+
+async def provider_throughput(
+    db: AsyncSession,
+    since: Optional[datetime] = None,
+    bucket: str = "hour",
+) -> List[dict]:
+    """Calls, tokens, error rate and latency percentiles per provider/model per time bucket."""
+    period = func.date_trunc(bucket, models.LLMCall.created_at).label("period")
+    query = select(
+        period,
+        models.LLMCall.provider,
+        models.LLMCall.model,
+        func.count().label("calls"),
+        func.sum(sql_case((models.LLMCall.outcome != "ok", 1), else_=0)).label("failures"),
+        func.sum(models.LLMCall.retries).label("retries"),
+        func.coalesce(func.sum(models.LLMCall.prompt_tokens), 0).label("prompt_tokens"),
+        func.coalesce(func.sum(models.LLMCall.completion_tokens), 0).label("completion_tokens"),
+        func.avg(models.LLMCall.latency_seconds).label("avg_latency_seconds"),
+        func.percentile_cont(0.95).within_group(models.LLMCall.latency_seconds).label("p95_latency_seconds"),
+    )
+    if since is not None:
+        query = query.where(models.LLMCall.created_at >= since)
+    result = await db.execute(
+        query.group_by(period, models.LLMCall.provider, models.LLMCall.model)
+        .order_by(period.desc(), models.LLMCall.provider, models.LLMCall.model)
+    )
+
+    rows = []
+    for row in result.all():
+        busy = row.avg_latency_seconds * row.calls if row.avg_latency_seconds else 0
+        rows.append({
+            "period": row.period,
+            "provider": row.provider,
+            "model": row.model,
+            "calls": row.calls,
+            "failures": row.failures,
+            "retries": row.retries,
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "avg_latency_seconds": round(row.avg_latency_seconds or 0, 3),
+            "p95_latency_seconds": round(row.p95_latency_seconds or 0, 3),
+            # Output tokens per second of model time - a rough capacity number
+            "completion_tokens_per_second": round(row.completion_tokens / busy, 1) if busy else None,
+        })
+    return rows
@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timezone
+from app.config import settings
+from app.services import llm_ledger
+from app.services.base_provider import BaseAIProvider
+from app.utils import metrics, llm_usage
+
+
+class MeteredProvider(BaseAIProvider):
+    """
+    Wraps any provider to record call latency, in-flight calls and failure
+    outcomes by provider, model and operation, and to log each call (with the
+    token usage the provider reports) to the llm_calls ledger. Arguments are
+    passed through untouched so each provider's own model defaults still apply.
+    """
+
+    def __init__(self, inner: BaseAIProvider):
+        self.inner = inner
+        self.name = inner.name
+
+    def __getattr__(self, item):
+        # Provider-specific helpers (e.g. _extract_json_from_text)
+        if item == "inner":
+            raise AttributeError(item)
+        return getattr(self.inner, item)
+
+    def model_name_for(self, operation: str) -> str:
+        return self.inner.model_name_for(operation)
+
+    async def _metered(self, operation: str, model_name, call):
+        model = model_name or self.inner.model_name_for(operation)
+        in_flight = metrics.PROVIDER_IN_FLIGHT.labels(self.name, operation)
+        outcome = "exception"
+        usage = llm_usage.CallUsage()
+        usage_token = llm_usage.current_call.set(usage)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            result = await call
+            outcome = metrics.error_outcome(result) or "ok"
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            llm_usage.current_call.reset(usage_token)
+            in_flight.dec()
+            metrics.PROVIDER_CALL_SECONDS.labels(self.name, model, operation, outcome).observe(elapsed)
+            if outcome == "invalid_json":
+                metrics.PROVIDER_JSON_PARSE_FAILURES.labels(self.name, operation).inc()
+            if settings.LLM_LEDGER_ENABLED:
+                scope = llm_usage.current_scope.get()
+                llm_ledger.record_call({
+                    "case_id": scope.get("case_id"),
+                    "stage": scope.get("stage"),
+                    "prompt_version": scope.get("prompt_version"),
+                    "provider": self.name,
+                    "model": model,
+                    "operation": operation,
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "latency_seconds": elapsed,
+                    "retries": usage.retries,
+                    "outcome": outcome,
+                    "created_at": datetime.now(timezone.utc),
+                })
+
+    async def generate_json(self, prompt, *args, **kwargs) -> dict:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._metered("text", model_name, self.inner.generate_json(prompt, *args, **kwargs))
+
+    async def analyze_image(self, image_path, prompt, *args, **kwargs) -> dict:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._metered("vision", model_name, self.inner.analyze_image(image_path, prompt, *args, **kwargs))
+
+    def vision_batch_limits(self):
+        return self.inner.vision_batch_limits()
+
+    async def analyze_images(self, images, prompt, *args, **kwargs) -> dict:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._metered("vision", model_name, self.inner.analyze_images(images, prompt, *args, **kwargs))
+
+    async def generate_content(self, prompt, *args, **kwargs) -> str:
+        model_name = kwargs.get("model_name", args[0] if args else None)
+        return await self._metered("text", model_name, self.inner.generate_content(prompt, *args, **kwargs))
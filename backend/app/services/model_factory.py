@@ -47,7 +47,17 @@ def get_provider(provider_name: Optional[str] = None) -> BaseAIProvider:
         )
     
     provider_class = _PROVIDER_REGISTRY[name]
-    return provider_class()
+    provider = provider_class()
+    
+    if settings.AI_CASSETTE_MODE.lower() != "off":
+        from app.services.cassette_provider import CassetteProvider
+        provider = CassetteProvider(provider)
+    
+    if settings.METRICS_ENABLED or settings.LLM_LEDGER_ENABLED:
+        from app.services.metered_provider import MeteredProvider
+        provider = MeteredProvider(provider)
+    
+    return provider
 
 
 def _initialize_providers():
@@ -58,10 +68,12 @@ def _initialize_providers():
     from app.services.gemini_service import GeminiService
     from app.services.ollama_service import OllamaService
     from app.services.cloudqwen_service import CloudQwenService
+    from app.services.fake_service import FakeService
     
     register_provider("gemini", GeminiService)
     register_provider("ollama", OllamaService)
     register_provider("cloudqwen", CloudQwenService)
+    register_provider("fake", FakeService)
 
 
 def get_available_providers() -> list[str]:
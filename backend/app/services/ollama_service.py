@@ -6,9 +6,12 @@ from typing import Optional
 from ollama import Client
 from app.config import settings
 from app.services.base_provider import BaseAIProvider
+from app.utils import metrics, llm_usage
 
 
 class OllamaService(BaseAIProvider):
+    name = "ollama"
+
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
@@ -16,6 +19,9 @@ class OllamaService(BaseAIProvider):
         self.api_key = settings.OLLAMA_API_KEY  # For Ollama cloud
         self._client = None
     
+    def model_name_for(self, operation: str) -> str:
+        return self.vision_model if operation == "vision" else self.model
+    
     def _get_client(self) -> Client:
         """Get Ollama client configured for cloud API."""
         if self._client is None:
@@ -29,6 +35,13 @@ class OllamaService(BaseAIProvider):
                 self._client = Client(host="http://localhost:11434")
         return self._client
     
+    def _record_usage(self, response):
+        # Ollama reports prompt_eval_count / eval_count on the final response
+        try:
+            llm_usage.record_usage(response.get("prompt_eval_count"), response.get("eval_count"))
+        except AttributeError:
+            pass
+    
     def _extract_json_from_text(self, text: str) -> dict:
         """Extract JSON from LLM response, handling markdown fences and cleanup."""
         # Remove thinking tags if present
@@ -76,6 +89,7 @@ class OllamaService(BaseAIProvider):
                 options={"temperature": 0}
             )
             
+            self._record_usage(response)
             response_text = response['message']['content']
             
             try:
@@ -84,6 +98,8 @@ class OllamaService(BaseAIProvider):
                 return {"error": "Failed to parse JSON from Ollama", "raw": response_text}
                         
         except Exception as e:
+            if "429" in str(e):
+                metrics.record_rate_limit(self.name)
             return {"error": f"Ollama Connection Failed: {str(e)}"}
 
     async def analyze_image(self, image_path: str, prompt: str, model_name: Optional[str] = None) -> dict:
@@ -114,6 +130,7 @@ class OllamaService(BaseAIProvider):
                 options={"temperature": 0}
             )
             
+            self._record_usage(response)
             response_text = response['message']['content']
             
             try:
@@ -123,5 +140,43 @@ class OllamaService(BaseAIProvider):
                 return {"error": "Failed to parse JSON from Ollama Vision", "raw": response_text}
                         
         except Exception as e:
+            if "429" in str(e):
+                metrics.record_rate_limit(self.name)
             return {"error": f"Ollama Vision Connection Failed: {str(e)}"}
 
+    def vision_batch_limits(self):
+        # Multi-image prompts need a model that accepts several images (e.g. qwen2.5vl)
+        return 4, 8 * 1024 * 1024
+
+    async def analyze_images(self, images, prompt: str, model_name: Optional[str] = None) -> dict:
+        """
+        Analyzes several JPEG images in one chat message; images are numbered in the order given.
+        """
+        vision_model = model_name or self.vision_model
+        full_prompt = f"{prompt}\n\nThe {len(images)} images are numbered 1 to {len(images)} in the order attached.\n\nIMPORTANT: Return ONLY valid JSON."
+        
+        try:
+            client = self._get_client()
+            response = await asyncio.to_thread(
+                client.chat,
+                model=vision_model,
+                messages=[{
+                    "role": "user",
+                    "content": full_prompt,
+                    "images": [base64.b64encode(image).decode('utf-8') for image in images]
+                }],
+                options={"temperature": 0}
+            )
+            
+            self._record_usage(response)
+            response_text = response['message']['content']
+            
+            try:
+                return self._extract_json_from_text(response_text)
+            except json.JSONDecodeError:
+                return {"error": "Failed to parse JSON from Ollama Vision", "raw": response_text}
+                        
+        except Exception as e:
+            if "429" in str(e):
+                metrics.record_rate_limit(self.name)
+            return {"error": f"Ollama Vision Connection Failed: {str(e)}"}
@@ -1,6 +1,7 @@
 import fitz  # PyMuPDF
 import os
 from app.utils.storage import read_file_content
+from app.utils import metrics
 
 class PDFService:
     @staticmethod
@@ -12,12 +13,13 @@ class PDFService:
             # Read content (handles both local paths and URLs)
             content = await read_file_content(file_path)
             
-            # Open PDF from bytes
-            doc = fitz.open(stream=content, filetype="pdf")
-            
-            text = ""
-            for page in doc:
-                text += page.get_text()
+            with metrics.timed(metrics.PDF_EXTRACT_SECONDS):
+                # Open PDF from bytes
+                doc = fitz.open(stream=content, filetype="pdf")
+                
+                text = ""
+                for page in doc:
+                    text += page.get_text()
             return text
             
         except Exception as e:
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import List
+from sqlalchemy import select, union_all
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app import models
+from app.utils.storage import (
+    delete_case_files,
+    bulk_delete_from_supabase,
+    list_supabase_objects,
+    supabase_storage_path,
+    is_url,
+    remove_local_file,
+)
+
+
+async def cleanup_case_storage(case_id: int, file_paths: List[str]) -> None:
+    """
+    Background task run after a case is deleted.
+    Removes the case's files from storage without holding up the DELETE response.
+    """
+    try:
+        freed = await delete_case_files(case_id, file_paths)
+        print(f"[Storage GC] Case {case_id}: removed {len(file_paths)} tracked files, reclaimed {freed} bytes")
+    except Exception as e:
+        # The periodic sweep will pick up anything left behind
+        print(f"[Storage GC] Cleanup for case {case_id} failed: {e}")
+
+
+async def _referenced_paths(db) -> set:
+    """All file paths the database still points at (evidence, reports, thumbnails)."""
+    query = union_all(
+        select(models.Evidence.file_path),
+        select(models.Report.file_path),
+        select(models.Case.thumbnail_path).where(models.Case.thumbnail_path.isnot(None)),
+    )
+    referenced = set()
+    result = await db.stream(query)
+    async for (path,) in result:
+        referenced.add(path)
+    return referenced
+
+
+def _sweep_local(referenced: set, cutoff: float) -> dict:
+    """
+    Walk local case storage and delete unreferenced files older than the cutoff. Blocking.
+    Paths are compared resolved, so a relative STORAGE_DIR or a server started from another
+    directory doesn't make stored files look orphaned; if the database references local files
+    and not one of them is found on disk, the paths don't line up and nothing is deleted.
+    """
+    report = {"files_deleted": 0, "bytes_reclaimed": 0}
+    cases_root = os.path.realpath(os.path.join(settings.STORAGE_DIR, "cases"))
+    if not os.path.exists(cases_root):
+        return report
+
+    local = {os.path.realpath(path) for path in referenced if path and not is_url(path)}
+    walked = [
+        (root, [os.path.realpath(os.path.join(root, name)) for name in files])
+        for root, dirs, files in os.walk(cases_root, topdown=False)
+    ]
+    if local and not any(path in local for _, paths in walked for path in paths):
+        print(f"[Storage GC] None of {len(local)} referenced local files found under {cases_root}; sweep aborted")
+        report["aborted"] = "referenced files not found under STORAGE_DIR"
+        return report
+
+    for root, paths in walked:
+        for path in paths:
+            if path in local:
+                continue
+            try:
+                if os.path.getmtime(path) > cutoff:
+                    continue  # Possibly an upload still being committed
+            except OSError:
+                continue
+            report["bytes_reclaimed"] += remove_local_file(path)
+            report["files_deleted"] += 1
+
+        # Drop directories that are now empty (and not freshly created by an upload)
+        try:
+            if root != cases_root and not os.listdir(root) and os.path.getmtime(root) <= cutoff:
+                os.rmdir(root)
+        except OSError:
+            pass
+
+    return report
+
+
+async def _sweep_supabase(referenced: set, cutoff: float) -> dict:
+    """List Supabase case objects and bulk-delete unreferenced ones older than the cutoff."""
+    referenced_paths = {supabase_storage_path(p) for p in referenced if is_url(p)}
+    orphans = []
+    reclaimed = 0
+
+    for obj in await list_supabase_objects("cases"):
+        if obj["path"] in referenced_paths:
+            continue
+        created_at = obj.get("created_at")
+        if created_at:
+            created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            if created.replace(tzinfo=created.tzinfo or timezone.utc).timestamp() > cutoff:
+                continue
+        orphans.append(obj["path"])
+        reclaimed += obj["size"] or 0
+
+    deleted = await bulk_delete_from_supabase(orphans)
+    return {"files_deleted": deleted, "bytes_reclaimed": reclaimed if deleted else 0}
+
+
+async def run_gc_sweep(db) -> dict:
+    """
+    Reconcile storage against the evidence/reports tables and delete orphaned files.
+    Files younger than STORAGE_GC_GRACE_SECONDS are left alone so in-flight uploads
+    are never collected.
+    Returns: Summary with per-backend file counts and bytes reclaimed.
+    """
+    started = time.time()
+    cutoff = started - settings.STORAGE_GC_GRACE_SECONDS
+    referenced = await _referenced_paths(db)
+
+    summary = {"local": await asyncio.to_thread(_sweep_local, referenced, cutoff)}
+
+    if settings.STORAGE_BACKEND == "supabase":
+        try:
+            summary["supabase"] = await _sweep_supabase(referenced, cutoff)
+        except Exception as e:
+            summary["supabase"] = {"error": str(e)}
+
+    summary["bytes_reclaimed"] = sum(
+        backend.get("bytes_reclaimed", 0) for backend in summary.values() if isinstance(backend, dict)
+    )
+    summary["duration_seconds"] = round(time.time() - started, 3)
+    print(f"[Storage GC] Sweep reclaimed {summary['bytes_reclaimed']} bytes in {summary['duration_seconds']}s")
+    return summary
+
+
+async def gc_loop() -> None:
+    """Run the storage sweep every STORAGE_GC_INTERVAL_SECONDS until cancelled."""
+    while True:
+        await asyncio.sleep(settings.STORAGE_GC_INTERVAL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                await run_gc_sweep(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Storage GC] Periodic sweep failed: {e}")
@@ -1,21 +1,172 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Set
 from app.services.model_factory import get_provider
+from app.services.base_provider import BaseAIProvider
 from app import schemas
+from app.services.timeline_merge import MERGE_FIELDS
+from app.utils.hashing import prompt_version, sha256_hex
+from app.config import settings
+import asyncio
 import json
+import re
 
-class AgentSynthesizer:
-    def __init__(self):
-        # Factory automatically selects provider based on settings.AI_PROVIDER
-        self.llm = get_provider()
+_DAY_SECONDS = 24 * 3600
+_DATED_TIME = re.compile(r"^\s*\d{4}-\d{2}-\d{2}[T ]\d{1,2}:\d{2}")
 
-    async def detect_discrepancies(self, narrative: schemas.NarrativeAnalysisResult, vision: schemas.VisionAnalysisResult) -> dict:
-        """
-        Compares Narrative Claims vs. Visual Observations to find inconsistencies.
-        """
-        # Prepare inputs for the prompt
-        narrative_json = narrative.model_dump_json()
-        vision_json = vision.model_dump_json()
-        
-        prompt = f"""
+
+def _capture_seconds(captured_at: Optional[str]) -> Optional[int]:
+    try:
+        captured = datetime.fromisoformat(captured_at)
+    except (TypeError, ValueError):
+        return None
+    return captured.hour * 3600 + captured.minute * 60 + captured.second
+
+
+def input_key(item: dict) -> str:
+    """Content hash identifying a claim, observation or audio claim across analysis runs."""
+    # Not what the item says: display positions, prompt refs and cross-report annotations
+    stable = {k: v for k, v in item.items() if k not in ("evidence_index", "ref", "compare_with", *MERGE_FIELDS)}
+    return sha256_hex(json.dumps(stable, sort_keys=True))[:16]
+
+
+def fingerprint(discrepancy: dict) -> str:
+    """Stable identity of a discrepancy: what it says and which inputs it rests on."""
+    return sha256_hex(json.dumps([
+        discrepancy.get("claim_key"), sorted(discrepancy.get("source_keys") or []),
+        discrepancy.get("timestamp_ref"), discrepancy.get("clean_claim"), discrepancy.get("visual_fact"),
+    ]))[:16]
+
+
+def source_evidence_id(source_keys: List[str], evidence_ids: Dict[str, Optional[int]]) -> Optional[int]:
+    """Evidence id of the first cited input (by input_key) that has one."""
+    return next((evidence_ids[key] for key in source_keys if evidence_ids.get(key) is not None), None)
+
+
+def carried_over(previous: schemas.SynthesisAnalysisResult, claim_keys: Set[str], evidence_keys: Set[str]) -> List[dict]:
+    """
+    The previous result's discrepancies whose claim and evidence are all still present.
+    Ones the model gave no references for are kept only while nothing has been removed.
+    """
+    removed = bool(set(previous.claim_keys) - claim_keys or set(previous.evidence_keys) - evidence_keys)
+    kept = []
+    for discrepancy in previous.discrepancies:
+        if discrepancy.claim_key is None:
+            still_supported = not removed
+        else:
+            still_supported = discrepancy.claim_key in claim_keys and all(
+                key in evidence_keys for key in discrepancy.source_keys
+            )
+        if still_supported:
+            kept.append(discrepancy.model_dump(mode="json"))
+    return kept
+
+
+def _absorb(kept: dict, duplicate: dict):
+    """Fold a duplicate finding into the one that is kept."""
+    kept["source_keys"] = sorted(set(kept.get("source_keys") or []) | set(duplicate.get("source_keys") or []))
+
+
+def partition_scopes(claims: List[dict], evidence: List[dict], scopes: Dict[int, Set[int]], max_chars: int) -> List[Dict[int, Set[int]]]:
+    """
+    Split claim -> evidence scopes into prompts of at most about max_chars of claims
+    and evidence. Evidence is packed one evidence item at a time, in capture-time
+    order, so an item's observations and its time-window neighbours share a prompt;
+    each prompt then gets the claims that still have evidence in it. The number of
+    prompts grows linearly with the amount of evidence.
+    """
+    evidence_sizes = [len(json.dumps(item)) for item in evidence]
+    claim_sizes = [len(json.dumps(claim)) for claim in claims]
+    included = set().union(*scopes.values())
+    if sum(evidence_sizes[j] for j in included) + sum(claim_sizes[i] for i in scopes) <= max_chars:
+        return [scopes]
+    
+    # Half the budget for evidence, half for the claims checked against it
+    budget = max(max_chars // 2, 1)
+    items: Dict[object, List[int]] = {}
+    for j in sorted(included):
+        items.setdefault(evidence[j].get("evidence_id", f"item{j}"), []).append(j)
+    
+    def capture_order(indexes: List[int]):
+        times = [_capture_seconds(evidence[j].get("captured_at")) for j in indexes]
+        times = [t for t in times if t is not None]
+        return (min(times) if times else _DAY_SECONDS, indexes[0])
+    
+    buckets, bucket, size = [], [], 0
+    for indexes in sorted(items.values(), key=capture_order):
+        for j in indexes:
+            if bucket and size + evidence_sizes[j] > budget and (j == indexes[0] or size >= budget):
+                buckets.append(bucket)
+                bucket, size = [], 0
+            bucket.append(j)
+            size += evidence_sizes[j]
+    buckets.append(bucket)
+    
+    partitions = []
+    for bucket in buckets:
+        bucket = set(bucket)
+        partition, size = {}, 0
+        for i in sorted(scopes):
+            scope = scopes[i] & bucket
+            if not scope:
+                continue
+            if partition and size + claim_sizes[i] > budget:
+                partitions.append(partition)
+                partition, size = {}, 0
+            partition[i] = scope
+            size += claim_sizes[i]
+        if partition:
+            partitions.append(partition)
+    return partitions
+
+
+def _evidence_ref(index: int, observation_count: int) -> str:
+    """Prompt reference of an evidence item: O<n> for observations, A<n> for audio claims after them."""
+    if index < observation_count:
+        return f"O{index + 1}"
+    return f"A{index - observation_count + 1}"
+
+
+def _wall_clock(value: Optional[str]) -> Optional[datetime]:
+    """A dated wall-clock time (ISO 8601, e.g. "2024-03-01T04:20"), or None for anything less."""
+    if not isinstance(value, str) or not _DATED_TIME.match(value):
+        return None
+    try:
+        moment = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    # Compared on the camera's/report's own clock; a UTC offset doesn't make them comparable
+    return moment.replace(tzinfo=None)
+
+
+def time_window_candidates(
+    claims: List[dict], observations: List[dict], window_seconds: int
+) -> Optional[List[Optional[List[int]]]]:
+    """
+    Per claim, the indexes of the observations it should be compared with. A claim is
+    only pruned when its timestamp_ref is a dated wall-clock time: it then skips the
+    observations captured (EXIF) on that same date more than window_seconds away, and
+    keeps every other one. Bare "04:20" times may be offsets into a recording and say
+    nothing about the camera clock, so such claims get None (compare everything), as
+    does every claim when nothing is dated.
+    """
+    captured = [_wall_clock(obs.get("captured_at")) for obs in observations]
+    if window_seconds <= 0 or all(moment is None for moment in captured):
+        return None
+    candidates = []
+    for claim in claims:
+        claimed = _wall_clock(claim.get("timestamp_ref"))
+        if claimed is None:
+            candidates.append(None)
+            continue
+        candidates.append([
+            i for i, moment in enumerate(captured)
+            if moment is None or moment.date() != claimed.date()
+            or abs((moment - claimed).total_seconds()) <= window_seconds
+        ])
+    return candidates
+
+class AgentSynthesizer:
+    PROMPT_TEMPLATE = """
         You are an Adversarial Forensic Editor. Your job is to comparing a Police Report Narrative against Objective Visual Evidence.
         
         INPUT DATA:
@@ -24,7 +175,7 @@ class AgentSynthesizer:
         
         2. Visual Observations (Objective facts from images):
         {vision_json}
-        
+        {audio_section}
         TASK:
         Identify "Discovery Points" where the Visual Evidence **CONTRADICTS** or **FAIL TO SUPPORT** the Narrative Claim.
         
@@ -32,6 +183,12 @@ class AgentSynthesizer:
         1.  **Direct Contradictions**: Report says "Gun", Image says "Phone". (HIGH PRIORITY)
         2.  **Omissions**: Report says "Suspect punched officer", Image shows suspect hands at sides. (MEDIUM PRIORITY)
         3.  **Ambiguity**: If visual confidence is LOW, do not flag as a contradiction.
+        4.  **Dispatch Audio** (when provided): Also flag where the report contradicts what was said on the recording,
+            quoting the audio claim as "visual_fact" with its recording timestamp.
+        5.  **Comparison Scope**: A claim with "compare_with" may only be contradicted by the observations or audio claims
+            whose "ref" is listed there; the others were captured too far from the claimed time, or were already compared.
+        6.  **References**: Set "claim_ref" to the "ref" of the claim, and "evidence_refs" to the "ref" of every
+            observation or audio claim the discrepancy rests on.
         
         Output JSON:
         {{
@@ -41,11 +198,222 @@ class AgentSynthesizer:
                     "clean_claim": "Suspect produced a black firearm",
                     "visual_fact": "Suspect held a black rectangular object (likely phone)",
                     "description": "Object misidentification. Visual evidence does not support firearm.",
-                    "status": "FLAGGED"
+                    "status": "FLAGGED",
+                    "claim_ref": "C1",
+                    "evidence_refs": ["O3"]
                 }}
             ]
         }}
         """
+    AUDIO_SECTION_TEMPLATE = """
+        3. Dispatch Audio Claims (Timeline of assertions from recordings, machine-transcribed):
+        {audio_json}
+        """
+    CONSOLIDATION_PROMPT_TEMPLATE = """
+        You are an Adversarial Forensic Editor. The discrepancy findings below were produced separately for
+        different batches of evidence, so several may describe the same discrepancy: the same report claim
+        contradicted by the same fact, seen in different images or recordings.
+        
+        FINDINGS:
+        {findings_json}
+        
+        TASK:
+        Group the findings that describe the same discrepancy, by "id". Only list groups of two or more;
+        leave findings that are distinct out.
+        
+        Output JSON:
+        {{
+            "duplicates": [["D1", "D4"]]
+        }}
+        """
+    PROMPT_VERSION = prompt_version(PROMPT_TEMPLATE + AUDIO_SECTION_TEMPLATE + CONSOLIDATION_PROMPT_TEMPLATE)
+
+    def __init__(self, llm: Optional[BaseAIProvider] = None):
+        # Factory automatically selects provider based on settings.AI_PROVIDER
+        self.llm = llm or get_provider()
+
+    def version_info(self) -> dict:
+        """Provider, model and prompt version that produce this agent's results."""
+        return {
+            "provider": self.llm.name,
+            "model": self.llm.model_name_for("text"),
+            "prompt_version": self.PROMPT_VERSION,
+        }
+
+    async def detect_discrepancies(
+        self,
+        narrative: schemas.NarrativeAnalysisResult,
+        vision: schemas.VisionAnalysisResult,
+        audio: Optional[schemas.AudioAnalysisResult] = None,
+        previous: Optional[schemas.SynthesisAnalysisResult] = None,
+    ) -> dict:
+        """
+        Compares Narrative Claims vs. Visual Observations (and dispatch audio claims, if any)
+        to find inconsistencies.
+        
+        With a previous result that recorded its inputs (claim_keys / evidence_keys), only
+        new claims against all evidence and new evidence against all claims go to the model.
+        Its discrepancies are carried over unless a claim or evidence item they rest on is gone.
+        """
+        claims = narrative.model_dump(mode="json")["timeline"]
+        # Observations and audio claims are both evidence a report claim can be checked against
+        observations = vision.model_dump(mode="json")["observations"]
+        audio_claims = audio.model_dump(mode="json")["timeline"] if audio else []
+        evidence = observations + audio_claims
+        claim_keys = [input_key(claim) for claim in claims]
+        evidence_keys = [input_key(item) for item in evidence]
+        
+        kept = []
+        new_claims = set(range(len(claims)))
+        new_evidence = set(range(len(evidence)))
+        if previous is not None and (previous.claim_keys or previous.evidence_keys):
+            kept = carried_over(previous, set(claim_keys), set(evidence_keys))
+            new_claims = {i for i, key in enumerate(claim_keys) if key not in set(previous.claim_keys)}
+            new_evidence = {i for i, key in enumerate(evidence_keys) if key not in set(previous.evidence_keys)}
+            print(f"[Synthesis] Incremental: {len(new_claims)} new claims, {len(new_evidence)} new evidence items, "
+                  f"{len(kept)} discrepancies kept, {len(previous.discrepancies) - len(kept)} retired")
+        
+        # Per claim, the evidence it still has to be compared with
+        windows = time_window_candidates(claims, evidence, settings.SYNTHESIS_TIME_WINDOW_MINUTES * 60)
+        scopes = {}
+        for i in range(len(claims)):
+            scope = set(range(len(evidence))) if i in new_claims else set(new_evidence)
+            if windows is not None and windows[i] is not None:
+                scope &= set(windows[i])
+            if scope:
+                scopes[i] = scope
+        
+        result = {"discrepancies": kept, "claim_keys": claim_keys, "evidence_keys": evidence_keys}
+        if not scopes:
+            return result
+        
+        # Large cases are split so that no prompt outgrows SYNTHESIS_MAX_PROMPT_CHARS
+        partitions = partition_scopes(claims, evidence, scopes, settings.SYNTHESIS_MAX_PROMPT_CHARS)
+        slots = asyncio.Semaphore(settings.SYNTHESIS_CONCURRENCY)
+        
+        async def compare(partition: dict) -> dict:
+            async with slots:
+                return await self._compare(claims, observations, audio_claims, partition)
+        
+        outcomes = await asyncio.gather(*(compare(partition) for partition in partitions))
+        failed = next((outcome for outcome in outcomes if "error" in outcome), None)
+        if failed:
+            return failed
+        print(f"[Synthesis] Compared {sum(len(scope) for scope in scopes.values())} of "
+              f"{len(claims) * len(evidence)} claim-evidence pairs in {len(partitions)} prompt(s)")
+        
+        refs = {f"C{i + 1}": key for i, key in enumerate(claim_keys)}
+        refs.update({_evidence_ref(i, len(observations)): key for i, key in enumerate(evidence_keys)})
+        report_ids = {f"C{i + 1}": claim.get("report_id") for i, claim in enumerate(claims)}
+        evidence_ids = {key: item.get("evidence_id") for key, item in zip(evidence_keys, evidence)}
+        found = []
+        for outcome in outcomes:
+            for item in outcome.get("discrepancies", []):
+                item["claim_key"] = refs.get(item.get("claim_ref"))
+                item["report_id"] = report_ids.get(item.get("claim_ref"))
+                item["source_keys"] = [refs[ref] for ref in item.get("evidence_refs") or [] if ref in refs]
+                # Row links come from the inputs the finding cites, never from ids the model wrote
+                item["evidence_id"] = source_evidence_id(item["source_keys"], evidence_ids)
+                found.append(item)
+        if len(partitions) > 1:
+            found = await self._consolidate(found)
+        for item in found:
+            item["fingerprint"] = fingerprint(item)
+        result["discrepancies"].extend(found)
+        return result
+
+    async def _consolidate(self, found: List[dict]) -> List[dict]:
+        """
+        Merge discrepancies that partitions found separately: exact repeats directly, then
+        same-claim findings the model judges to be the same discrepancy. Sources are combined.
+        """
+        total = len(found)
+        merged: Dict[tuple, dict] = {}
+        for item in found:
+            key = (item.get("claim_key") or item.get("clean_claim"), " ".join((item.get("visual_fact") or "").lower().split()))
+            if key in merged:
+                _absorb(merged[key], item)
+            else:
+                merged[key] = item
+        found = list(merged.values())
+        
+        # Only findings for the same claim can be duplicates; claims with one finding need no call
+        by_claim: Dict[str, List[int]] = {}
+        for i, item in enumerate(found):
+            by_claim.setdefault(item.get("claim_key") or item.get("clean_claim"), []).append(i)
+        groups = [indexes for indexes in by_claim.values() if len(indexes) > 1]
+        if not groups:
+            return found
+        
+        batches, batch, size = [], [], 0
+        for indexes in groups:
+            group_size = sum(len(json.dumps(found[i])) for i in indexes)
+            if batch and size + group_size > settings.SYNTHESIS_MAX_PROMPT_CHARS:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.extend(indexes)
+            size += group_size
+        batches.append(batch)
+        
+        slots = asyncio.Semaphore(settings.SYNTHESIS_CONCURRENCY)
+        
+        async def consolidate(batch: List[int]) -> dict:
+            findings = [
+                {"id": f"D{i + 1}", "claim": found[i].get("clean_claim"), "visual_fact": found[i].get("visual_fact"),
+                 "description": found[i].get("description")}
+                for i in batch
+            ]
+            prompt = self.CONSOLIDATION_PROMPT_TEMPLATE.format(findings_json=json.dumps({"findings": findings}))
+            async with slots:
+                try:
+                    return await self.llm.generate_json(prompt)
+                except Exception as e:
+                    return {"error": str(e)}
+        
+        absorbed = set()
+        for outcome in await asyncio.gather(*(consolidate(batch) for batch in batches)):
+            if "error" in outcome:
+                # Unmerged duplicates are better than a failed synthesis
+                print(f"[Synthesis] Consolidation failed, keeping findings unmerged: {outcome['error']}")
+                continue
+            for group in outcome.get("duplicates") or []:
+                indexes = [int(ref[1:]) - 1 for ref in group if isinstance(ref, str) and ref[1:].isdigit()]
+                indexes = [i for i in indexes if 0 <= i < len(found) and i not in absorbed]
+                for i in indexes[1:]:
+                    _absorb(found[indexes[0]], found[i])
+                    absorbed.add(i)
+        print(f"[Synthesis] Consolidated {total} findings into {len(found) - len(absorbed)}")
+        return [item for i, item in enumerate(found) if i not in absorbed]
+
+    async def _compare(self, claims: List[dict], observations: List[dict], audio_claims: List[dict], scopes: dict) -> dict:
+        """One model call over the claims in scopes, each limited to its scope of evidence indexes."""
+        included = set().union(*scopes.values())
+        timeline = []
+        for i, claim in enumerate(claims):
+            if i not in scopes:
+                continue
+            claim = {**claim, "ref": f"C{i + 1}"}
+            if scopes[i] != included:
+                claim["compare_with"] = [_evidence_ref(j, len(observations)) for j in sorted(scopes[i])]
+            timeline.append(claim)
+        
+        def referenced(items: List[dict], offset: int) -> List[dict]:
+            return [
+                {**item, "ref": _evidence_ref(offset + j, len(observations))}
+                for j, item in enumerate(items) if offset + j in included
+            ]
+        
+        # Audio claims only, never transcripts; those are too long to resend
+        audio_timeline = referenced(audio_claims, len(observations))
+        audio_section = ""
+        if audio_timeline:
+            audio_section = self.AUDIO_SECTION_TEMPLATE.format(audio_json=json.dumps({"timeline": audio_timeline}))
+        
+        prompt = self.PROMPT_TEMPLATE.format(
+            narrative_json=json.dumps({"timeline": timeline}),
+            vision_json=json.dumps({"observations": referenced(observations, 0)}),
+            audio_section=audio_section,
+        )
         
         try:
             # Use provider's default model (configured in settings)
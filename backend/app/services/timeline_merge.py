@@ -0,0 +1,93 @@
+"""
+Merges the claim timelines of a case's reports (first officer, supplemental,
+second officer...) into one ordered timeline, and marks claims that another
+report corroborates or contradicts.
+
+Claims are ordered by their report time; claims without one stay after the
+claim that preceded them in their own report. Two claims from different
+reports are compared when both name a time within CROSS_REPORT_WINDOW_SECONDS
+of each other and the same entity:
+    agrees    - same action on an overlapping object, or largely the same wording about it
+    conflicts - same action on a different object ("produced a firearm" vs "produced a phone")
+"""
+import re
+from typing import List, Optional, Set, Tuple
+
+CROSS_REPORT_WINDOW_SECONDS = 120
+_DAY_SECONDS = 24 * 3600
+_CLOCK_TIME = re.compile(r"^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*$")
+_STOPWORDS = {"a", "an", "the", "his", "her", "their", "its", "of", "to", "from", "with", "at", "on", "in", "into"}
+
+# Fields the merge adds; not part of what a report itself says
+MERGE_FIELDS = ("report_index", "agrees_with", "conflicts_with")
+
+
+def clock_seconds(timestamp_ref: Optional[str]) -> Optional[int]:
+    """Seconds since midnight of an HH:MM[:SS] report time, or None if it isn't one."""
+    match = _CLOCK_TIME.match(timestamp_ref or "")
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        return None
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + int(match.group(3) or 0)
+
+
+def _words(text: Optional[str]) -> Set[str]:
+    # Words only; times and other bare numbers would make any two claims look alike
+    return {word for word in re.findall(r"[a-z][a-z0-9]*", (text or "").lower()) if word not in _STOPWORDS}
+
+
+def _normalized(text: Optional[str]) -> str:
+    return " ".join(sorted(_words(text)))
+
+
+def _relation(a: dict, b: dict) -> Optional[str]:
+    """"agrees", "conflicts" or None for two claims about the same entity at about the same time."""
+    objects_a, objects_b = _words(a.get("object")), _words(b.get("object"))
+    different_objects = bool(objects_a and objects_b and not objects_a & objects_b)
+    if _normalized(a.get("action")) == _normalized(b.get("action")):
+        return "conflicts" if different_objects else "agrees"
+    words_a, words_b = _words(a.get("description")), _words(b.get("description"))
+    if not different_objects and words_a and words_b and len(words_a & words_b) / len(words_a | words_b) >= 0.5:
+        return "agrees"
+    return None
+
+
+def _sort_times(times: List[Optional[int]]) -> List[int]:
+    """Untimed claims take the time of the claim before them (or after, at the start of a report)."""
+    known = [t for t in times if t is not None]
+    current = known[0] if known else _DAY_SECONDS
+    filled = []
+    for seconds in times:
+        current = seconds if seconds is not None else current
+        filled.append(current)
+    return filled
+
+
+def merge_timelines(reports: List[Tuple[int, List[dict]]]) -> List[dict]:
+    """
+    One ordered timeline from (report_id, claims) pairs given in report order.
+    Each claim is tagged with report_id, its 1-based report_index and the ids of
+    other reports that agree or conflict with it.
+    """
+    entries = []
+    for report_index, (report_id, claims) in enumerate(reports, 1):
+        times = [clock_seconds(claim.get("timestamp_ref")) for claim in claims]
+        for position, (claim, sort_time) in enumerate(zip(claims, _sort_times(times))):
+            claim = {**claim, "report_id": report_id, "report_index": report_index, "agrees_with": [], "conflicts_with": []}
+            entries.append(((sort_time, report_index, position), times[position], claim))
+    entries.sort(key=lambda entry: entry[0])
+
+    timed = sorted(((seconds, claim) for _, seconds, claim in entries if seconds is not None), key=lambda pair: pair[0])
+    for i, (seconds, claim) in enumerate(timed):
+        for other_seconds, other in timed[i + 1:]:
+            if other_seconds - seconds > CROSS_REPORT_WINDOW_SECONDS:
+                break
+            if other["report_id"] == claim["report_id"] or _normalized(other.get("entity")) != _normalized(claim.get("entity")):
+                continue
+            relation = _relation(claim, other)
+            if relation:
+                field = "agrees_with" if relation == "agrees" else "conflicts_with"
+                if other["report_id"] not in claim[field]:
+                    claim[field].append(other["report_id"])
+                if claim["report_id"] not in other[field]:
+                    other[field].append(claim["report_id"])
+    return [claim for _, _, claim in entries]
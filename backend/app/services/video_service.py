@@ -0,0 +1,230 @@
+"""
+Keyframe extraction for video evidence.
+
+Video is decoded in a worker process (CPU-only, OpenCV). Instead of sampling at
+fixed intervals, a frame becomes a keyframe when the scene changes (colour
+histogram distance from the last keyframe) or when there is enough motion
+(pixel difference from the previous sampled frame). Near-duplicate keyframes
+are dropped by perceptual hash, and the survivors are tiled into labelled
+contact sheets so one vision call covers several moments. The number of calls
+therefore follows the number of distinct scenes, not the length of the video.
+"""
+import asyncio
+import heapq
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from app.config import settings
+from app.utils import metrics
+from app.utils.image_hash import dhash_array, hamming
+from app.utils.storage import is_url, read_file_content
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class ContactSheet:
+    jpeg: bytes
+    timestamps: List[str]  # timestamp_ref of each tile, in tile order
+
+
+def format_timestamp(seconds: float) -> str:
+    whole = int(seconds)
+    return f"{whole // 3600:02d}:{whole % 3600 // 60:02d}:{whole % 60:02d}"
+
+
+def _extract_keyframes(path: str, params: dict) -> Tuple[List[Tuple[float, bytes]], dict]:
+    """
+    Worker-process entry point. Returns (timestamp seconds, JPEG bytes) per
+    keyframe plus decode stats. Only the sampled frames are decoded in full, and
+    candidates are shrunk, deduplicated and held to the max_keyframes strongest as
+    they arrive, so memory stays bounded however long the video is.
+    """
+    try:
+        import cv2
+    except ImportError:
+        raise RuntimeError("Video analysis requires opencv-python-headless")
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Could not open video")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(fps / params["sample_fps"]))
+
+    strongest = []  # Min-heap of (score, -order, timestamp, JPEG bytes); the weakest is evicted first
+    seen = []  # (dHash, histogram) of every distinct keyframe so far
+    candidates = 0
+    last_key_hist = None
+    last_key_time = None
+    previous_small = None
+    index = 0
+    sampled = 0
+    while True:
+        if not capture.grab():
+            break
+        if index % step:
+            index += 1
+            continue
+        ok, frame = capture.retrieve()
+        if not ok:
+            break
+        timestamp = index / fps
+        index += 1
+        sampled += 1
+
+        small = cv2.resize(frame, (160, 90), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+        cv2.normalize(hist, hist)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        motion = 0.0
+        if previous_small is not None:
+            motion = float(cv2.absdiff(gray, previous_small).mean()) / 255
+        previous_small = gray
+
+        if last_key_hist is None:
+            scene = 1.0
+        else:
+            scene = cv2.compareHist(last_key_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+
+        since_last = timestamp - last_key_time if last_key_time is not None else None
+        is_key = (
+            since_last is None
+            or (since_last >= params["min_gap"] and (scene >= params["scene_threshold"] or motion >= params["motion_threshold"]))
+        )
+        if not is_key:
+            continue
+        candidates += 1
+        last_key_hist = hist
+        last_key_time = timestamp
+
+        # Drop near-duplicates (e.g. returning to the same view): same layout by dHash
+        # and same colours by histogram, since dHash alone ignores colour
+        thumb = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        frame_hash = dhash_array(thumb.astype("float32"))
+        if any(
+            hamming(frame_hash, h) <= params["dedup_distance"]
+            and cv2.compareHist(seen_hist, hist, cv2.HISTCMP_BHATTACHARYYA) < params["scene_threshold"]
+            for h, seen_hist in seen
+        ):
+            continue
+        seen.append((frame_hash, hist))
+
+        # Over budget: keep the strongest scene changes (the earlier one on a tie)
+        rank = (max(scene, motion), -candidates)
+        if len(strongest) >= params["max_keyframes"] and rank <= strongest[0][:2]:
+            continue
+        height, width = frame.shape[:2]
+        scale = min(1.0, params["max_dimension"] / max(height, width))
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if not ok:
+            continue
+        entry = (*rank, timestamp, encoded.tobytes())
+        if len(strongest) >= params["max_keyframes"]:
+            heapq.heapreplace(strongest, entry)
+        else:
+            heapq.heappush(strongest, entry)
+    capture.release()
+
+    keyframes = sorted((timestamp, jpeg) for _, _, timestamp, jpeg in strongest)
+
+    stats = {
+        "duration_seconds": round(index / fps, 2),
+        "sampled_frames": sampled,
+        "scene_candidates": candidates,
+        "keyframes": len(keyframes),
+    }
+    return keyframes, stats
+
+
+def build_contact_sheets(keyframes: List[Tuple[float, bytes]], per_sheet: int) -> List[ContactSheet]:
+    """Tile keyframes into grids, each tile labelled with its number on the sheet and its timestamp."""
+    from PIL import Image, ImageDraw
+
+    sheets = []
+    for start in range(0, len(keyframes), per_sheet):
+        group = keyframes[start:start + per_sheet]
+        frames = [Image.open(io.BytesIO(jpeg)).convert("RGB") for _, jpeg in group]
+        timestamps = [format_timestamp(t) for t, _ in group]
+        if len(frames) == 1:
+            tile_w, tile_h = frames[0].size
+            columns = rows = 1
+        else:
+            tile_w = max(f.width for f in frames)
+            tile_h = max(f.height for f in frames)
+            columns = 2 if len(frames) <= 4 else 3
+            rows = -(-len(frames) // columns)
+        sheet = Image.new("RGB", (tile_w * columns, tile_h * rows), (0, 0, 0))
+        draw = ImageDraw.Draw(sheet)
+        for i, (frame, label) in enumerate(zip(frames, timestamps)):
+            x, y = (i % columns) * tile_w, (i // columns) * tile_h
+            sheet.paste(frame, (x, y))
+            caption = f"#{i + 1} {label}"
+            draw.rectangle((x, y, x + 8 + int(draw.textlength(caption)), y + 18), fill=(0, 0, 0))
+            draw.text((x + 4, y + 3), caption, fill=(255, 255, 0))
+        buffer = io.BytesIO()
+        sheet.save(buffer, format="JPEG", quality=85)
+        sheets.append(ContactSheet(jpeg=buffer.getvalue(), timestamps=timestamps))
+    return sheets
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.VIDEO_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def contact_sheets(file_path: str) -> Tuple[List[ContactSheet], dict]:
+    """
+    Keyframe contact sheets for a stored video (local path or URL), plus
+    extraction stats. Raises on unreadable video or missing OpenCV.
+    """
+    params = {
+        "sample_fps": settings.VIDEO_SAMPLE_FPS,
+        "scene_threshold": settings.VIDEO_SCENE_THRESHOLD,
+        "motion_threshold": settings.VIDEO_MOTION_THRESHOLD,
+        "min_gap": settings.VIDEO_MIN_KEYFRAME_GAP_SECONDS,
+        "dedup_distance": settings.VIDEO_DEDUP_DISTANCE,
+        "max_keyframes": settings.VIDEO_MAX_KEYFRAMES,
+        "max_dimension": settings.VIDEO_FRAME_MAX_DIMENSION,
+    }
+    temp_path = None
+    if is_url(file_path):
+        # OpenCV needs a seekable local file
+        content = await read_file_content(file_path)
+        fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(file_path)[1] or ".mp4")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        keyframes, stats = await loop.run_in_executor(_get_executor(), _extract_keyframes, temp_path or file_path, params)
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+    sheets = await asyncio.to_thread(build_contact_sheets, keyframes, settings.VIDEO_FRAMES_PER_CALL)
+    elapsed = time.perf_counter() - started
+    metrics.VIDEO_KEYFRAME_SECONDS.observe(elapsed)
+    stats["vision_calls"] = len(sheets)
+    print(f"[Video] {os.path.basename(file_path)}: {stats['duration_seconds']}s, "
+          f"{stats['keyframes']} keyframes in {len(sheets)} sheets ({elapsed:.2f}s)")
+    return sheets, stats
@@ -0,0 +1,284 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Union
+from app.config import settings
+from app.utils import metrics
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+KEY_NAMESPACE = "justitia:cache:"
+LOCK_NAMESPACE = "justitia:lock:"
+GENERATION_KEY = "justitia:cache-generation"  # Bumped on every invalidation, by any instance
+LOCK_TIMEOUT_SECONDS = 30  # Upper bound on how long one instance may hold a fill lock
+LOCK_WAIT_SECONDS = 5  # How long other instances wait for that fill before computing themselves
+LOCK_POLL_SECONDS = 0.05
+REDIS_CONNECT_TIMEOUT_SECONDS = 0.5
+
+SAMPLE_CASES_PREFIX = "sample-cases:"
+CASE_PREFIX = "case:"
+
+
+def case_key(case_id: int) -> str:
+    return f"{CASE_PREFIX}{case_id}"
+
+
+def sample_cases_key(cursor: Optional[str], limit: int) -> str:
+    return f"{SAMPLE_CASES_PREFIX}{cursor or ''}:{limit}"
+
+
+class LocalCache:
+    """In-process LRU with per-entry TTL. Used when Redis isn't reachable."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            self._data.pop(key, None)
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def bump_generation(self) -> None:
+        self._generation += 1
+
+    async def acquire_lock(self, key: str) -> bool:
+        # Single process - the in-flight map below already collapses concurrent fills
+        return True
+
+    async def release_lock(self, key: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisCache:
+    """Shared cache across API instances. Works with fakeredis clients too."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(KEY_NAMESPACE + key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.client.set(KEY_NAMESPACE + key, value, ex=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(KEY_NAMESPACE + key for key in keys))
+
+    async def delete_prefix(self, prefix: str) -> None:
+        batch = []
+        async for key in self.client.scan_iter(match=f"{KEY_NAMESPACE}{prefix}*", count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.client.delete(*batch)
+                batch = []
+        if batch:
+            await self.client.delete(*batch)
+
+    async def generation(self) -> int:
+        return int(await self.client.get(GENERATION_KEY) or 0)
+
+    async def bump_generation(self) -> None:
+        await self.client.incr(GENERATION_KEY)
+
+    async def acquire_lock(self, key: str) -> bool:
+        return bool(await self.client.set(LOCK_NAMESPACE + key, b"1", nx=True, ex=LOCK_TIMEOUT_SECONDS))
+
+    async def release_lock(self, key: str) -> None:
+        await self.client.delete(LOCK_NAMESPACE + key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+_backend = None
+_backend_ready = False
+_backend_lock = asyncio.Lock()
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _connect_redis():
+    if aioredis is None:
+        raise RuntimeError("redis package is not installed")
+    client = aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT_SECONDS,
+        socket_timeout=REDIS_CONNECT_TIMEOUT_SECONDS,
+    )
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        raise
+    return RedisCache(client)
+
+
+async def get_backend():
+    """
+    Resolve the cache backend once per process: Redis when reachable, else an
+    in-process LRU. Returns None when caching is turned off.
+    """
+    global _backend, _backend_ready
+    if _backend_ready:
+        return _backend
+
+    async with _backend_lock:
+        if _backend_ready:
+            return _backend
+
+        mode = settings.CACHE_BACKEND.lower()
+        if mode == "redis":
+            try:
+                _backend = await _connect_redis()
+                print(f"[Cache] Using Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT}")
+            except Exception as e:
+                print(f"[Cache] Redis unavailable ({e}), falling back to in-process LRU")
+                _backend = LocalCache(settings.CACHE_LOCAL_MAX_ENTRIES)
+        elif mode == "memory":
+            _backend = LocalCache(settings.CACHE_LOCAL_MAX_ENTRIES)
+        else:
+            _backend = None
+
+        _backend_ready = True
+        return _backend
+
+
+def use_backend(backend) -> None:
+    """Swap in a specific backend, e.g. RedisCache(fakeredis.aioredis.FakeRedis())."""
+    global _backend, _backend_ready
+    _backend = backend
+    _backend_ready = True
+
+
+async def close() -> None:
+    global _backend, _backend_ready
+    if _backend is not None:
+        await _backend.close()
+    _backend = None
+    _backend_ready = False
+
+
+async def _safely(operation: Awaitable, default=None):
+    """A cache outage must never fail the request - treat errors as a miss."""
+    try:
+        return await operation
+    except Exception as e:
+        print(f"[Cache] Backend error: {e}")
+        return default
+
+
+async def _fill(backend, key: str, ttl: int, producer: Callable[[], Awaitable[bytes]]) -> bytes:
+    locked = await _safely(backend.acquire_lock(key), default=True)
+    if not locked:
+        # Another instance is computing this key; give it a moment before doing the work ourselves
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            value = await _safely(backend.get(key))
+            if value is not None:
+                return value
+
+    try:
+        # A value built while any instance invalidated the cache may be stale: don't keep it
+        generation = await _safely(backend.generation())
+        value = await producer()
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        if generation is not None and await _safely(backend.generation()) == generation:
+            await _safely(backend.set(key, value, ttl))
+            # An invalidation landing between the check and the SET has already deleted the key
+            if await _safely(backend.generation()) != generation:
+                await _safely(backend.delete(key))
+        return value
+    finally:
+        if locked:
+            await _safely(backend.release_lock(key))
+
+
+async def get_or_set(key: str, ttl: int, producer: Callable[[], Awaitable[Union[bytes, str]]]) -> bytes:
+    """
+    Return the cached bytes for key, or build them with producer() and cache them.
+    Concurrent misses for the same key share one producer call in this process,
+    and a Redis lock keeps other instances from piling onto the database too.
+    """
+    backend = await get_backend()
+    if backend is None:
+        value = await producer()
+        return value.encode("utf-8") if isinstance(value, str) else value
+
+    value = await _safely(backend.get(key))
+    metrics.record_cache(key, value is not None)
+    if value is not None:
+        return value
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        value = await _fill(backend, key, ttl, producer)
+        future.set_result(value)
+        return value
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Waiters re-raise it; don't warn if there were none
+        raise
+    finally:
+        _inflight.pop(key, None)
+        if not future.done():
+            future.cancel()
+
+
+async def invalidate(*keys: str) -> None:
+    backend = await get_backend()
+    if backend is not None:
+        await _safely(backend.bump_generation())
+        await _safely(backend.delete(*keys))
+
+
+async def invalidate_prefix(prefix: str) -> None:
+    backend = await get_backend()
+    if backend is not None:
+        await _safely(backend.bump_generation())
+        await _safely(backend.delete_prefix(prefix))
+
+
+async def invalidate_case(case_id: int, is_sample_case: bool = False) -> None:
+    """Drop a case's cached detail payload (and the sample listing if it's a sample case)."""
+    await invalidate(case_key(case_id))
+    if is_sample_case:
+        await invalidate_prefix(SAMPLE_CASES_PREFIX)
@@ -0,0 +1,13 @@
+import hashlib
+
+
+def sha256_hex(data) -> str:
+    """SHA-256 hex digest of bytes or text."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def prompt_version(template: str) -> str:
+    """Short, stable identifier for a prompt template (changes whenever the template text does)."""
+    return sha256_hex(template)[:12]
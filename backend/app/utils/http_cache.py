@@ -0,0 +1,38 @@
+from typing import Dict, Optional, Union
+from fastapi import Request, Response
+from app.utils.hashing import sha256_hex
+
+
+def make_etag(content_hash: str) -> str:
+    """Strong ETag for a content hash."""
+    return f'"{content_hash}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def json_bytes_response(
+    request: Optional[Request],
+    body: Union[str, bytes],
+    content_hash: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Serve already-serialized JSON as-is with a strong ETag, answering 304 when
+    the client's If-None-Match still matches. The hash defaults to the body's own.
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    etag = make_etag(content_hash or sha256_hex(body))
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": "no-cache"}
+    
+    if request is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,81 @@
+"""
+Capture metadata from image EXIF: when (DateTimeOriginal), where (GPS) and
+with what (camera make/model), plus upright pixel dimensions. Capture times
+are camera-local wall-clock time, like the times written in a report.
+"""
+import io
+from datetime import datetime
+from typing import Optional
+from PIL import Image
+
+_EXIF_IFD = 0x8769
+_GPS_IFD = 0x8825
+_MAKE, _MODEL, _ORIENTATION, _DATETIME = 0x010F, 0x0110, 0x0112, 0x0132
+_DATETIME_ORIGINAL, _DATETIME_DIGITIZED, _OFFSET_TIME_ORIGINAL = 0x9003, 0x9004, 0x9011
+
+
+def _text(value) -> Optional[str]:
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "ignore")
+    value = str(value).strip("\x00 ") if value is not None else ""
+    return value or None
+
+
+def _capture_time(exif: Image.Exif, exif_ifd: dict) -> Optional[str]:
+    for raw in (exif_ifd.get(_DATETIME_ORIGINAL), exif_ifd.get(_DATETIME_DIGITIZED), exif.get(_DATETIME)):
+        try:
+            captured = datetime.strptime(_text(raw) or "", "%Y:%m:%d %H:%M:%S")
+        except ValueError:
+            continue
+        offset = _text(exif_ifd.get(_OFFSET_TIME_ORIGINAL))
+        return captured.isoformat() + (offset if offset and len(offset) == 6 else "")
+    return None
+
+
+def _degrees(dms, ref) -> Optional[float]:
+    try:
+        degrees, minutes, seconds = (float(part) for part in dms)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    value = degrees + minutes / 60 + seconds / 3600
+    return round(-value if _text(ref) in ("S", "W") else value, 6)
+
+
+def _gps(gps_ifd: dict) -> Optional[dict]:
+    latitude = _degrees(gps_ifd.get(2), gps_ifd.get(1))
+    longitude = _degrees(gps_ifd.get(4), gps_ifd.get(3))
+    if latitude is None or longitude is None or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return {"latitude": latitude, "longitude": longitude}
+
+
+def extract(content: bytes) -> Optional[dict]:
+    """
+    {"captured_at", "gps", "device", "width", "height"} of an image file's bytes
+    (any may be None when the EXIF lacks it), or None if it isn't a readable image. Blocking.
+    """
+    try:
+        img = Image.open(io.BytesIO(content))
+        exif = img.getexif()
+        exif_ifd = exif.get_ifd(_EXIF_IFD)
+        gps_ifd = exif.get_ifd(_GPS_IFD)
+    except Exception:
+        return None
+    width, height = img.size
+    if exif.get(_ORIENTATION) in (5, 6, 7, 8):  # Rotated a quarter turn
+        width, height = height, width
+    make, model = _text(exif.get(_MAKE)), _text(exif.get(_MODEL))
+    if make and model and model.lower().startswith(make.lower()):
+        make = None  # Many cameras repeat the make in the model name
+    return {
+        "captured_at": _capture_time(exif, exif_ifd),
+        "gps": _gps(gps_ifd),
+        "device": " ".join(part for part in (make, model) if part) or None,
+        "width": width,
+        "height": height,
+    }
+
+
+def time_of_day(captured_at: str) -> str:
+    """HH:MM:SS of an ISO capture time, the form timestamp_ref uses for wall-clock times."""
+    return datetime.fromisoformat(captured_at).strftime("%H:%M:%S")
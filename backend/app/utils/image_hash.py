@@ -0,0 +1,68 @@
+"""
+Perceptual image hashes for spotting near-duplicate evidence (burst photos,
+consecutive bodycam frames). Both are 64-bit and compared by Hamming distance:
+
+    dHash - sign of horizontal brightness gradients on a 9x8 thumbnail
+    pHash - low-frequency DCT coefficients of a 32x32 thumbnail vs. their median
+
+dHash is cheap and sensitive to layout; pHash tolerates re-encoding, small
+crops and brightness changes. Requiring both to match keeps false positives rare.
+"""
+import io
+from typing import Optional
+import numpy as np
+from PIL import Image, ImageOps
+
+HASH_BITS = 64
+_PHASH_SIZE = 32
+_PHASH_LOW = 8
+
+# DCT-II basis for the pHash thumbnail
+_n = np.arange(_PHASH_SIZE)
+_DCT = np.cos(np.pi * (2 * _n[None, :] + 1) * _n[:, None] / (2 * _PHASH_SIZE))
+
+
+def _bits_to_hex(bits: np.ndarray) -> str:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return f"{value:016x}"
+
+
+def dhash_array(gray: np.ndarray) -> str:
+    """dHash of a 9-wide, 8-high grayscale array."""
+    return _bits_to_hex(gray[:, 1:] > gray[:, :-1])
+
+
+def dhash(img: Image.Image) -> str:
+    thumb = img.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    return dhash_array(np.asarray(thumb, dtype=np.float32))
+
+
+def phash(img: Image.Image) -> str:
+    thumb = img.convert("L").resize((_PHASH_SIZE, _PHASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = np.asarray(thumb, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:_PHASH_LOW, :_PHASH_LOW]
+    # The DC term only carries overall brightness
+    median = np.median(low.flatten()[1:])
+    return _bits_to_hex(low > median)
+
+
+def compute_hashes(content: bytes) -> Optional[dict]:
+    """{"dhash": hex, "phash": hex} of an image file's bytes, or None if it isn't a readable image. Blocking."""
+    try:
+        img = Image.open(io.BytesIO(content))
+        img.draft("L", (_PHASH_SIZE * 4, _PHASH_SIZE * 4))  # JPEG: decode at reduced size
+        img = ImageOps.exif_transpose(img)
+        return {"dhash": dhash(img), "phash": phash(img)}
+    except Exception:
+        return None
+
+
+def hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def distance(a: dict, b: dict) -> int:
+    """Hamming distance between two images' hashes: the worse of dHash and pHash."""
+    return max(hamming(a["dhash"], b["dhash"]), hamming(a["phash"], b["phash"]))
@@ -0,0 +1,42 @@
+import io
+from typing import Optional
+from PIL import Image, ImageOps
+
+MIN_DIMENSION = 512  # Never shrink below this to meet a byte budget
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """RGB on a white background, whatever the source mode."""
+    if img.mode in ("RGBA", "LA", "P"):
+        if img.mode == "P":
+            img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    return img.convert("RGB") if img.mode != "RGB" else img
+
+
+def normalize_image(data: bytes, max_dimension: int, max_bytes: Optional[int] = None, quality: int = 85) -> bytes:
+    """
+    Re-encode an image as an upright RGB JPEG no larger than max_dimension on its
+    longest side. With max_bytes, quality (down to 50) and then size (down to
+    MIN_DIMENSION) are reduced until it fits; the smallest attempt is returned
+    if it never does. Blocking; call through a thread.
+    """
+    img = _flatten(ImageOps.exif_transpose(Image.open(io.BytesIO(data))))
+    while True:
+        resized = img
+        if max(img.size) > max_dimension:
+            ratio = max_dimension / max(img.size)
+            resized = img.resize((int(img.width * ratio), int(img.height * ratio)), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, format="JPEG", quality=quality, optimize=True)
+        encoded = buffer.getvalue()
+        if max_bytes is None or len(encoded) <= max_bytes:
+            return encoded
+        if quality > 50:
+            quality -= 10
+        elif max_dimension > MIN_DIMENSION:
+            max_dimension = max(MIN_DIMENSION, int(max_dimension * 0.8))
+        else:
+            return encoded
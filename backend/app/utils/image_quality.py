@@ -0,0 +1,67 @@
+"""
+Cheap image-quality scores, computed once at upload, so blank, dark, blurred
+or tiny images can be kept from spending a rate-limited vision call.
+
+Scores are raw measurements; issues() judges them against the current
+IMAGE_QUALITY_* thresholds, so thresholds can change without re-scoring.
+"""
+import io
+from typing import List, Optional
+import numpy as np
+from PIL import Image, ImageOps
+from app.config import settings
+from app.utils import image_exif, image_hash
+
+# Scores are measured at this size so they don't depend on the camera resolution
+_ANALYSIS_DIMENSION = 512
+
+
+def assess(content: bytes) -> Optional[dict]:
+    """Resolution, mean luminance, contrast and sharpness of an image file's bytes, or None if unreadable. Blocking."""
+    try:
+        img = Image.open(io.BytesIO(content))
+        width, height = img.size
+        img.draft("L", (_ANALYSIS_DIMENSION, _ANALYSIS_DIMENSION))
+        img = ImageOps.exif_transpose(img).convert("L")
+    except Exception:
+        return None
+    if max(img.size) > _ANALYSIS_DIMENSION:
+        img.thumbnail((_ANALYSIS_DIMENSION, _ANALYSIS_DIMENSION), Image.Resampling.BILINEAR)
+    gray = np.asarray(img, dtype=np.float32)
+    # 4-neighbour Laplacian; its variance drops as edges blur
+    laplacian = (
+        4 * gray[1:-1, 1:-1] - gray[:-2, 1:-1] - gray[2:, 1:-1] - gray[1:-1, :-2] - gray[1:-1, 2:]
+    )
+    return {
+        "width": width,
+        "height": height,
+        "mean_luminance": round(float(gray.mean()), 2),
+        "contrast": round(float(gray.std()), 2),
+        "sharpness": round(float(laplacian.var()) if laplacian.size else 0.0, 2),
+    }
+
+
+def issues(scores: dict) -> List[str]:
+    """Reasons an image is unlikely to yield usable observations; empty when it looks fine."""
+    found = []
+    if min(scores["width"], scores["height"]) < settings.IMAGE_QUALITY_MIN_DIMENSION:
+        found.append("too_small")
+    if scores["mean_luminance"] < settings.IMAGE_QUALITY_MIN_LUMINANCE:
+        found.append("too_dark")
+    elif scores["mean_luminance"] > settings.IMAGE_QUALITY_MAX_LUMINANCE:
+        found.append("overexposed")
+    if scores["contrast"] < settings.IMAGE_QUALITY_MIN_CONTRAST:
+        found.append("blank")
+    elif scores["sharpness"] < settings.IMAGE_QUALITY_MIN_SHARPNESS:
+        # A blank image has no edges either; only call it blurred when there is content
+        found.append("blurred")
+    return found
+
+
+def image_metadata(content: bytes) -> dict:
+    """Evidence metadata_json entries for an image: EXIF capture data, perceptual hashes and quality scores. Blocking."""
+    return {
+        "exif": image_exif.extract(content),
+        "image_hash": image_hash.compute_hashes(content),
+        "image_quality": assess(content),
+    }
@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CallUsage:
+    """Filled in by a provider while one model call is in progress."""
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: int = 0
+
+
+# The call currently in progress (set by MeteredProvider around each provider method)
+current_call: ContextVar[Optional[CallUsage]] = ContextVar("current_llm_call", default=None)
+
+# What the call is for - set by the analyze endpoints around each stage
+current_scope: ContextVar[dict] = ContextVar("llm_call_scope", default={})
+
+
+def record_usage(prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+    """Providers call this with the token counts from the response they just parsed."""
+    usage = current_call.get()
+    if usage is None:
+        return
+    if prompt_tokens is not None:
+        usage.prompt_tokens = (usage.prompt_tokens or 0) + int(prompt_tokens)
+    if completion_tokens is not None:
+        usage.completion_tokens = (usage.completion_tokens or 0) + int(completion_tokens)
+
+
+def record_retry() -> None:
+    usage = current_call.get()
+    if usage is not None:
+        usage.retries += 1
+
+
+@contextmanager
+def call_scope(case_id: Optional[int] = None, stage: Optional[str] = None, prompt_version: Optional[str] = None):
+    """Attribute every model call made inside the block to a case and stage."""
+    token = current_scope.set({"case_id": case_id, "stage": stage, "prompt_version": prompt_version})
+    try:
+        yield
+    finally:
+        current_scope.reset(token)
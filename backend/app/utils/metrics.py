@@ -0,0 +1,169 @@
+import time
+from contextlib import contextmanager
+from typing import Optional
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import event
+from app.utils import llm_usage
+
+# Model calls take seconds to minutes; keep the buckets wide
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "justitia_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=SLOW_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("justitia_http_requests_in_flight", "HTTP requests currently being served")
+
+ANALYSIS_STAGE_SECONDS = Histogram(
+    "justitia_analysis_stage_duration_seconds", "Time to compute an analysis stage (cache misses only)",
+    ["stage"], buckets=SLOW_BUCKETS,
+)
+
+PROVIDER_CALL_SECONDS = Histogram(
+    "justitia_provider_call_duration_seconds", "AI provider call latency",
+    ["provider", "model", "operation", "outcome"], buckets=SLOW_BUCKETS,
+)
+PROVIDER_IN_FLIGHT = Gauge(
+    "justitia_provider_calls_in_flight", "AI provider calls currently waiting on a response",
+    ["provider", "operation"],
+)
+PROVIDER_RETRIES = Counter(
+    "justitia_provider_retries_total", "Provider calls retried after a transient failure",
+    ["provider", "reason"],
+)
+PROVIDER_RATE_LIMITED = Counter(
+    "justitia_provider_rate_limited_total", "429 / quota-exceeded responses from providers",
+    ["provider"],
+)
+PROVIDER_JSON_PARSE_FAILURES = Counter(
+    "justitia_provider_json_parse_failures_total", "Provider responses that were not valid JSON",
+    ["provider", "operation"],
+)
+
+PDF_EXTRACT_SECONDS = Histogram(
+    "justitia_pdf_extract_duration_seconds", "PDF text extraction time", buckets=FAST_BUCKETS,
+)
+VIDEO_KEYFRAME_SECONDS = Histogram(
+    "justitia_video_keyframe_duration_seconds", "Video decode and keyframe extraction time", buckets=SLOW_BUCKETS,
+)
+ASR_CHUNK_SECONDS = Histogram(
+    "justitia_asr_chunk_duration_seconds", "Speech-to-text time per audio chunk",
+    ["engine"], buckets=SLOW_BUCKETS,
+)
+IMAGE_COMPRESS_SECONDS = Histogram(
+    "justitia_image_compress_duration_seconds", "Time spent shrinking images to fit provider limits",
+    ["provider"], buckets=FAST_BUCKETS,
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "justitia_db_query_duration_seconds", "Database statement execution time",
+    ["statement"], buckets=FAST_BUCKETS,
+)
+
+CACHE_REQUESTS = Counter(
+    "justitia_cache_requests_total", "Hot-read cache lookups",
+    ["cache", "result"],
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the duration of the block, labelled as given."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        (histogram.labels(**labels) if labels else histogram).observe(elapsed)
+
+
+def record_rate_limit(provider: str) -> None:
+    PROVIDER_RATE_LIMITED.labels(provider).inc()
+
+
+def record_retry(provider: str, reason: str) -> None:
+    PROVIDER_RETRIES.labels(provider, reason).inc()
+    llm_usage.record_retry()
+
+
+def record_cache(key: str, hit: bool) -> None:
+    # Label by key family ("case", "sample-cases"), never by the full key
+    CACHE_REQUESTS.labels(key.split(":", 1)[0], "hit" if hit else "miss").inc()
+
+
+def error_outcome(result) -> Optional[str]:
+    """Classify a provider's {"error": ...} result; None when it succeeded."""
+    if not isinstance(result, dict) or "error" not in result:
+        return None
+    message = str(result["error"])
+    if "parse JSON" in message:
+        return "invalid_json"
+    if "429" in message or "Quota" in message or "ResourceExhausted" in message:
+        return "rate_limited"
+    return "error"
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on an (async) engine via cursor events."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        if verb not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+            verb = "OTHER"
+        DB_QUERY_SECONDS.labels(verb).observe(time.perf_counter() - starts.pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # Failed statements never reach after_cursor_execute; keep the stack balanced
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency per route template (/cases/{case_id},
+    not /cases/17) so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status["code"]),
+            ).observe(time.perf_counter() - start)
+
+
+def render_latest():
+    """Body and content type for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
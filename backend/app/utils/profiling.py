@@ -0,0 +1,319 @@
+"""
+On-demand profiling of live requests, and tracemalloc snapshots.
+
+Per-request profiling is only installed when PROFILING_ENABLED is set, and
+then only profiles requests carrying a valid X-Admin-Key plus either an
+X-Profile header or a ?profile= query parameter:
+
+    cprofile - deterministic cProfile of the request (pstats file)
+    sample   - stack sampling every PROFILE_SAMPLE_INTERVAL_MS (collapsed stacks,
+               the input format of flamegraph.pl / speedscope)
+
+The profile is stored under PROFILE_DIR and its id returned in X-Profile-Id;
+fetch it from /admin/profiles/{id}. Both profilers see the whole event-loop
+thread, so requests running concurrently show up in the profile too - profile
+on a quiet worker for clean numbers. One request is profiled at a time; a
+profile request arriving while another runs is served unprofiled.
+
+Only the event-loop thread is profiled. Work handed to asyncio.to_thread or a
+process pool (CloudQwen image compression, image normalization and hashing,
+video keyframe extraction) runs elsewhere and shows up only as the await that
+waits for it; profile those functions directly, e.g. with the benchmarks.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+from urllib.parse import parse_qs
+from app.config import settings
+
+PROFILE_MODES = ("cprofile", "sample")
+
+_tracemalloc_baseline: Optional[tracemalloc.Snapshot] = None
+
+# cProfile allows one active profiler per thread; overlapping requests would clash
+_profiling = threading.Lock()
+
+
+def _authorized(scope) -> bool:
+    if not settings.ADMIN_API_KEY:
+        return False
+    for name, value in scope.get("headers", []):
+        if name == b"x-admin-key":
+            return secrets.compare_digest(value.decode("latin-1"), settings.ADMIN_API_KEY)
+    return False
+
+
+def _requested_mode(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-profile":
+            mode = value.decode("latin-1").strip().lower()
+            return mode if mode in PROFILE_MODES else None
+    if scope.get("query_string"):
+        mode = parse_qs(scope["query_string"].decode("latin-1")).get("profile", [None])[0]
+        return mode if mode in PROFILE_MODES else None
+    return None
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        super().__init__(daemon=True, name="profile-sampler")
+        self.thread_id = thread_id
+        self.interval = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def _profile_path(profile_id: str, extension: str) -> str:
+    return os.path.join(settings.PROFILE_DIR, f"{profile_id}.{extension}")
+
+
+def _prune_profiles() -> None:
+    """Keep only the newest PROFILE_MAX_FILES profiles."""
+    entries = sorted(
+        (e for e in os.scandir(settings.PROFILE_DIR) if e.name.endswith(".json")),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in entries[settings.PROFILE_MAX_FILES:]:
+        profile_id = entry.name[:-len(".json")]
+        for extension in ("json", "prof", "folded"):
+            try:
+                os.remove(_profile_path(profile_id, extension))
+            except FileNotFoundError:
+                pass
+
+
+def _save(profile_id: str, mode: str, scope, status: int, elapsed: float, profiler) -> None:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    meta = {
+        "id": profile_id,
+        "mode": mode,
+        "method": scope["method"],
+        "path": scope["path"],
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "duration_seconds": round(elapsed, 4),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if mode == "cprofile":
+        profiler.dump_stats(_profile_path(profile_id, "prof"))
+    else:
+        meta["samples"] = profiler.samples
+        meta["interval_ms"] = settings.PROFILE_SAMPLE_INTERVAL_MS
+        with open(_profile_path(profile_id, "folded"), "w") as f:
+            f.write(profiler.folded())
+    with open(_profile_path(profile_id, "json"), "w") as f:
+        json.dump(meta, f)
+    _prune_profiles()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware; requests without an authorized profile flag pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        mode = _requested_mode(scope)
+        if mode is None or not _authorized(scope):
+            return await self.app(scope, receive, send)
+        if not _profiling.acquire(blocking=False):
+            print(f"[Profiling] Busy, serving {scope['method']} {scope['path']} unprofiled")
+            return await self.app(scope, receive, send)
+        try:
+            await self._profiled(mode, scope, receive, send)
+        finally:
+            _profiling.release()
+
+    async def _profiled(self, mode: str, scope, receive, send):
+        profile_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = _StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            profiler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if mode == "cprofile":
+                profiler.disable()
+            else:
+                profiler.stop()
+            try:
+                _save(profile_id, mode, scope, status["code"], elapsed, profiler)
+                print(f"[Profiling] {mode} profile {profile_id} for {scope['method']} {scope['path']} ({elapsed:.3f}s)")
+            except Exception as e:
+                print(f"[Profiling] Failed to save profile {profile_id}: {e}")
+
+
+def _valid_id(profile_id: str) -> bool:
+    return bool(profile_id) and all(c.isalnum() or c in "-T" for c in profile_id)
+
+
+def list_profiles() -> List[dict]:
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(settings.PROFILE_DIR):
+        if entry.name.endswith(".json"):
+            with open(entry.path) as f:
+                profiles.append(json.load(f))
+    return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+
+def load_profile(profile_id: str) -> Optional[dict]:
+    """Profile metadata plus the path of its data file, or None."""
+    if not _valid_id(profile_id):
+        return None
+    try:
+        with open(_profile_path(profile_id, "json")) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return None
+    meta["data_path"] = _profile_path(profile_id, "prof" if meta["mode"] == "cprofile" else "folded")
+    return meta
+
+
+def render_profile(meta: dict, sort: str = "cumulative", limit: int = 50, match: Optional[str] = None) -> str:
+    """
+    Text view of a stored profile: pstats output for cProfile (optionally restricted
+    to functions matching a regex, e.g. "pdf_service|cloudqwen"), or the heaviest
+    collapsed stacks for sampled profiles.
+    """
+    if meta["mode"] == "cprofile":
+        stream = io.StringIO()
+        stats = pstats.Stats(meta["data_path"], stream=stream).strip_dirs().sort_stats(sort)
+        restrictions = [match, limit] if match else [limit]
+        stats.print_stats(*restrictions)
+        return stream.getvalue()
+    with open(meta["data_path"]) as f:
+        lines = [line for line in f.read().splitlines() if not match or re.search(match, line)]
+    return "\n".join(lines[:limit])
+
+
+# --- tracemalloc ---
+
+def tracemalloc_status() -> dict:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else None,
+        "traced_bytes": current,
+        "peak_traced_bytes": peak,
+        "has_baseline": _tracemalloc_baseline is not None,
+    }
+
+
+def start_tracemalloc(frames: int) -> dict:
+    """Start tracing allocations. Costs memory and CPU on every allocation until stopped."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracemalloc_status()
+
+
+def stop_tracemalloc() -> dict:
+    global _tracemalloc_baseline
+    _tracemalloc_baseline = None
+    tracemalloc.stop()
+    return tracemalloc_status()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def _describe(stat, group_by: str) -> dict:
+    entry = {
+        "size_bytes": stat.size,
+        "count": stat.count,
+        "location": str(stat.traceback[0]) if group_by != "traceback" else None,
+    }
+    if group_by == "traceback":
+        entry["traceback"] = stat.traceback.format()
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_bytes"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+def top_allocations(limit: int = 20, group_by: str = "lineno", set_baseline: bool = False) -> dict:
+    """Largest live allocations right now. Blocking; call through a thread."""
+    global _tracemalloc_baseline
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running")
+    snapshot = _snapshot()
+    if set_baseline:
+        _tracemalloc_baseline = snapshot
+    stats = snapshot.statistics(group_by)
+    return {
+        **tracemalloc_status(),
+        "total_bytes": sum(stat.size for stat in stats),
+        "top": [_describe(stat, group_by) for stat in stats[:limit]],
+    }
+
+
+def diff_allocations(limit: int = 20, group_by: str = "lineno") -> dict:
+    """Biggest growth since the baseline snapshot. Blocking; call through a thread."""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running")
+    if _tracemalloc_baseline is None:
+        raise RuntimeError("No baseline snapshot; take one first")
+    stats = _snapshot().compare_to(_tracemalloc_baseline, group_by)
+    return {
+        **tracemalloc_status(),
+        "total_diff_bytes": sum(stat.size_diff for stat in stats),
+        "top": [_describe(stat, group_by) for stat in stats[:limit]],
+    }
@@ -1,10 +1,17 @@
 import os
+import shutil
+import asyncio
 import aiofiles
 import httpx
 from fastapi import UploadFile
 from app.config import settings
+from typing import List, Optional
 import uuid
 
+# Supabase bulk delete accepts a list of prefixes; keep each request reasonably small
+SUPABASE_DELETE_BATCH_SIZE = 1000
+SUPABASE_LIST_PAGE_SIZE = 1000
+
 # Ensure base storage directory exists (for local storage)
 os.makedirs(settings.STORAGE_DIR, exist_ok=True)
 
@@ -80,6 +87,37 @@ async def upload_to_supabase(file: UploadFile, case_id: int, subfolder: str = ""
     return public_url
 
 
+async def save_bytes(content: bytes, case_id: int, subfolder: str, extension: str, content_type: str) -> str:
+    """
+    Stores generated content (no UploadFile) under the same layout as uploads,
+    on whichever backend is configured.
+    Returns: The file path (local) or public URL (Supabase).
+    """
+    unique_filename = f"{uuid.uuid4()}{extension}"
+    
+    if settings.STORAGE_BACKEND != "supabase":
+        target_dir = os.path.join(settings.STORAGE_DIR, "cases", str(case_id), subfolder)
+        os.makedirs(target_dir, exist_ok=True)
+        file_path = os.path.join(target_dir, unique_filename)
+        async with aiofiles.open(file_path, 'wb') as out_file:
+            await out_file.write(content)
+        return file_path
+    
+    if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+        raise ValueError("Supabase not configured. Set SUPABASE_URL and SUPABASE_KEY.")
+    storage_path = f"cases/{case_id}/{subfolder}/{unique_filename}"
+    url = f"{settings.SUPABASE_URL}/storage/v1/object/{settings.SUPABASE_BUCKET}/{storage_path}"
+    headers = {
+        "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+        "Content-Type": content_type,
+    }
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        response = await client.post(url, content=content, headers=headers)
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Supabase upload failed: {response.status_code} - {response.text}")
+    return f"{settings.SUPABASE_URL}/storage/v1/object/public/{settings.SUPABASE_BUCKET}/{storage_path}"
+
+
 def is_url(path: str) -> bool:
     """Check if a path is a URL (for determining storage type)."""
     return path.startswith("http://") or path.startswith("https://")
@@ -102,31 +140,179 @@ async def read_file_content(path: str) -> bytes:
             return await f.read()
 
 
+def supabase_storage_path(path: str) -> Optional[str]:
+    """
+    Convert a stored Supabase public URL into a bucket-relative storage path.
+    Plain storage paths are returned unchanged.
+    """
+    if is_url(path):
+        # URL format: https://xxx.supabase.co/storage/v1/object/public/{bucket}/{path}
+        parts = path.split(f"/storage/v1/object/public/{settings.SUPABASE_BUCKET}/")
+        if len(parts) == 2:
+            return parts[1]
+        return None
+    return path
+
+
+def _supabase_headers() -> dict:
+    return {"Authorization": f"Bearer {settings.SUPABASE_KEY}"}
+
+
 async def delete_from_supabase(path: str) -> bool:
     """Delete a file from Supabase Storage using REST API."""
     if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
         return False
     
-    # Extract storage path from URL if needed
-    if is_url(path):
-        # Parse URL to get storage path
-        # URL format: https://xxx.supabase.co/storage/v1/object/public/{bucket}/{path}
-        parts = path.split(f"/storage/v1/object/public/{settings.SUPABASE_BUCKET}/")
-        if len(parts) == 2:
-            storage_path = parts[1]
-        else:
-            return False
-    else:
-        storage_path = path
+    storage_path = supabase_storage_path(path)
+    if storage_path is None:
+        return False
     
     url = f"{settings.SUPABASE_URL}/storage/v1/object/{settings.SUPABASE_BUCKET}/{storage_path}"
-    headers = {
-        "Authorization": f"Bearer {settings.SUPABASE_KEY}",
-    }
     
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.delete(url, headers=headers)
+            response = await client.delete(url, headers=_supabase_headers())
             return response.status_code in [200, 204]
     except Exception:
         return False
+
+
+async def bulk_delete_from_supabase(paths: List[str]) -> int:
+    """
+    Delete many objects from Supabase Storage, batching them into as few
+    requests as possible. Accepts public URLs or storage paths.
+    Returns: Number of objects Supabase reported as deleted.
+    """
+    if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+        return 0
+    
+    storage_paths = [p for p in (supabase_storage_path(path) for path in paths) if p]
+    if not storage_paths:
+        return 0
+    
+    url = f"{settings.SUPABASE_URL}/storage/v1/object/{settings.SUPABASE_BUCKET}"
+    deleted = 0
+    
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        for start in range(0, len(storage_paths), SUPABASE_DELETE_BATCH_SIZE):
+            batch = storage_paths[start:start + SUPABASE_DELETE_BATCH_SIZE]
+            try:
+                response = await client.request("DELETE", url, json={"prefixes": batch}, headers=_supabase_headers())
+                if response.status_code in [200, 204]:
+                    deleted += len(response.json()) if response.content else len(batch)
+                else:
+                    print(f"Supabase bulk delete failed: {response.status_code} - {response.text}")
+            except Exception as e:
+                print(f"Supabase bulk delete failed: {e}")
+    
+    return deleted
+
+
+async def list_supabase_objects(prefix: str) -> List[dict]:
+    """
+    Recursively list all objects under a prefix in the Supabase bucket.
+    Returns: List of {"path", "size", "created_at"} dicts (folders are expanded, not returned).
+    """
+    if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+        return []
+    
+    url = f"{settings.SUPABASE_URL}/storage/v1/object/list/{settings.SUPABASE_BUCKET}"
+    objects = []
+    pending = [prefix.strip("/")]
+    
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        while pending:
+            folder = pending.pop()
+            offset = 0
+            while True:
+                response = await client.post(
+                    url,
+                    json={"prefix": folder, "limit": SUPABASE_LIST_PAGE_SIZE, "offset": offset},
+                    headers=_supabase_headers()
+                )
+                response.raise_for_status()
+                entries = response.json()
+                
+                for entry in entries:
+                    entry_path = f"{folder}/{entry['name']}" if folder else entry["name"]
+                    if entry.get("id") is None:
+                        # Folders have no object id - descend into them
+                        pending.append(entry_path)
+                    else:
+                        metadata = entry.get("metadata") or {}
+                        objects.append({
+                            "path": entry_path,
+                            "size": metadata.get("size", 0),
+                            "created_at": entry.get("created_at"),
+                        })
+                
+                if len(entries) < SUPABASE_LIST_PAGE_SIZE:
+                    break
+                offset += SUPABASE_LIST_PAGE_SIZE
+    
+    return objects
+
+
+def local_case_dir(case_id: int) -> str:
+    """Local directory holding all files for a case."""
+    return os.path.join(settings.STORAGE_DIR, "cases", str(case_id))
+
+
+def _remove_tree(path: str) -> int:
+    """Remove a directory tree and return the number of bytes freed. Blocking."""
+    freed = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                freed += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    shutil.rmtree(path, ignore_errors=True)
+    return freed
+
+
+def remove_local_file(path: str) -> int:
+    """Remove a single local file and return the number of bytes freed. Blocking."""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+
+
+async def delete_file(path: str) -> None:
+    """Delete a single stored file from whichever backend holds it."""
+    if is_url(path):
+        await delete_from_supabase(path)
+    else:
+        await asyncio.to_thread(remove_local_file, path)
+
+
+async def delete_case_files(case_id: int, file_paths: List[str]) -> int:
+    """
+    Delete every stored file for a case, including files that were uploaded
+    but never committed to the database.
+    Returns: Number of bytes reclaimed (local storage only; Supabase sizes are
+    only known when listing).
+    """
+    freed = 0
+    
+    # Local storage: the whole case directory goes, off the event loop
+    case_dir = local_case_dir(case_id)
+    if os.path.exists(case_dir):
+        freed += await asyncio.to_thread(_remove_tree, case_dir)
+    
+    # Supabase: delete the known objects plus anything else under the case prefix
+    remote_paths = [p for p in file_paths if is_url(p)]
+    if settings.STORAGE_BACKEND == "supabase" or remote_paths:
+        try:
+            listed = await list_supabase_objects(f"cases/{case_id}")
+        except Exception as e:
+            print(f"Failed to list Supabase objects for case {case_id}: {e}")
+            listed = []
+        freed += sum(obj["size"] or 0 for obj in listed)
+        targets = {supabase_storage_path(p) for p in remote_paths} | {obj["path"] for obj in listed}
+        await bulk_delete_from_supabase([p for p in targets if p])
+    
+    return freed
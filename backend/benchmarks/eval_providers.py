@@ -0,0 +1,388 @@
+"""
+Runs the same corpus of reports and evidence images through several providers/models
+and compares latency, token throughput, JSON-parse and schema success, and how much
+the extracted claims and observations agree between them.
+
+    cd backend
+    python -m benchmarks.eval_providers --target fake --target fake:variant-b --target ollama:qwen2.5:7b|llava
+    python -m benchmarks.eval_providers --target gemini --target cloudqwen --corpus ./corpus --repeat 3
+
+Targets are "provider", "provider:text_model" or "provider:text_model|vision_model"
+(leave a model empty for the provider's default, e.g. "ollama:|llava"). Only the first
+":" separates the provider, so ollama tags work: "ollama:qwen2.5:7b|llava".
+
+The corpus directory holds report files (.pdf, .txt) and images (.jpg, .jpeg, .png,
+.webp); without --corpus a small synthetic one is generated. Writes JSON plus a
+Markdown summary under benchmarks/results/.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks.fixtures import make_report_pdf, make_evidence_jpeg, summarize, git_commit
+
+REPORT_EXTENSIONS = (".pdf", ".txt")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+OPERATIONS = ("narrative", "vision")
+
+_STOPWORDS = {
+    "the", "and", "a", "an", "of", "to", "in", "on", "at", "by", "with", "from", "his", "her",
+    "their", "its", "was", "were", "is", "are", "be", "been", "that", "this", "for", "into",
+}
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def parse_target(spec: str) -> dict:
+    """"provider[:text_model[|vision_model]]" -> {"provider", "text_model", "vision_model", "label"}."""
+    provider, _, models = spec.partition(":")
+    text_model, _, vision_model = models.partition("|")
+    return {
+        "label": spec,
+        "provider": provider.lower(),
+        "text_model": text_model or None,
+        "vision_model": vision_model or None,
+    }
+
+
+def _build_pinned_model():
+    from app.services.base_provider import BaseAIProvider
+
+    class PinnedModel(BaseAIProvider):
+        """Passes fixed text/vision model names to a provider that would otherwise use its defaults."""
+
+        def __init__(self, inner, text_model: Optional[str], vision_model: Optional[str]):
+            self.inner = inner
+            self.name = inner.name
+            self.text_model = text_model
+            self.vision_model = vision_model
+
+        def model_name_for(self, operation: str) -> str:
+            pinned = self.vision_model if operation == "vision" else self.text_model
+            return pinned or self.inner.model_name_for(operation)
+
+        async def generate_json(self, prompt, model_name=None) -> dict:
+            return await self.inner.generate_json(prompt, model_name or self.text_model)
+
+        async def analyze_image(self, image_path, prompt, model_name=None) -> dict:
+            return await self.inner.analyze_image(image_path, prompt, model_name or self.vision_model)
+
+        def vision_batch_limits(self):
+            return self.inner.vision_batch_limits()
+
+        async def analyze_images(self, images, prompt, model_name=None) -> dict:
+            return await self.inner.analyze_images(images, prompt, model_name or self.vision_model)
+
+        async def generate_content(self, prompt, model_name=None) -> str:
+            return await self.inner.generate_content(prompt, model_name or self.text_model)
+
+    return PinnedModel
+
+
+def load_corpus(directory: str) -> Dict[str, List[str]]:
+    corpus = {"reports": [], "images": []}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        lower = name.lower()
+        if lower.endswith(REPORT_EXTENSIONS):
+            corpus["reports"].append(path)
+        elif lower.endswith(IMAGE_EXTENSIONS):
+            corpus["images"].append(path)
+    return corpus
+
+
+def generate_corpus(directory: str, reports: int, images: int, seed: int) -> None:
+    for i in range(reports):
+        with open(os.path.join(directory, f"report_{i:03d}.pdf"), "wb") as f:
+            f.write(make_report_pdf(seed + i))
+    for i in range(images):
+        with open(os.path.join(directory, f"evidence_{i:03d}.jpg"), "wb") as f:
+            f.write(make_evidence_jpeg(seed * 100 + i))
+
+
+def _words(*values) -> set:
+    words = set()
+    for value in values:
+        if value:
+            words.update(w for w in _WORD.findall(str(value).lower()) if w not in _STOPWORDS)
+    return words
+
+
+def features(operation: str, result: dict) -> set:
+    """What two providers should agree on: the words naming who did what to what, or what was seen."""
+    if operation == "narrative":
+        return set().union(*(_words(c.get("entity"), c.get("action"), c.get("object")) for c in result.get("timeline", [])))
+    return set().union(*(_words(o.get("category"), o.get("entity"), o.get("label")) for o in result.get("observations", [])))
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+async def evaluate_target(target: dict, corpus: dict, texts: Dict[str, str], args) -> dict:
+    from app import schemas
+    from app.services.model_factory import get_provider
+    from app.services.agent_narrative import AgentNarrative
+    from app.services.agent_vision import AgentVision
+    from app.utils import metrics, llm_usage
+
+    calls: List[dict] = []
+    outputs: Dict[str, dict] = {}  # first schema-valid result per corpus item
+
+    try:
+        provider = get_provider(target["provider"])
+    except Exception as e:
+        return {"target": target, "error": f"Could not create provider: {e}", "calls": [], "outputs": {}}
+    if target["text_model"] or target["vision_model"]:
+        provider = _build_pinned_model()(provider, target["text_model"], target["vision_model"])
+
+    narrative_agent = AgentNarrative(provider)
+    vision_agent = AgentVision(provider)
+    result_schemas = {"narrative": schemas.NarrativeAnalysisResult, "vision": schemas.VisionAnalysisResult}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(operation: str, item: str):
+        async with semaphore:
+            usage = llm_usage.CallUsage()
+            token = llm_usage.current_call.set(usage)
+            start = time.perf_counter()
+            try:
+                if operation == "narrative":
+                    result = await narrative_agent.extract_claims(texts[item])
+                else:
+                    result = await vision_agent.analyze_evidence(item)
+                outcome = metrics.error_outcome(result) or "ok"
+            except Exception as e:
+                result, outcome = {"error": str(e)}, "exception"
+            finally:
+                elapsed = time.perf_counter() - start
+                llm_usage.current_call.reset(token)
+
+        if outcome == "ok":
+            try:
+                parsed = result_schemas[operation].model_validate(result).model_dump()
+                outputs.setdefault(item, parsed)
+            except Exception:
+                outcome = "schema_invalid"
+        calls.append({
+            "operation": operation,
+            "item": os.path.basename(item),
+            "latency_seconds": elapsed,
+            "outcome": outcome,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+        })
+
+    jobs = [("narrative", path) for path in corpus["reports"]] + [("vision", path) for path in corpus["images"]]
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(op, item) for _ in range(args.repeat) for op, item in jobs))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "target": target,
+        "provider": provider.name,
+        "models": {"text": provider.model_name_for("text"), "vision": provider.model_name_for("vision")},
+        "wall_seconds": wall,
+        "calls": calls,
+        "outputs": outputs,
+    }
+
+
+def summarize_target(run: dict) -> dict:
+    summary = {"target": run["target"]["label"], "provider": run.get("provider"), "models": run.get("models")}
+    if run.get("error"):
+        summary["error"] = run["error"]
+        return summary
+    for operation in OPERATIONS:
+        calls = [c for c in run["calls"] if c["operation"] == operation]
+        if not calls:
+            continue
+        outcomes = defaultdict(int)
+        for c in calls:
+            outcomes[c["outcome"]] += 1
+        parsed = [c for c in calls if c["outcome"] in ("ok", "schema_invalid")]
+        completion = sum(c["completion_tokens"] or 0 for c in calls)
+        busy = sum(c["latency_seconds"] for c in calls)
+        summary[operation] = {
+            "calls": len(calls),
+            "outcomes": dict(outcomes),
+            "json_parse_rate": round(len(parsed) / len(calls), 3),
+            "schema_valid_rate": round(outcomes["ok"] / len(calls), 3),
+            "latency_seconds": summarize([c["latency_seconds"] for c in calls]),
+            "prompt_tokens": sum(c["prompt_tokens"] or 0 for c in calls),
+            "completion_tokens": completion,
+            # Output tokens per second of model time, and calls per second of wall time
+            "completion_tokens_per_second": round(completion / busy, 1) if busy and completion else None,
+            "calls_per_second": round(len(calls) / run["wall_seconds"], 2) if run["wall_seconds"] else None,
+        }
+    return summary
+
+
+def agreement(runs: List[dict], corpus: dict) -> Dict[str, List[dict]]:
+    """Mean Jaccard similarity of extracted features for every pair of targets, per operation."""
+    items = {"narrative": corpus["reports"], "vision": corpus["images"]}
+    pairs: Dict[str, List[dict]] = {}
+    usable = [r for r in runs if not r.get("error")]
+    for operation in OPERATIONS:
+        pairs[operation] = []
+        for a, b in itertools.combinations(usable, 2):
+            scores = [
+                jaccard(features(operation, a["outputs"][item]), features(operation, b["outputs"][item]))
+                for item in items[operation]
+                if item in a["outputs"] and item in b["outputs"]
+            ]
+            pairs[operation].append({
+                "a": a["target"]["label"],
+                "b": b["target"]["label"],
+                "items_compared": len(scores),
+                "mean_jaccard": round(sum(scores) / len(scores), 3) if scores else None,
+            })
+    return pairs
+
+
+def recommend(summaries: List[dict], min_success: float) -> Dict[str, Optional[str]]:
+    """Fastest target (p95) per operation among those meeting the schema-valid threshold."""
+    picks = {}
+    for operation in OPERATIONS:
+        eligible = [
+            s for s in summaries
+            if operation in s and s[operation]["schema_valid_rate"] >= min_success
+        ]
+        best = min(eligible, key=lambda s: s[operation]["latency_seconds"]["p95"], default=None)
+        picks[operation] = best["target"] if best else None
+    return picks
+
+
+def _cell(value) -> str:
+    return str(value).replace("|", "\\|")
+
+
+def render_markdown(report: dict) -> str:
+    lines = [
+        "# Provider evaluation",
+        "",
+        f"{report['timestamp']} - commit {report['git_commit'] or 'unknown'} - "
+        f"{report['corpus']['reports']} reports, {report['corpus']['images']} images, repeat {report['config']['repeat']}",
+        "",
+    ]
+    for operation in OPERATIONS:
+        lines += [
+            f"## {operation.capitalize()}",
+            "",
+            "| target | model | calls | JSON ok | schema ok | p50 s | p95 s | out tok/s | calls/s |",
+            "|---|---|---|---|---|---|---|---|---|",
+        ]
+        for s in report["targets"]:
+            if s.get("error"):
+                lines.append(f"| {_cell(s['target'])} | - | - | - | - | - | - | - | {_cell(s['error'])} |")
+                continue
+            if operation not in s:
+                continue
+            m = s[operation]
+            model = s["models"]["vision" if operation == "vision" else "text"]
+            lines.append(
+                f"| {_cell(s['target'])} | {_cell(model)} | {m['calls']} | {m['json_parse_rate']:.0%} | {m['schema_valid_rate']:.0%} "
+                f"| {m['latency_seconds']['p50']:.2f} | {m['latency_seconds']['p95']:.2f} "
+                f"| {m['completion_tokens_per_second'] or '-'} | {m['calls_per_second'] or '-'} |"
+            )
+        if report["agreement"][operation]:
+            lines += ["", "| agreement (mean Jaccard) | items | score |", "|---|---|---|"]
+            for pair in report["agreement"][operation]:
+                score = "-" if pair["mean_jaccard"] is None else f"{pair['mean_jaccard']:.2f}"
+                lines.append(f"| {_cell(pair['a'])} vs {_cell(pair['b'])} | {pair['items_compared']} | {score} |")
+        pick = report["recommendation"][operation]
+        lines += ["", f"Suggested {operation} route: **{_cell(pick or 'none meets the success threshold')}**", ""]
+    return "\n".join(lines)
+
+
+async def run(args, corpus: dict) -> dict:
+    from app.services import fake_service
+    from app.services.pdf_service import PDFService
+
+    fake_service.reset_rng(args.seed)
+    texts = {}
+    for path in corpus["reports"]:
+        if path.lower().endswith(".txt"):
+            with open(path) as f:
+                texts[path] = f.read()
+        else:
+            texts[path] = await PDFService.extract_text(path)
+
+    targets = [parse_target(spec) for spec in args.target]
+    runs = await asyncio.gather(*(evaluate_target(t, corpus, texts, args) for t in targets))
+    summaries = [summarize_target(r) for r in runs]
+    return {
+        "benchmark": "eval_providers",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {"repeat": args.repeat, "concurrency": args.concurrency, "seed": args.seed, "min_success": args.min_success},
+        "corpus": {"reports": len(corpus["reports"]), "images": len(corpus["images"])},
+        "targets": summaries,
+        "agreement": agreement(runs, corpus),
+        "recommendation": recommend(summaries, args.min_success),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True, help="provider[:text_model[|vision_model]], repeatable")
+    parser.add_argument("--corpus", help="Directory of reports and images (default: generate a synthetic one)")
+    parser.add_argument("--reports", type=int, default=5, help="Synthetic reports to generate")
+    parser.add_argument("--images", type=int, default=5, help="Synthetic images to generate")
+    parser.add_argument("--repeat", type=int, default=1, help="Times each item is sent to each target")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight per target")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--min-success", type=float, default=0.95, help="Schema-valid rate a target needs to be suggested")
+    parser.add_argument("--output", help="Result JSON path (default benchmarks/results/eval_providers-<time>.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # The harness measures calls itself; keep the app's metrics and ledger out of the way
+    os.environ.setdefault("METRICS_ENABLED", "false")
+    os.environ.setdefault("LLM_LEDGER_ENABLED", "false")
+
+    temp_corpus = None
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        temp_corpus = tempfile.mkdtemp(prefix="justitia-eval-")
+        generate_corpus(temp_corpus, args.reports, args.images, args.seed)
+        corpus = load_corpus(temp_corpus)
+
+    try:
+        report = asyncio.run(run(args, corpus))
+    finally:
+        if temp_corpus:
+            shutil.rmtree(temp_corpus, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"eval_providers-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    markdown = render_markdown(report)
+    with open(os.path.splitext(output)[0] + ".md", "w") as f:
+        f.write(markdown)
+
+    print(markdown)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Deterministic inputs and result helpers shared by the benchmark scripts."""
+import io
+import math
+import random
+import resource
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+_SUBJECTS = ["Suspect", "Officer Reyes", "Officer Chen", "The driver", "A witness", "The passenger"]
+_ACTIONS = ["produced", "reached toward", "raised", "dropped", "pointed", "concealed", "handed over"]
+_OBJECTS = ["a black firearm", "a cell phone", "a set of keys", "a flashlight", "a wallet", "a knife", "a bag"]
+_PLACES = ["near the vehicle", "by the curb", "at the doorway", "on the sidewalk", "inside the car"]
+
+
+def report_text(seed: int, sentences: int = 8) -> str:
+    """A small police-report style narrative with timestamps."""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(sentences):
+        minute, second = divmod(20 + i * rng.randint(5, 40), 60)
+        lines.append(
+            f"At {minute:02d}:{second:02d} {rng.choice(_SUBJECTS)} {rng.choice(_ACTIONS)} "
+            f"{rng.choice(_OBJECTS)} {rng.choice(_PLACES)}."
+        )
+    return " ".join(lines)
+
+
+def make_report_pdf(seed: int, sentences: int = 8) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(72, 72, 540, 770), report_text(seed, sentences), fontsize=11)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_evidence_jpeg(seed: int, size=(640, 480)) -> bytes:
+    """A noisy gradient with a few shapes - enough detail to be a realistic JPEG size."""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    base = tuple(rng.randint(0, 255) for _ in range(3))
+    image = Image.new("RGB", size, base)
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x0, y0 = rng.randint(0, size[0]), rng.randint(0, size[1])
+        x1, y1 = x0 + rng.randint(20, 200), y0 + rng.randint(20, 200)
+        draw.rectangle((x0, y0, x1, y1), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower, upper = math.floor(position), math.ceil(position)
+    if lower == upper:
+        return sorted_values[lower]
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 4) if ordered else 0.0,
+        "p50": round(percentile(ordered, 0.50), 4),
+        "p95": round(percentile(ordered, 0.95), 4),
+        "p99": round(percentile(ordered, 0.99), 4),
+        "max": round(ordered[-1], 4) if ordered else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
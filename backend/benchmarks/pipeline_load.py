@@ -0,0 +1,281 @@
+"""
+End-to-end load test of the case pipeline, by default against the fake AI provider.
+
+Drives the FastAPI app in-process (no server, no model) through
+create case -> upload report -> upload evidence -> narrative -> vision ->
+synthesize -> fetch case, many cases at a time, and writes a JSON report:
+
+    cd backend
+    python -m benchmarks.pipeline_load --cases 50 --concurrency 10
+    python -m benchmarks.pipeline_load --cases 50 --concurrency 10 --compare benchmarks/results/baseline.json
+
+Uses the database from DATABASE_URL / .env (the cases it creates are deleted
+afterwards unless --keep-cases) and a throwaway STORAGE_DIR.
+
+To measure against real model outputs without network access, record the same
+seeded run once against a real provider, then replay it:
+
+    python -m benchmarks.pipeline_load --provider gemini --cassette-mode record --cassette-dir cassettes/bench
+    python -m benchmarks.pipeline_load --provider gemini --cassette-mode replay --cassette-dir cassettes/bench
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks.fixtures import make_report_pdf, make_evidence_jpeg, summarize, peak_rss_mb, git_commit
+
+STEPS = ["create_case", "upload_report", "upload_evidence", "narrative", "vision", "synthesize", "get_case"]
+
+# (metric path, higher is better) pairs checked by --compare
+COMPARED_METRICS = [
+    (("throughput_pipelines_per_second",), True),
+    (("latency_seconds", "pipeline", "p50"), False),
+    (("latency_seconds", "pipeline", "p95"), False),
+    (("latency_seconds", "pipeline", "p99"), False),
+    *((("latency_seconds", step, "p95"), False) for step in STEPS),
+    (("db", "queries_per_pipeline"), False),
+    (("memory", "peak_rss_mb"), False),
+]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.case_ids: List[int] = []
+
+    async def call(self, step: str, request):
+        start = time.perf_counter()
+        response = await request
+        self.latencies[step].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[step] += 1
+            raise RuntimeError(f"{step} failed with {response.status_code}: {response.text[:200]}")
+        return response
+
+
+async def run_pipeline(client, recorder: Recorder, seed: int, images: int) -> None:
+    start = time.perf_counter()
+    response = await recorder.call("create_case", client.post("/cases", json={
+        "title": f"Benchmark case {seed}", "description": "pipeline_load benchmark",
+    }))
+    case_id = response.json()["id"]
+    recorder.case_ids.append(case_id)
+
+    await recorder.call("upload_report", client.post(
+        f"/upload/report/{case_id}", files={"file": ("report.pdf", make_report_pdf(seed), "application/pdf")}
+    ))
+    for i in range(images):
+        await recorder.call("upload_evidence", client.post(
+            f"/upload/evidence/{case_id}",
+            files={"file": (f"evidence_{i}.jpg", make_evidence_jpeg(seed * 100 + i), "image/jpeg")},
+        ))
+
+    await recorder.call("narrative", client.post(f"/analyze/case/{case_id}/narrative"))
+    await recorder.call("vision", client.post(f"/analyze/case/{case_id}/evidence"))
+    await recorder.call("synthesize", client.post(f"/analyze/case/{case_id}/synthesize"))
+    await recorder.call("get_case", client.get(f"/cases/{case_id}"))
+    recorder.latencies["pipeline"].append(time.perf_counter() - start)
+
+
+async def run_benchmark(args) -> dict:
+    import httpx
+    from sqlalchemy import event
+    from app.main import app
+    from app.database import engine
+    from app.config import settings
+    from app.services import fake_service
+
+    # SQL echo would dominate the numbers
+    engine.echo = False
+    fake_service.reset_rng(args.seed)
+
+    query_count = {"n": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_):
+        query_count["n"] += 1
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = 0
+
+    async def one(client, seed):
+        nonlocal failures
+        async with semaphore:
+            try:
+                await run_pipeline(client, recorder, seed, args.images)
+            except Exception as e:
+                failures += 1
+                if failures <= 5:
+                    print(f"[Benchmark] Pipeline {seed} failed: {e}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url=f"http://bench{settings.API_V1_STR}", timeout=None) as client:
+            if args.warmup:
+                # Seeds past the measured range, so warmup inputs never repeat measured ones
+                warmup_seeds = range(args.seed + args.cases, args.seed + args.cases + args.warmup)
+                await asyncio.gather(*(one(client, seed) for seed in warmup_seeds))
+                warm_ids = list(recorder.case_ids)
+                recorder.__init__()
+                recorder.case_ids = warm_ids
+                failures = 0
+
+            queries_before = query_count["n"]
+            wall_start = time.perf_counter()
+            await asyncio.gather(*(one(client, args.seed + i) for i in range(args.cases)))
+            wall = time.perf_counter() - wall_start
+            queries = query_count["n"] - queries_before
+
+            if not args.keep_cases:
+                for case_id in recorder.case_ids:
+                    await client.delete(f"/cases/{case_id}")
+
+    completed = args.cases - failures
+    requests = sum(len(v) for k, v in recorder.latencies.items() if k != "pipeline")
+    return {
+        "benchmark": "pipeline_load",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "config": {
+            "cases": args.cases,
+            "concurrency": args.concurrency,
+            "images": args.images,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "provider": settings.AI_PROVIDER,
+            "cassette_mode": settings.AI_CASSETTE_MODE,
+            "fake_latency_ms": settings.FAKE_LATENCY_MS,
+            "fake_latency_distribution": settings.FAKE_LATENCY_DISTRIBUTION,
+            "fake_latency_spread": settings.FAKE_LATENCY_SPREAD,
+            "fake_failure_rate": settings.FAKE_FAILURE_RATE,
+            "fake_rate_limit_rate": settings.FAKE_RATE_LIMIT_RATE,
+        },
+        "wall_seconds": round(wall, 3),
+        "pipelines": {"completed": completed, "failed": failures},
+        "throughput_pipelines_per_second": round(completed / wall, 3) if wall else 0.0,
+        "requests_per_second": round(requests / wall, 2) if wall else 0.0,
+        "latency_seconds": {
+            name: summarize(recorder.latencies.get(name, [])) for name in ["pipeline", *STEPS]
+        },
+        "errors": dict(recorder.errors),
+        "db": {
+            "queries_total": queries,
+            "queries_per_pipeline": round(queries / args.cases, 1) if args.cases else 0.0,
+        },
+        "memory": {"peak_rss_mb": peak_rss_mb()},
+    }
+
+
+def _lookup(result: dict, path) -> Optional[float]:
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print a side-by-side table; return the metrics that regressed by more than threshold (a fraction)."""
+    regressions = []
+    print(f"\n{'metric':45} {'baseline':>12} {'current':>12} {'change':>9}")
+    for path, higher_is_better in COMPARED_METRICS:
+        old, new = _lookup(baseline, path), _lookup(current, path)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressions.append(".".join(path))
+        print(f"{'.'.join(path):45} {old:12.4f} {new:12.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=20, help="Pipelines to run (one case each)")
+    parser.add_argument("--concurrency", type=int, default=5, help="Pipelines in flight at once")
+    parser.add_argument("--images", type=int, default=2, help="Evidence images per case")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed pipelines run first")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--provider", default="fake", help="AI provider to drive (default: the fake provider)")
+    parser.add_argument("--cassette-mode", choices=["off", "record", "replay", "auto"], help="AI_CASSETTE_MODE override")
+    parser.add_argument("--cassette-dir", help="AI_CASSETTE_DIR override")
+    parser.add_argument("--cassette-latency-scale", type=float, help="AI_CASSETTE_LATENCY_SCALE override")
+    parser.add_argument("--latency-ms", type=float, help="FAKE_LATENCY_MS override")
+    parser.add_argument("--latency-distribution", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--failure-rate", type=float, help="FAKE_FAILURE_RATE override")
+    parser.add_argument("--rate-limit-rate", type=float, help="FAKE_RATE_LIMIT_RATE override")
+    parser.add_argument("--storage-dir", help="Defaults to a temporary directory")
+    parser.add_argument("--keep-cases", action="store_true", help="Don't delete the benchmark cases")
+    parser.add_argument("--output", help="Result JSON path (default benchmarks/results/pipeline_load-<time>.json)")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold for --compare")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # Settings are read at import time, so configure the environment before importing the app
+    os.environ["AI_PROVIDER"] = args.provider
+    overrides = {
+        "AI_CASSETTE_MODE": args.cassette_mode,
+        "AI_CASSETTE_DIR": args.cassette_dir,
+        "AI_CASSETTE_LATENCY_SCALE": args.cassette_latency_scale,
+        "FAKE_LATENCY_MS": args.latency_ms,
+        "FAKE_LATENCY_DISTRIBUTION": args.latency_distribution,
+        "FAKE_FAILURE_RATE": args.failure_rate,
+        "FAKE_RATE_LIMIT_RATE": args.rate_limit_rate,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = str(value)
+    temp_storage = None
+    if args.storage_dir:
+        os.environ["STORAGE_DIR"] = args.storage_dir
+    else:
+        temp_storage = tempfile.mkdtemp(prefix="justitia-bench-")
+        os.environ["STORAGE_DIR"] = temp_storage
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+
+    try:
+        result = asyncio.run(run_benchmark(args))
+    finally:
+        if temp_storage:
+            shutil.rmtree(temp_storage, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"pipeline_load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps({k: result[k] for k in ("pipelines", "throughput_pipelines_per_second", "db", "memory")}, indent=2))
+    print(f"Pipeline latency: {result['latency_seconds']['pipeline']}")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
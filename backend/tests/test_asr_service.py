@@ -0,0 +1,70 @@
+import asyncio
+import wave
+import numpy as np
+import pytest
+from app.config import settings
+from app.services import asr_service
+from app.services.asr_service import SAMPLE_RATE, StubASREngine, iter_chunks, overlap_samples
+
+# (start, end) seconds of each burst of "speech"
+BURSTS = [(1.0, 2.5), (3.5, 4.5), (7.0, 9.0), (11.5, 12.0)]
+DURATION = 14.0
+
+
+def blocks(samples, size=SAMPLE_RATE):
+    for start in range(0, len(samples), size):
+        yield samples[start:start + size]
+
+
+def test_chunks_overlap_and_cover_the_recording():
+    samples = np.arange(int(SAMPLE_RATE * 10), dtype=np.float32)
+    chunks = list(iter_chunks(blocks(samples), chunk_seconds=4, overlap_seconds=1))
+    assert [offset for offset, _ in chunks] == [0.0, 3.0, 6.0]  # The last 1 s is already in the third chunk
+    for offset, chunk in chunks:
+        assert chunk[0] == offset * SAMPLE_RATE  # Each chunk starts where its offset says
+    assert chunks[-1][1][-1] == samples[-1]
+
+
+def test_overlap_is_capped_at_half_a_chunk():
+    assert overlap_samples(4, 1) == SAMPLE_RATE
+    assert overlap_samples(4, 3) == 2 * SAMPLE_RATE
+    samples = np.zeros(int(SAMPLE_RATE * 10), dtype=np.float32)
+    offsets = [offset for offset, _ in iter_chunks(blocks(samples), chunk_seconds=4, overlap_seconds=3)]
+    assert offsets == [0.0, 2.0, 4.0, 6.0]
+
+
+def test_short_recording_is_one_chunk():
+    samples = np.ones(SAMPLE_RATE // 2, dtype=np.float32)
+    assert [(offset, len(chunk)) for offset, chunk in iter_chunks(blocks(samples), 4, 1)] == [(0.0, SAMPLE_RATE // 2)]
+
+
+def test_stub_engine_finds_speech():
+    samples = np.zeros(SAMPLE_RATE * 4, dtype=np.float32)
+    samples[SAMPLE_RATE:SAMPLE_RATE * 2] = 0.5
+    assert [(s["start"], s["end"]) for s in StubASREngine().transcribe(samples)] == [(1.0, 2.0)]
+
+
+@pytest.fixture
+def bursts_wav(tmp_path):
+    t = np.arange(int(SAMPLE_RATE * DURATION)) / SAMPLE_RATE
+    samples = np.zeros_like(t)
+    for start, end in BURSTS:
+        inside = (t >= start) & (t < end)
+        samples[inside] = 0.5 * np.sin(2 * np.pi * 440 * t[inside])
+    path = tmp_path / "dispatch.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_seconds, overlap_seconds", [(4, 1), (3, 1), (4, 3), (30, 2)])
+def test_stitched_transcript_has_each_burst_once(monkeypatch, bursts_wav, chunk_seconds, overlap_seconds):
+    monkeypatch.setattr(settings, "ASR_CHUNK_SECONDS", chunk_seconds)
+    monkeypatch.setattr(settings, "ASR_CHUNK_OVERLAP_SECONDS", overlap_seconds)
+    transcript = asyncio.run(asr_service._transcribe_file(bursts_wav, StubASREngine()))
+    assert transcript["duration_seconds"] == DURATION
+    assert [(s["start"], s["end"]) for s in transcript["segments"]] == BURSTS
+    assert [s["timestamp_ref"] for s in transcript["segments"]] == ["00:00:01", "00:00:03", "00:00:07", "00:00:11"]
@@ -0,0 +1,150 @@
+import asyncio
+import fakeredis.aioredis
+from app.utils import cache
+
+
+def run_with_redis(test):
+    """Run an async test against a fresh fakeredis-backed cache."""
+    async def main():
+        client = fakeredis.aioredis.FakeRedis()
+        cache.use_backend(cache.RedisCache(client))
+        try:
+            await test(client)
+        finally:
+            await cache.close()
+    asyncio.run(main())
+
+
+def counting_producer(value=b"payload", delay=0.05):
+    calls = []
+
+    async def producer():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+    return producer, calls
+
+
+def test_concurrent_misses_share_one_producer_call():
+    async def test(client):
+        producer, calls = counting_producer()
+        values = await asyncio.gather(*(cache.get_or_set("case:1", 60, producer) for _ in range(20)))
+        assert values == [b"payload"] * 20
+        assert len(calls) == 1
+        assert await client.get(cache.KEY_NAMESPACE + "case:1") == b"payload"
+    run_with_redis(test)
+
+
+def test_hit_skips_producer():
+    async def test(client):
+        await client.set(cache.KEY_NAMESPACE + "case:1", b"cached")
+        producer, calls = counting_producer()
+        assert await cache.get_or_set("case:1", 60, producer) == b"cached"
+        assert calls == []
+    run_with_redis(test)
+
+
+def test_str_values_are_stored_as_bytes():
+    async def test(client):
+        producer, _ = counting_producer("text")
+        assert await cache.get_or_set("case:1", 60, producer) == b"text"
+        assert await client.get(cache.KEY_NAMESPACE + "case:1") == b"text"
+    run_with_redis(test)
+
+
+def test_invalidation_during_fill_is_not_overwritten_with_stale_data():
+    async def test(client):
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def producer():
+            started.set()
+            await release.wait()
+            return b"stale"
+
+        fill = asyncio.create_task(cache.get_or_set("case:1", 60, producer))
+        await started.wait()
+        await cache.invalidate_case(1)
+        release.set()
+        assert await fill == b"stale"
+        assert await client.get(cache.KEY_NAMESPACE + "case:1") is None
+    run_with_redis(test)
+
+
+def test_invalidation_on_another_instance_during_fill_is_not_overwritten():
+    async def test(client):
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def producer():
+            started.set()
+            await release.wait()
+            return b"stale"
+
+        fill = asyncio.create_task(cache.get_or_set("case:1", 60, producer))
+        await started.wait()
+        other_instance = cache.RedisCache(client)
+        await other_instance.bump_generation()
+        await other_instance.delete("case:1")
+        release.set()
+        assert await fill == b"stale"
+        assert await client.get(cache.KEY_NAMESPACE + "case:1") is None
+        assert await cache.get_or_set("case:1", 60, counting_producer(b"fresh")[0]) == b"fresh"
+        assert await client.get(cache.KEY_NAMESPACE + "case:1") == b"fresh"
+    run_with_redis(test)
+
+
+def test_waits_for_another_instance_holding_the_fill_lock():
+    async def test(client):
+        backend = await cache.get_backend()
+        assert await backend.acquire_lock("case:1")  # Another API instance is filling this key
+
+        async def other_instance_finishes():
+            await asyncio.sleep(0.1)
+            await client.set(cache.KEY_NAMESPACE + "case:1", b"from other instance")
+
+        producer, calls = counting_producer()
+        other = asyncio.create_task(other_instance_finishes())
+        assert await cache.get_or_set("case:1", 60, producer) == b"from other instance"
+        await other
+        assert calls == []
+    run_with_redis(test)
+
+
+def test_invalidate_case_drops_detail_and_sample_listings():
+    async def test(client):
+        for key in (cache.case_key(1), cache.case_key(2), cache.sample_cases_key(None, 20), cache.sample_cases_key("abc", 20)):
+            await client.set(cache.KEY_NAMESPACE + key, b"x")
+        await cache.invalidate_case(1, is_sample_case=True)
+        remaining = sorted(key.decode() for key in await client.keys(cache.KEY_NAMESPACE + "*"))
+        assert remaining == [cache.KEY_NAMESPACE + cache.case_key(2)]
+    run_with_redis(test)
+
+
+def test_backend_errors_are_treated_as_misses():
+    class Broken(cache.LocalCache):
+        async def get(self, key):
+            raise ConnectionError("redis down")
+
+        async def set(self, key, value, ttl):
+            raise ConnectionError("redis down")
+
+    async def main():
+        cache.use_backend(Broken(10))
+        try:
+            producer, calls = counting_producer()
+            assert await cache.get_or_set("case:1", 60, producer) == b"payload"
+            assert len(calls) == 1
+        finally:
+            await cache.close()
+    asyncio.run(main())
+
+
+def test_producer_errors_reach_every_waiter():
+    async def test(client):
+        async def producer():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("db down")
+
+        results = await asyncio.gather(*(cache.get_or_set("case:1", 60, producer) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await client.get(cache.KEY_NAMESPACE + "case:1") is None
+    run_with_redis(test)
@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+import pytest
+from fastapi import HTTPException
+from app.api.upload import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 4, 20, 5, 123456, tzinfo=timezone.utc)
+    assert _decode_cursor(_encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_cursor_is_url_safe():
+    cursor = _encode_cursor(datetime(2026, 3, 1, 23, 59, 59), 10 ** 9)
+    assert all(c.isalnum() or c in "-_=" for c in cursor)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "", "bm9waXBl"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        _decode_cursor(cursor)
+    assert raised.value.status_code == 400
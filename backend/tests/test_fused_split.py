@@ -0,0 +1,100 @@
+import copy
+import pytest
+from app import models
+from app.api.analyze import AUDIO, NARRATIVE, SYNTHESIS, VISION, _split_fused, accepted_versions, fused_agent
+from app.config import settings
+from app.services.synthesizer import input_key
+
+REPORTS = [models.Report(id=10, narrative_text="first report"), models.Report(id=11, narrative_text="second report")]
+STILLS = [
+    (1, models.Evidence(id=20), {}),
+    (3, models.Evidence(id=21), {"exif": {"captured_at": "2026-03-01T04:21:07"}}),
+]
+
+
+def claim(report, time, action, obj):
+    return {"report": report, "timestamp_ref": time, "entity": "Suspect", "action": action, "object": obj,
+            "certainty": "EXPLICIT", "description": f"Suspect {action} {obj}"}
+
+
+def observation(label):
+    return {"timestamp_ref": "00:00:00", "category": "OBJECT", "entity": "Suspect", "label": label,
+            "confidence": "HIGH", "details": f"{label} in right hand"}
+
+
+ANSWER = {
+    "timeline": [claim(1, "04:20", "produced", "firearm"), claim("Report 2", "04:19", "arrived", "scene")],
+    "images": [
+        {"image": "Image 2", "observations": [observation("Phone"), observation("Keys")]},
+        {"image": 1, "observations": [observation("Jacket")]},
+    ],
+    "discrepancies": [{
+        "timestamp_ref": "04:20", "clean_claim": "Suspect produced a firearm", "visual_fact": "Suspect held a phone",
+        "description": "Object misidentification", "status": "FLAGGED", "claim_ref": "C1", "evidence_refs": ["O2"],
+        "evidence_id": 999,
+    }],
+}
+
+
+def split(answer=None):
+    return _split_fused(copy.deepcopy(answer or ANSWER), REPORTS, STILLS, [])
+
+
+def test_claims_are_merged_across_reports():
+    timeline = split()[NARRATIVE]["timeline"]
+    assert [(c["report_id"], c["timestamp_ref"]) for c in timeline] == [(11, "04:19"), (10, "04:20")]
+
+
+def test_observations_are_attributed_and_dated():
+    observations = split()[VISION]["observations"]
+    assert [(o["label"], o["evidence_id"], o["evidence_index"]) for o in observations] == [
+        ("Jacket", 20, 1), ("Phone", 21, 3), ("Keys", 21, 3),
+    ]
+    assert observations[1]["timestamp_ref"] == "04:21:07"
+
+
+def test_discrepancies_are_keyed_to_the_cited_inputs():
+    stages = split()
+    [discrepancy] = stages[SYNTHESIS]["discrepancies"]
+    firearm = next(c for c in stages[NARRATIVE]["timeline"] if c["object"] == "firearm")
+    phone = next(o for o in stages[VISION]["observations"] if o["label"] == "Phone")
+    assert discrepancy["claim_key"] == input_key(firearm)
+    assert discrepancy["source_keys"] == [input_key(phone)]
+    assert discrepancy["report_id"] == 10
+    assert discrepancy["evidence_id"] == 21  # From the cited observation, not the model's 999
+    assert discrepancy["fingerprint"]
+    assert stages[SYNTHESIS]["evidence_keys"] == [input_key(o) for o in stages[VISION]["observations"]]
+
+
+def test_malformed_items_are_skipped():
+    answer = copy.deepcopy(ANSWER)
+    answer["images"][0]["observations"].append(5)
+    answer["discrepancies"][0].update(claim_ref=["C1"], evidence_refs=[["O2"], "O9"])
+    answer["discrepancies"].append("not a finding")
+    stages = split(answer)
+    assert len(stages[VISION]["observations"]) == 3
+    [discrepancy] = stages[SYNTHESIS]["discrepancies"]
+    assert discrepancy["claim_key"] is None and discrepancy["source_keys"] == [] and discrepancy["evidence_id"] is None
+
+
+@pytest.mark.parametrize("change", [
+    lambda a: a["images"].pop(),  # An image without an entry
+    lambda a: a["images"][0].update(image=[2]),
+    lambda a: a["timeline"][0].update(report=3),  # A report the case doesn't have
+    lambda a: a["timeline"].append("not a claim"),
+])
+def test_unattributable_answers_raise_value_error(change):
+    answer = copy.deepcopy(ANSWER)
+    change(answer)
+    with pytest.raises(ValueError):
+        split(answer)
+
+
+def test_fused_results_count_as_current_only_in_fused_mode(monkeypatch):
+    fused = fused_agent.version_info()
+    monkeypatch.setattr(settings, "FUSED_ANALYSIS_ENABLED", False)
+    assert all(fused not in infos for infos in accepted_versions().values())
+    monkeypatch.setattr(settings, "FUSED_ANALYSIS_ENABLED", True)
+    accepted = accepted_versions()
+    assert all(fused in accepted[stage] for stage in (NARRATIVE, VISION, SYNTHESIS))
+    assert fused not in accepted[AUDIO]
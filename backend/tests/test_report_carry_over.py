@@ -0,0 +1,51 @@
+import json
+from app import models
+from app.api.analyze import _covers_reports, _pending_reports, _previous_extractions
+from app.services.analysis_store import RawAnalysis
+from app.services.timeline_merge import merge_timelines
+from app.utils.hashing import sha256_hex
+
+FIRST = models.Report(id=10, narrative_text="At 04:20 the Suspect produced a black firearm.")
+SECOND = models.Report(id=11, narrative_text="At 04:21 the Suspect produced a black phone.")
+CLAIM = {"timestamp_ref": "04:20", "entity": "Suspect", "action": "produced", "object": "black firearm",
+         "certainty": "EXPLICIT", "description": "Suspect produced a black firearm"}
+
+
+def content_hash(report):
+    return sha256_hex(report.narrative_text)[:16]
+
+
+def narrative(reports):
+    """A stored narrative result for these reports, shaped as _run_narrative saves it."""
+    result = {
+        "timeline": merge_timelines([(report.id, [CLAIM]) for report in reports]),
+        "reports": [
+            {"report_id": report.id, "report_index": idx + 1, "content_hash": content_hash(report), "claims": 1}
+            for idx, report in enumerate(reports)
+        ],
+    }
+    return RawAnalysis(json.dumps(result), "hash"), result
+
+
+def test_a_result_covering_the_case_reports_is_served():
+    raw, _ = narrative([FIRST, SECOND])
+    assert _covers_reports(raw, [SECOND, FIRST])
+
+
+def test_uploading_a_report_extracts_only_that_report():
+    raw, result = narrative([FIRST])
+    reports = [FIRST, SECOND]
+    assert not _covers_reports(raw, reports)
+    hashes = {report.id: content_hash(report) for report in reports}
+    assert _pending_reports(reports, hashes, _previous_extractions(result)) == [SECOND]
+
+
+def test_an_edited_report_is_extracted_again():
+    _, result = narrative([FIRST, SECOND])
+    reports = [FIRST, SECOND]
+    hashes = {FIRST.id: content_hash(FIRST), SECOND.id: "edited"}
+    assert _pending_reports(reports, hashes, _previous_extractions(result)) == [SECOND]
+
+
+def test_a_result_without_report_ids_is_recomputed():
+    assert not _covers_reports(RawAnalysis(json.dumps({"timeline": [CLAIM]}), "hash"), [FIRST])
@@ -0,0 +1,128 @@
+import json
+from app import schemas
+from app.services.synthesizer import carried_over, fingerprint, input_key, partition_scopes, time_window_candidates
+
+WINDOW = 15 * 60
+
+
+def obs(captured_at=None):
+    return {"entity": "Suspect", "label": "Phone", "captured_at": captured_at}
+
+
+def test_bare_report_times_are_never_pruned():
+    # "04:20" may be an offset into a recording; the photo's EXIF clock says nothing about it
+    candidates = time_window_candidates([{"timestamp_ref": "04:20"}], [obs("2026-03-01T22:14:05"), obs()], WINDOW)
+    assert candidates == [None]
+
+
+def test_dated_claim_skips_same_day_observations_outside_the_window():
+    observations = [obs("2026-03-01T04:25:00"), obs("2026-03-01T22:14:05"), obs("2026-03-02T22:14:05"), obs()]
+    candidates = time_window_candidates([{"timestamp_ref": "2026-03-01T04:20"}], observations, WINDOW)
+    # Other dates and undated observations are still compared
+    assert candidates == [[0, 2, 3]]
+
+
+def test_disabled_or_undated_evidence_compares_everything():
+    claims = [{"timestamp_ref": "2026-03-01T04:20"}]
+    assert time_window_candidates(claims, [obs("2026-03-01T22:14:05")], 0) is None
+    assert time_window_candidates(claims, [obs(), obs()], WINDOW) is None
+
+
+def test_timezone_offsets_are_ignored():
+    observations = [obs("2026-03-01T04:30:00+00:00")]
+    assert time_window_candidates([{"timestamp_ref": "2026-03-01 04:20-05:00"}], observations, WINDOW) == [[0]]
+
+
+def finding(claim_key=None, source_keys=(), clean_claim="Suspect produced a firearm"):
+    return schemas.SynthesisDiscrepancy(
+        clean_claim=clean_claim, visual_fact="Phone in hand", description="Mismatch",
+        claim_key=claim_key, source_keys=list(source_keys),
+    )
+
+
+def previous(*discrepancies, claim_keys=("c1", "c2"), evidence_keys=("o1", "o2")):
+    return schemas.SynthesisAnalysisResult(
+        discrepancies=list(discrepancies), claim_keys=list(claim_keys), evidence_keys=list(evidence_keys)
+    )
+
+
+def test_input_key_ignores_display_and_prompt_fields():
+    claim = {"timestamp_ref": "04:20", "entity": "Suspect", "description": "produced a firearm"}
+    annotated = {**claim, "evidence_index": 3, "ref": "C1", "compare_with": ["O1"], "report_index": 2, "agrees_with": [7]}
+    assert input_key(annotated) == input_key(claim)
+    assert input_key({**claim, "description": "produced a phone"}) != input_key(claim)
+
+
+def test_fingerprint_ignores_source_order():
+    a = {"claim_key": "c1", "source_keys": ["o1", "o2"], "clean_claim": "x", "visual_fact": "y"}
+    assert fingerprint(a) == fingerprint({**a, "source_keys": ["o2", "o1"]})
+    assert fingerprint(a) != fingerprint({**a, "source_keys": ["o1"]})
+
+
+def test_findings_on_present_inputs_carry_over():
+    kept = carried_over(previous(finding("c1", ["o1"]), finding("c2", ["o1", "o2"])), {"c1", "c2", "c3"}, {"o1", "o2", "o3"})
+    assert [(d["claim_key"], d["source_keys"]) for d in kept] == [("c1", ["o1"]), ("c2", ["o1", "o2"])]
+
+
+def test_findings_on_removed_inputs_are_retired():
+    result = previous(finding("c1", ["o1"]), finding("c2", ["o2"]), finding("c2", ["o1"]))
+    kept = carried_over(result, {"c1", "c2"}, {"o1"})
+    assert [(d["claim_key"], d["source_keys"]) for d in kept] == [("c1", ["o1"]), ("c2", ["o1"])]
+    assert carried_over(result, {"c2"}, {"o1", "o2"})[0]["claim_key"] == "c2"
+    assert len(carried_over(result, {"c2"}, {"o1", "o2"})) == 2
+
+
+def test_unreferenced_findings_last_only_while_nothing_is_removed():
+    result = previous(finding())
+    assert len(carried_over(result, {"c1", "c2", "c3"}, {"o1", "o2"})) == 1
+    assert carried_over(result, {"c1"}, {"o1", "o2"}) == []
+
+
+def evidence_items(images, per_image):
+    return [
+        {"evidence_id": 100 + image, "label": f"object {n}", "details": "x" * 200,
+         "captured_at": f"2026-03-01T04:{59 - image:02d}:00"}
+        for image in range(images) for n in range(per_image)
+    ]
+
+
+def pairs(scopes):
+    return {(i, j) for i, scope in scopes.items() for j in scope}
+
+
+def test_small_case_is_one_prompt():
+    claims = [{"description": "Suspect produced a firearm"}] * 3
+    scopes = {i: {0, 1} for i in range(3)}
+    assert partition_scopes(claims, evidence_items(1, 2), scopes, 40000) == [scopes]
+
+
+def test_large_case_covers_every_pair_once_within_budget():
+    claims = [{"description": f"claim {i} " + "y" * 100} for i in range(30)]
+    evidence = evidence_items(40, 3)
+    scopes = {i: set(range(len(evidence))) for i in range(len(claims))}
+    scopes[5] = {0, 1, 2}  # A time-window-pruned claim
+    max_chars = 6000
+    partitions = partition_scopes(claims, evidence, scopes, max_chars)
+    assert len(partitions) > 1
+    covered = [pair for partition in partitions for pair in pairs(partition)]
+    assert len(covered) == len(set(covered)) and set(covered) == pairs(scopes)
+    # "About" max_chars: an image's observations aren't split, so a prompt may run over by one image
+    image_chars = sum(len(json.dumps(item)) for item in evidence[:3])
+    for partition in partitions:
+        size = sum(len(json.dumps(evidence[j])) for j in set().union(*partition.values()))
+        size += sum(len(json.dumps(claims[i])) for i in partition)
+        assert size <= max_chars + image_chars
+    assert all(5 not in partition or partition[5] <= {0, 1, 2} for partition in partitions)
+
+
+def test_an_images_observations_share_a_prompt_in_capture_order():
+    claims = [{"description": "claim"}]
+    evidence = evidence_items(12, 3)
+    partitions = partition_scopes(claims, evidence, {0: set(range(len(evidence)))}, 4000)
+    groups = [sorted(partition[0]) for partition in partitions]
+    for group in groups:
+        ids = {evidence[j]["evidence_id"] for j in group}
+        assert all(sum(evidence[j]["evidence_id"] == i for j in group) == 3 for i in ids)
+    # Higher-numbered images were captured earlier, so they come first
+    assert 111 in {evidence[j]["evidence_id"] for j in groups[0]}
+    assert 100 in {evidence[j]["evidence_id"] for j in groups[-1]}
@@ -0,0 +1,54 @@
+from app.services.timeline_merge import clock_seconds, merge_timelines
+
+
+def claim(time, entity, action, obj, description=""):
+    return {"timestamp_ref": time, "entity": entity, "action": action, "object": obj,
+            "certainty": "EXPLICIT", "description": description or f"{entity} {action} {obj}"}
+
+
+FIRST = [claim("04:20", "Suspect", "produced", "black firearm"), claim(None, "Officer", "ordered", "drop it"),
+         claim("04:25", "Suspect", "fled", None)]
+SECOND = [claim("04:19", "Officer", "arrived", "scene"), claim("04:21", "suspect", "produced", "cell phone"),
+          claim("04:26", "Suspect", "fled", "on foot")]
+
+
+def test_clock_seconds():
+    assert clock_seconds("04:20") == 4 * 3600 + 20 * 60
+    assert clock_seconds(" 23:59:30 ") == 23 * 3600 + 59 * 60 + 30
+    assert clock_seconds("24:00") is None
+    assert clock_seconds("about 4pm") is None
+    assert clock_seconds(None) is None
+
+
+def test_claims_are_ordered_by_time_and_untimed_claims_follow_their_predecessor():
+    merged = merge_timelines([(10, FIRST), (11, SECOND)])
+    assert [(c["report_id"], c["timestamp_ref"]) for c in merged] == [
+        (11, "04:19"), (10, "04:20"), (10, None), (11, "04:21"), (10, "04:25"), (11, "04:26"),
+    ]
+    assert [c["report_index"] for c in merged] == [2, 1, 1, 2, 1, 2]
+
+
+def test_same_action_on_a_different_object_conflicts():
+    merged = merge_timelines([(10, FIRST), (11, SECOND)])
+    produced = [c for c in merged if c["action"] == "produced"]
+    assert [c["conflicts_with"] for c in produced] == [[11], [10]]
+    assert all(c["agrees_with"] == [] for c in produced)
+
+
+def test_same_action_within_the_window_agrees():
+    merged = merge_timelines([(10, FIRST), (11, SECOND)])
+    fled = [c for c in merged if c["action"] == "fled"]
+    assert [c["agrees_with"] for c in fled] == [[11], [10]]
+
+
+def test_claims_outside_the_window_or_from_one_report_are_not_compared():
+    far = [claim("05:30", "Suspect", "produced", "cell phone")]
+    merged = merge_timelines([(10, FIRST), (11, far)])
+    assert all(c["agrees_with"] == [] and c["conflicts_with"] == [] for c in merged)
+    single = merge_timelines([(10, FIRST + [claim("04:21", "Suspect", "produced", "cell phone")])])
+    assert all(c["conflicts_with"] == [] for c in single)
+
+
+def test_inputs_are_not_modified():
+    merge_timelines([(10, FIRST), (11, SECOND)])
+    assert "report_id" not in FIRST[0]
@@ -0,0 +1,64 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from app.services.agent_vision import _sheet_timestamp
+from app.services.video_service import _extract_keyframes, build_contact_sheets
+
+TIMESTAMPS = ["00:00:00", "00:00:12", "00:01:05"]
+
+PARAMS = {
+    "sample_fps": 4,
+    "scene_threshold": 0.35,
+    "motion_threshold": 0.08,
+    "min_gap": 1.0,
+    "dedup_distance": 6,
+    "max_keyframes": 4,
+    "max_dimension": 320,
+}
+
+
+@pytest.mark.parametrize("reported, expected", [
+    ("00:00:12", "00:00:12"),  # Exact
+    ("#2", "00:00:12"),  # Tile number
+    ("3", "00:01:05"),
+    ("00:12", "00:00:12"),  # Shortened forms of a listed timestamp
+    ("0:01:05", "00:01:05"),
+    ("00:00:30", "00:00:00"),  # Not on the sheet: first tile
+    ("#9", "00:00:00"),
+    (None, "00:00:00"),
+])
+def test_sheet_timestamp(reported, expected):
+    assert _sheet_timestamp(reported, TIMESTAMPS) == expected
+
+
+@pytest.fixture
+def moving_video(tmp_path):
+    """30 s of 720p video whose colour and a moving bar change every frame."""
+    cv2 = pytest.importorskip("cv2")
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (1280, 720))
+    rng = np.random.default_rng(0)
+    for i in range(300):
+        frame = np.full((720, 1280, 3), (i * 7) % 255, np.uint8)
+        frame[:, (i * 37) % 1180:(i * 37) % 1180 + 100] = rng.integers(0, 255, 3)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def test_keyframes_are_bounded_shrunk_and_in_time_order(moving_video):
+    keyframes, stats = _extract_keyframes(moving_video, PARAMS)
+    assert stats["scene_candidates"] > PARAMS["max_keyframes"]
+    assert len(keyframes) == stats["keyframes"] == PARAMS["max_keyframes"]
+    times = [t for t, _ in keyframes]
+    assert times == sorted(times)
+    for _, jpeg in keyframes:
+        assert max(Image.open(io.BytesIO(jpeg)).size) <= PARAMS["max_dimension"]
+
+
+def test_contact_sheets_group_keyframes(moving_video):
+    keyframes, _ = _extract_keyframes(moving_video, {**PARAMS, "max_keyframes": 5})
+    sheets = build_contact_sheets(keyframes, per_sheet=4)
+    assert [len(sheet.timestamps) for sheet in sheets] == [4, 1]
+    assert Image.open(io.BytesIO(sheets[0].jpeg)).size == (640, 360)  # 2x2 tiles of 320x180
@@ -0,0 +1,71 @@
+import asyncio
+from app.services.agent_vision import _plan_batches
+from app.services.base_provider import BaseAIProvider
+
+MB = 1024 * 1024
+
+
+def test_packs_in_order_up_to_the_image_limit():
+    assert _plan_batches([MB] * 7, max_images=3, max_bytes=100 * MB) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_splits_on_the_byte_budget():
+    assert _plan_batches([4 * MB, 4 * MB, 4 * MB, MB], max_images=8, max_bytes=9 * MB) == [[0, 1], [2, 3]]
+
+
+def test_unreadable_and_oversized_images_go_alone():
+    # The readable images around them still share a batch
+    sizes = [MB, None, MB, 20 * MB, MB]
+    assert _plan_batches(sizes, max_images=8, max_bytes=15 * MB) == [[1], [3], [0, 2, 4]]
+
+
+def test_single_image_provider_gets_one_per_batch():
+    assert _plan_batches([MB, MB, MB], max_images=1, max_bytes=15 * MB) == [[0], [1], [2]]
+
+
+def test_no_images():
+    assert _plan_batches([], max_images=8, max_bytes=15 * MB) == []
+
+
+class SingleImageProvider(BaseAIProvider):
+    """Answers each image with its own bytes as the observation label."""
+    def __init__(self, answer=None):
+        self.answer = answer
+        self.calls = []
+
+    async def generate_json(self, prompt, model_name=None):
+        return {}
+
+    async def analyze_image(self, image_path, prompt, model_name=None):
+        self.calls.append(prompt)
+        with open(image_path, "rb") as f:
+            label = f.read().decode()
+        if self.answer:
+            return self.answer(label)
+        return {"observations": [{"label": label}]}
+
+
+def test_default_analyze_images_makes_one_call_per_image():
+    provider = SingleImageProvider()
+    result = asyncio.run(provider.analyze_images([b"first", b"second"], "prompt"))
+    assert provider.calls == ["prompt", "prompt"]
+    assert result == {"images": [
+        {"image": 1, "observations": [{"label": "first"}]},
+        {"image": 2, "observations": [{"label": "second"}]},
+    ]}
+
+
+def test_default_analyze_images_renumbers_entries_and_concatenates_lists():
+    provider = SingleImageProvider(lambda label: {
+        "images": [{"image": 1, "observations": [{"label": label}]}], "timeline": [label], "note": label,
+    })
+    result = asyncio.run(provider.analyze_images([b"first", b"second"], "prompt"))
+    assert [entry["image"] for entry in result["images"]] == [1, 2]
+    assert result["timeline"] == ["first", "second"]
+    assert result["note"] == "first"
+
+
+def test_default_analyze_images_returns_the_first_error():
+    provider = SingleImageProvider(lambda label: {"error": f"{label} failed"})
+    assert asyncio.run(provider.analyze_images([b"first", b"second"], "prompt")) == {"error": "first failed"}
+    assert len(provider.calls) == 1
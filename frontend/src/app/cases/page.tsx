@@ -14,13 +14,16 @@ export default function CasesPage() {
     const [cases, setCases] = useState<CaseListItem[]>([]);
     const [isLoading, setIsLoading] = useState(true);
     const [deletingId, setDeletingId] = useState<number | null>(null);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const router = useRouter();
 
     const fetchCases = async () => {
         setIsLoading(true);
         try {
             const res = await endpoints.getCases();
-            setCases(res.data);
+            setCases(res.data.items);
+            setNextCursor(res.data.next_cursor);
         } catch (err) {
             console.error("Failed to load cases", err);
         } finally {
@@ -28,6 +31,20 @@ export default function CasesPage() {
         }
     };
 
+    const fetchMoreCases = async () => {
+        if (!nextCursor) return;
+        setIsLoadingMore(true);
+        try {
+            const res = await endpoints.getCases(nextCursor);
+            setCases(prev => [...prev, ...res.data.items]);
+            setNextCursor(res.data.next_cursor);
+        } catch (err) {
+            console.error("Failed to load more cases", err);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     useEffect(() => {
         fetchCases();
     }, []);
@@ -202,6 +219,19 @@ export default function CasesPage() {
                                 </CardContent>
                             </Card>
                         ))}
+                        {nextCursor && (
+                            <div className="flex justify-center pt-2">
+                                <Button
+                                    variant="outline"
+                                    onClick={fetchMoreCases}
+                                    disabled={isLoadingMore}
+                                    className="glass glass-hover border-border/50"
+                                >
+                                    {isLoadingMore && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                                    Load more
+                                </Button>
+                            </div>
+                        )}
                     </div>
                 )}
             </main>
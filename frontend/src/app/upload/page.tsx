@@ -30,7 +30,7 @@ export default function UploadPage() {
             setIsLoadingSampleCases(true);
             try {
                 const res = await endpoints.getSampleCases();
-                setSampleCases(res.data);
+                setSampleCases(res.data.items);
             } catch (error) {
                 console.error('Failed to fetch sample cases:', error);
             } finally {
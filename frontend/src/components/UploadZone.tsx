@@ -16,6 +16,9 @@ interface UploadZoneProps {
     multiple?: boolean; // Allow multiple files for evidence
 }
 
+// Match backend MAX_EVIDENCE_PER_CASE; the backend still rejects uploads past its own limit
+const MAX_EVIDENCE_FILES = Number(process.env.NEXT_PUBLIC_MAX_EVIDENCE_FILES || 500);
+
 interface UploadedFile {
     name: string;
     status: 'uploading' | 'complete' | 'error';
@@ -79,7 +82,7 @@ export function UploadZone({ onUpload, type, label, accept, multiple = false }:
     const { getRootProps, getInputProps, isDragActive, fileRejections } = useDropzone({
         onDrop,
         accept,
-        maxFiles: multiple ? 3 : 1, // Match backend limit of 3
+        maxFiles: multiple ? MAX_EVIDENCE_FILES : 1,
         maxSize: 20 * 1024 * 1024, // 20MB limit
         disabled: isUploading,
         onDropRejected: (rejections) => {
@@ -89,7 +92,7 @@ export function UploadZone({ onUpload, type, label, accept, multiple = false }:
                     if (error.code === 'file-too-large') {
                         message = `File is larger than 20MB`;
                     } else if (error.code === 'too-many-files') {
-                        message = `Maximum 3 files allowed`;
+                        message = `Maximum ${MAX_EVIDENCE_FILES} files allowed`;
                     }
                     setUploadedFiles(prev => [...prev, {
                         name: rejection.file.name,
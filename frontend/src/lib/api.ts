@@ -38,6 +38,11 @@ export interface CaseListItem {
     thumbnail_path?: string;
 }
 
+export interface CaseListPage {
+    items: CaseListItem[];
+    next_cursor: string | null;
+}
+
 export interface Report {
     id: number;
     case_id: number;
@@ -82,11 +87,11 @@ export interface SynthesisDiscrepancy {
 
 export const endpoints = {
     // Case management
-    getCases: () =>
-        api.get<CaseListItem[]>('/cases'),
+    getCases: (cursor?: string) =>
+        api.get<CaseListPage>('/cases', { params: cursor ? { cursor } : undefined }),
 
     getSampleCases: () =>
-        api.get<CaseListItem[]>('/sample-cases'),
+        api.get<CaseListPage>('/sample-cases'),
 
     createCase: (data: { title: string; description: string }) =>
         api.post<Case>('/cases', data),